@@ -1,170 +1,488 @@
+import argparse
+import hashlib
 import json
 import os
-import networkx as nx
+import webbrowser
+import numpy as np
 import plotly.graph_objs as go
-import plotly.io as pio
+import plotly.offline
 
-pio.renderers.default = "browser"
+from trail_model import TrailColumns
+from sim_index import find_sim_file, load_sim_trace, load_spawn_tree
 
-parsed_data_path = os.path.join("output", "parsed_data.json")
-with open(parsed_data_path, "r") as f:
-    data = json.load(f)
+OUTPUT_DIR = os.path.join("output", "3d")
+POINT_BUDGET = 50_000
+# Part of the cache key: bump when the figures change so stale HTML is not reused
+RENDER_VERSION = "3"
 
-trail_data = data["trail"]
-trail_data.sort(key=lambda x: x['step'])  
-
-G = nx.DiGraph()
-step_to_node = {}
-proc_spawn_depth = {}  
-parent_map = {}        
-
-for i, step in enumerate(trail_data):
-    sid = f"s{step['step']}"
-    proc_id = step['proc_id']
-    proc = step['proc_name']
-    label = f"P{proc_id}@{step['line']}"
-
-    if proc_id not in proc_spawn_depth:
-        if i > 0:
-            prev_proc_id = trail_data[i - 1]['proc_id']
-            parent_map[proc_id] = prev_proc_id
-            proc_spawn_depth[proc_id] = proc_spawn_depth.get(prev_proc_id, 0) + 1
-        else:
-            proc_spawn_depth[proc_id] = 0  # root
-
-    step_to_node[step['step']] = {
-        'sid': sid,
-        'proc': proc,
-        'label': label,
-        'step': step['step'],
-        'depth': proc_spawn_depth[proc_id],
-    }
-    G.add_node(sid, **step_to_node[step['step']])
-
-for i in range(1, len(trail_data)):
-    prev_step = trail_data[i - 1]['step']
-    curr_step = trail_data[i]['step']
-    G.add_edge(f"s{prev_step}", f"s{curr_step}")
-
-processed_trail = []
-for sid in sorted(G.nodes, key=lambda x: G.nodes[x]['step']):
-    node = G.nodes[sid]
-    processed_trail.append({
-        'sid': sid,
-        'step': node['step'],
-        'depth': node['depth'],
-        'proc': node['proc'],
-        'label': node['label'],
-    })
-
-process_names = sorted(set(node['proc'] for node in processed_trail))
-proc_to_z = {proc: i for i, proc in enumerate(process_names)}
 palette = [
     "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728",
     "#9467bd", "#8c564b", "#e377c2", "#7f7f7f",
     "#bcbd22", "#17becf"
 ]
-proc_color_map = {proc: palette[i % len(palette)] for i, proc in enumerate(process_names)}
-
-node_traces = []
-first_step = min(node['step'] for node in processed_trail)
-last_step = max(node['step'] for node in processed_trail)
-
-for proc in process_names:
-    x, y, z = [], [], []
-    text, hovertext, color, marker_size = [], [], [], []
-    
-    for node in processed_trail:
-        if node['proc'] != proc:
-            continue
-        step = node['step']
-        depth = node['depth']
-        z_val = proc_to_z[proc]
-        
-        x.append(step)
-        y.append(depth)
-        z.append(z_val)
-        hovertext.append(f"Step {step} | Proc: {proc} | Depth: {depth} | Label: {node['label']}")
-        marker_size.append(12 if step in (first_step, last_step) else 8)
-        text.append("START" if step == first_step else "END" if step == last_step else "")
-        color.append(proc_color_map[proc])
-    
-    node_traces.append(go.Scatter3d(
+
+
+def load_trail(parsed_data_path=os.path.join("output", "parsed_data.json")):
+    with open(parsed_data_path, "r") as f:
+        data = json.load(f)
+    return data["trail"]
+
+
+def spawn_depths(columns, spawn_tree=None):
+    """Depth per row in the spawn tree recorded by the Sim "creates proc" events.
+
+    Without a Sim trace, the process that ran just before a pid first appears is taken as its parent.
+    """
+    if spawn_tree is not None:
+        return np.fromiter((spawn_tree.depth_of(pid) for pid in columns.row_pid), dtype=np.int64,
+                           count=len(columns.row_pid))
+    depth = np.zeros(len(columns.proc_names), dtype=np.int64)
+    if len(columns) == 0:
+        return depth
+    # Rows are numbered by first appearance, so a parent's depth is always known before its child's
+    _, first = np.unique(columns.row, return_index=True)
+    for row, i in enumerate(first):
+        if i > 0:
+            depth[row] = depth[columns.row[i - 1]] + 1
+    return depth
+
+
+def build_state_arrays(columns, spawn_tree=None):
+    """Node coordinates for the chain of trail steps: x = step, y = spawn depth, z = process."""
+    process_names = sorted(columns.proc_names)
+    z_of_row = np.empty(len(columns.proc_names), dtype=np.int64)
+    row_of = {name: r for r, name in enumerate(columns.proc_names)}
+    z_of_row[[row_of[name] for name in process_names]] = np.arange(len(process_names))
+
+    x = columns.step
+    y = spawn_depths(columns, spawn_tree)[columns.row]
+    z = z_of_row[columns.row]
+    return process_names, x, y, z
+
+
+def build_edge_arrays(x, y, z):
+    """Consecutive steps joined by segments, NaN-separated so one trace draws them all."""
+    return segment_arrays((x[:-1], y[:-1], z[:-1]), (x[1:], y[1:], z[1:]))
+
+
+def segment_arrays(src, dst):
+    """x, y, z lists of NaN-separated segments from each src point to the matching dst point."""
+    coords = []
+    for a, b in zip(src, dst):
+        seg = np.full(3 * len(a), np.nan)
+        seg[0::3] = a
+        seg[1::3] = b
+        coords.append(seg)
+    return coords
+
+
+def build_edge_traces(stem, loop=None, back=None):
+    """Edge traces of the run; a lasso gets its stem, its loop and the edge closing the loop as separate traces."""
+    if loop is None:
+        return [go.Scatter3d(x=stem[0], y=stem[1], z=stem[2], mode="lines", line=dict(color="gray", width=2),
+                             hoverinfo="none", name="Edges", visible=True)]
+    return [
+        go.Scatter3d(x=stem[0], y=stem[1], z=stem[2], mode="lines", line=dict(color="gray", width=2),
+                     hoverinfo="none", name="Stem", visible=True),
+        go.Scatter3d(x=loop[0], y=loop[1], z=loop[2], mode="lines", line=dict(color="#ff7f0e", width=5),
+                     hoverinfo="none", name="Cycle", visible=True),
+        go.Scatter3d(x=back[0], y=back[1], z=back[2], mode="lines",
+                     line=dict(color="#d95f02", width=5, dash="dash"),
+                     hoverinfo="none", name="Back to cycle start", visible=True),
+    ]
+
+
+def cluster_steps(row, step, budget):
+    """Merge each process's steps into step bins, doubling the bin width until at most `budget` clusters remain.
+
+    Returns the cluster of every step plus per-cluster row, first/last/mean step and size.
+    """
+    origin = int(step[0])
+    width = max(int(np.ceil(len(step) / budget)), 1)
+    while True:
+        keys = row.astype(np.int64) * (int(step[-1] - origin) // width + 1) + (step - origin) // width
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        if len(uniq) <= budget:
+            break
+        width *= 2
+
+    count = np.bincount(inverse)
+    first = np.full(len(uniq), step[-1])
+    np.minimum.at(first, inverse, step)
+    last = np.zeros(len(uniq), dtype=step.dtype)
+    np.maximum.at(last, inverse, step)
+    mean = np.bincount(inverse, weights=step) / count
+    cluster_row = np.empty(len(uniq), dtype=row.dtype)
+    cluster_row[inverse] = row
+    return inverse, cluster_row, first, last, mean, count
+
+
+def build_cluster_traces(process_names, z_of_row, depth_of_row, clusters):
+    _, cluster_row, first, last, mean, count = clusters
+    traces = []
+    for k, proc in enumerate(process_names):
+        row = np.flatnonzero(z_of_row == k)[0]
+        idx = np.flatnonzero(cluster_row == row)
+        traces.append(go.Scatter3d(
+            x=mean[idx], y=np.full(len(idx), depth_of_row[row]), z=np.full(len(idx), k),
+            mode="markers",
+            name=proc,
+            marker=dict(size=4 + 2 * np.log2(count[idx]), color=palette[k % len(palette)]),
+            customdata=np.column_stack((first[idx], last[idx], count[idx])),
+            hovertemplate=f"Steps %{{customdata[0]}}-%{{customdata[1]}} | Proc: {proc} | "
+                          f"%{{customdata[2]}} steps<extra></extra>",
+            visible=True
+        ))
+    return traces
+
+
+def build_node_traces(columns, process_names, x, y, z):
+    first_step, last_step = (x[0], x[-1]) if len(x) else (None, None)
+    start = columns.cycle_start
+    cycle_step = x[start] if start is not None else None
+
+    # One stable sort by process replaces a scan of every node per process
+    order = np.argsort(z, kind="stable")
+    bounds = np.searchsorted(z[order], np.arange(len(process_names) + 1))
+
+    traces = []
+    for k, proc in enumerate(process_names):
+        idx = order[bounds[k]:bounds[k + 1]]
+        px, py = x[idx], y[idx]
+        is_end = (px == first_step) | (px == last_step) | (px == cycle_step)
+        text = np.where(px == first_step, "START", np.where(px == last_step, "END", ""))
+        if cycle_step is not None:
+            text = np.where(px == cycle_step, "CYCLE START", text)
+        traces.append(go.Scatter3d(
+            x=px, y=py, z=z[idx],
+            mode="markers+text",
+            name=proc,
+            marker=dict(size=np.where(is_end, 12, 8), color=palette[k % len(palette)]),
+            text=text,
+            customdata=np.column_stack((columns.proc_id[idx], columns.transition[idx])),
+            hovertemplate=f"Step %{{x}} | Proc: {proc} | Depth: %{{y}} | Label: P%{{customdata[0]}}@t%{{customdata[1]}}<extra></extra>",
+            textposition="top center",
+            textfont=dict(size=12, color="black"),
+            visible=True
+        ))
+    return traces
+
+
+def build_figure(trail_data, budget=POINT_BUDGET, step_range=None, spawn_tree=None):
+    """One node per step, or per cluster of a process's steps when more than `budget` steps are in view.
+
+    `step_range` = (first, last) limits the figure to that window, which is how clusters are drilled into.
+    """
+    columns = TrailColumns(trail_data)
+    process_names, x, y, z = build_state_arrays(columns, spawn_tree)
+    title = "SPIN Trail Visualization (Step x Depth x Process)"
+
+    if step_range is not None:
+        i0, i1 = columns.window(step_range[0], step_range[1] + 1)
+        for name in ("step", "proc_id", "transition", "line", "row", "claim", "cycle"):
+            setattr(columns, name, getattr(columns, name)[i0:i1])
+        x, y, z = x[i0:i1], y[i0:i1], z[i0:i1]
+        title += f" - steps {step_range[0]}-{step_range[1]}"
+
+    if len(x) > budget:
+        # Depth and process axis are per row; rows without steps in the window keep placeholders
+        z_of_row = np.zeros(len(columns.proc_names), dtype=np.int64)
+        depth_of_row = np.zeros(len(columns.proc_names), dtype=np.int64)
+        z_of_row[columns.row] = z
+        depth_of_row[columns.row] = y
+        row_of = {name: r for r, name in enumerate(columns.proc_names)}
+        z_of_row[[row_of[name] for name in process_names]] = np.arange(len(process_names))
+        clusters = cluster_steps(columns.row, columns.step, budget)
+        node_traces = build_cluster_traces(process_names, z_of_row, depth_of_row, clusters)
+
+        # Edges between consecutive clusters along the run, each distinct pair drawn once
+        seq = clusters[0]
+        change = np.flatnonzero(seq[1:] != seq[:-1])
+        n_clusters = len(clusters[1])
+        pairs = np.unique(seq[change] * n_clusters + seq[change + 1])
+        src, dst = pairs // n_clusters, pairs % n_clusters
+        cx, cy, cz = clusters[4], depth_of_row[clusters[1]], z_of_row[clusters[1]]
+        start = columns.cycle_start
+        if start is None:
+            edge_traces = build_edge_traces(segment_arrays((cx[src], cy[src], cz[src]), (cx[dst], cy[dst], cz[dst])))
+        else:
+            # A cluster pair belongs to the loop once its target cluster begins inside the cycle
+            loop = clusters[2][dst] >= columns.step[start]
+            a, b = seq[-1:], seq[start:start + 1]
+            edge_traces = build_edge_traces(
+                segment_arrays((cx[src[~loop]], cy[src[~loop]], cz[src[~loop]]), (cx[dst[~loop]], cy[dst[~loop]], cz[dst[~loop]])),
+                segment_arrays((cx[src[loop]], cy[src[loop]], cz[src[loop]]), (cx[dst[loop]], cy[dst[loop]], cz[dst[loop]])),
+                segment_arrays((cx[a], cy[a], cz[a]), (cx[b], cy[b], cz[b])),
+            )
+        title += f" - {len(seq)} steps in {n_clusters} clusters (hover a cluster, then --steps FIRST:LAST to drill in)"
+    else:
+        node_traces = build_node_traces(columns, process_names, x, y, z)
+        start = columns.cycle_start
+        if start is None:
+            edge_traces = build_edge_traces(build_edge_arrays(x, y, z))
+        else:
+            # Stem up to and into the first loop step, then the loop, then its last step back to the first
+            edge_traces = build_edge_traces(
+                build_edge_arrays(x[:start + 1], y[:start + 1], z[:start + 1]),
+                build_edge_arrays(x[start:], y[start:], z[start:]),
+                segment_arrays((x[-1:], y[-1:], z[-1:]), (x[start:start + 1], y[start:start + 1], z[start:start + 1])),
+            )
+
+    if columns.cycle_start is not None:
+        title += f" - lasso: steps from {columns.step[columns.cycle_start]} repeat"
+
+    dropdown_buttons = [
+        {
+            "label": "All Processes",
+            "method": "update",
+            "args": [
+                {"visible": [True] * (len(edge_traces) + len(node_traces))},
+                {"title": "All Processes"}
+            ]
+        }
+    ]
+
+    for i, proc in enumerate(process_names):
+        visibility = [True] * len(edge_traces) + [False] * len(node_traces)
+        visibility[len(edge_traces) + i] = True
+        dropdown_buttons.append({
+            "label": proc,
+            "method": "update",
+            "args": [
+                {"visible": visibility},
+                {"title": f"Process: {proc}"}
+            ]
+        })
+
+    fig = go.Figure(data=edge_traces + node_traces)
+
+    fig.update_layout(
+        title=title,
+        scene=dict(
+            xaxis=dict(title="Step"),
+            yaxis=dict(title="Depth"),
+            zaxis=dict(
+                title="Process",
+                tickvals=list(range(len(process_names))),
+                ticktext=process_names
+            )
+        ),
+        updatemenus=[{
+            "buttons": dropdown_buttons,
+            "direction": "down",
+            "showactive": True,
+            "x": 0.0,
+            "y": 1.15,
+            "xanchor": "left",
+            "yanchor": "top"
+        }],
+        margin=dict(l=0, r=0, b=0, t=40)
+    )
+    return fig
+
+
+class StateGraph:
+    """Distinct global control states of a run, with visit counts and weighted transitions."""
+
+    def __init__(self, bits, created):
+        self.bits = bits
+        self.created = created  # code of a process that was created but has not moved yet
+        self.keys = []          # packed state vector of each node
+        self.visits = []
+        self.first_step = []
+        self.entered_by = []    # pid whose move first reached the node
+        self.edges = {}         # (src, dst) -> number of times taken
+        self.node_of = {}
+
+    def visit(self, key, step, pid, prev):
+        node = self.node_of.get(key)
+        if node is None:
+            node = self.node_of[key] = len(self.keys)
+            self.keys.append(key)
+            self.visits.append(0)
+            self.first_step.append(step)
+            self.entered_by.append(pid)
+        self.visits[node] += 1
+        if prev is not None:
+            self.edges[(prev, node)] = self.edges.get((prev, node), 0) + 1
+        return node
+
+    def decode(self, node):
+        """(pid, code) for every live process of a node; code is the Sim state id or `created`."""
+        key, mask = self.keys[node], (1 << self.bits) - 1
+        pid, result = 0, []
+        while key:
+            code = key & mask
+            if code:
+                result.append((pid, code))
+            key >>= self.bits
+            pid += 1
+        return result
+
+
+def build_state_graph(sim):
+    """Hash-cons the global control state (Sim state id per live process) after every step.
+
+    The state vector is packed into one integer, `bits` per pid, and updated in place as
+    processes move, so each step costs O(1) and equal states share one dict entry.
+    """
+    created = int(sim.state.max()) + 1 if len(sim) else 1
+    bits = max(created.bit_length(), 1)
+    graph = StateGraph(bits, created)
+
+    # Creations and terminations happen at a depth, like the statements executed there
+    changes = [(d, 0, child, created) for d, _, child, _ in sim.creates]
+    changes += [(d, 1, pid, 0) for d, pid in sim.terminates]
+    changes += [(d, 2, pid, state) for d, pid, state in zip(sim.depth.tolist(), sim.pid.tolist(), sim.state.tolist())]
+    changes.sort(key=lambda c: (c[0], c[1]))
+
+    code = {}
+    key, prev, i = 0, None, 0
+    while i < len(changes):
+        depth = changes[i][0]
+        mover = None
+        # Statements sharing a depth (a rendezvous send and its receive) form one transition
+        while i < len(changes) and changes[i][0] == depth:
+            _, kind, pid, new = changes[i]
+            key += (new - code.get(pid, 0)) << (pid * bits)
+            code[pid] = new
+            if kind == 2 and mover is None:
+                mover = pid
+            i += 1
+        prev = graph.visit(key, depth, mover, prev)
+    return graph
+
+
+def build_state_graph_figure(graph, sim):
+    n = len(graph.keys)
+    visits = np.asarray(graph.visits, dtype=float)
+    x = np.asarray(graph.first_step, dtype=float)
+    y = np.array([len(graph.decode(k)) for k in range(n)], dtype=float)
+    z = np.array([-1 if p is None else p for p in graph.entered_by], dtype=float)
+
+    hover = []
+    for k in range(n):
+        procs = " ".join(
+            f"P{pid}:{'new' if c == graph.created else c}" for pid, c in graph.decode(k)
+        )
+        hover.append(f"State {k} | visits {graph.visits[k]} | first at step {graph.first_step[k]}<br>{procs}")
+
+    traces = []
+    if graph.edges:
+        pairs = np.array(list(graph.edges.keys()), dtype=np.int64)
+        weights = np.array(list(graph.edges.values()), dtype=np.int64)
+        keep = pairs[:, 0] != pairs[:, 1]
+        pairs, weights = pairs[keep], weights[keep]
+        # Scatter3d has one width per trace, so edges are bucketed by how often they were taken
+        for lo, hi, width in ((1, 1, 2), (2, 9, 4), (10, None, 7)):
+            sel = (weights >= lo) & (weights <= hi if hi else True)
+            if not sel.any():
+                continue
+            src, dst = pairs[sel, 0], pairs[sel, 1]
+            coords = []
+            for values in (x, y, z):
+                seg = np.full(3 * len(src), np.nan)
+                seg[0::3] = values[src]
+                seg[1::3] = values[dst]
+                coords.append(seg)
+            traces.append(go.Scatter3d(
+                x=coords[0], y=coords[1], z=coords[2],
+                mode="lines",
+                line=dict(color="gray", width=width),
+                hoverinfo="none",
+                name=f"Taken {lo}x" if hi == lo else f"Taken {lo}-{hi}x" if hi else f"Taken {lo}x+"
+            ))
+
+    traces.append(go.Scatter3d(
         x=x, y=y, z=z,
-        mode="markers+text",
-        name=proc,
-        marker=dict(size=marker_size, color=color),
-        text=text,
-        hovertext=hovertext,
-        hoverinfo="text",
-        textposition="top center",
-        textfont=dict(size=12, color="black"),
-        visible=True
+        mode="markers",
+        name="States",
+        marker=dict(size=6 + 3 * np.log2(visits), color=visits, colorscale="Viridis",
+                    colorbar=dict(title="Visits")),
+        hovertext=hover,
+        hoverinfo="text"
     ))
 
-edge_x, edge_y, edge_z = [], [], []
-for src, dst in G.edges():
-    edge_x += [G.nodes[src]['step'], G.nodes[dst]['step'], None]
-    edge_y += [G.nodes[src]['depth'], G.nodes[dst]['depth'], None]
-    edge_z += [proc_to_z[G.nodes[src]['proc']], proc_to_z[G.nodes[dst]['proc']], None]
-
-edge_trace = go.Scatter3d(
-    x=edge_x, y=edge_y, z=edge_z,
-    mode="lines",
-    line=dict(color="gray", width=2),
-    hoverinfo="none",
-    name="Edges",
-    visible=True
-)
-edge_traces = [edge_trace]
-
-dropdown_buttons = [
-    {
-        "label": "All Processes",
-        "method": "update",
-        "args": [
-            {"visible": [True] * (len(node_traces) + 1)},
-            {"title": "All Processes"}
-        ]
-    }
-]
+    fig = go.Figure(data=traces)
+    fig.update_layout(
+        title=f"SPIN State Graph ({n} distinct states from {len(sim)} steps)",
+        scene=dict(
+            xaxis=dict(title="First reached at step"),
+            yaxis=dict(title="Live processes"),
+            zaxis=dict(title="Entered by pid")
+        ),
+        margin=dict(l=0, r=0, b=0, t=40)
+    )
+    return fig
 
-for i, proc in enumerate(process_names):
-    visibility = [False] * (len(node_traces) + 1)
-    visibility[i] = True
-    visibility[-1] = True
-    dropdown_buttons.append({
-        "label": proc,
-        "method": "update",
-        "args": [
-            {"visible": visibility},
-            {"title": f"Process: {proc}"}
-        ]
-    })
-
-fig = go.Figure(data=edge_traces + node_traces)
-
-fig.update_layout(
-    title="SPIN Trail Visualization (Step x Depth x Process)",
-    scene=dict(
-        xaxis=dict(title="Step"),
-        yaxis=dict(title="Depth"),
-        zaxis=dict(
-            title="Process",
-            tickvals=list(proc_to_z.values()),
-            ticktext=list(proc_to_z.keys())
-        )
-    ),
-    updatemenus=[{
-        "buttons": dropdown_buttons,
-        "direction": "down",
-        "showactive": True,
-        "x": 0.0,
-        "y": 1.15,
-        "xanchor": "left",
-        "yanchor": "top"
-    }],
-    margin=dict(l=0, r=0, b=0, t=40)
-)
-
-fig.show()
+
+def input_hash(paths, *params):
+    h = hashlib.sha1(RENDER_VERSION.encode())
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    h.update(repr(params).encode())
+    return h.hexdigest()[:16]
+
+
+def plotly_asset(out_dir=OUTPUT_DIR):
+    """Write the plotly.js bundle once per version; every generated page links to it instead of inlining 3MB."""
+    name = f"plotly-{plotly.offline.get_plotlyjs_version()}.min.js"
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(out_dir, exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(plotly.offline.get_plotlyjs())
+        os.replace(path + ".tmp", path)
+    return name
+
+
+def cached_html(key, build_fig, out_dir=OUTPUT_DIR):
+    """Path of the page for `key`, building and writing it only when it is not cached yet."""
+    html_path = os.path.join(out_dir, f"{key}.html")
+    if not os.path.exists(html_path):
+        fig = build_fig()
+        asset = plotly_asset(out_dir)
+        fig.write_html(html_path + ".tmp", include_plotlyjs=asset, full_html=True)
+        os.replace(html_path + ".tmp", html_path)
+    return html_path
+
+
+def parse_step_range(text):
+    first, last = text.split(":")
+    return int(first), int(last)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--states", action="store_true",
+                        help="merge equal global states from the Sim trace instead of drawing one node per step")
+    parser.add_argument("--budget", type=int, default=POINT_BUDGET,
+                        help="maximum number of nodes before steps are clustered")
+    parser.add_argument("--steps", type=parse_step_range, metavar="FIRST:LAST",
+                        help="only draw this step window, at full detail if it fits the budget")
+    parser.add_argument("--no-open", action="store_true", help="write the HTML without opening a browser")
+    args = parser.parse_args()
+
+    if args.states:
+        sim_path = find_sim_file("data")
+        if sim_path is None:
+            raise FileNotFoundError("No .isf or .txt file with a Sim block found in /data")
+
+        def build():
+            sim = load_sim_trace("data")
+            return build_state_graph_figure(build_state_graph(sim), sim)
+        key = "states-" + input_hash([sim_path])
+    else:
+        trail_path = os.path.join("output", "parsed_data.json")
+        sim_path = find_sim_file("data")
+
+        def build():
+            return build_figure(load_trail(trail_path), args.budget, args.steps, load_spawn_tree("data"))
+        key = "trail-" + input_hash([trail_path] + ([sim_path] if sim_path else []), args.budget, args.steps)
+
+    html_path = cached_html(key, build)
+    print(html_path)
+    if not args.no_open:
+        webbrowser.open("file://" + os.path.abspath(html_path))
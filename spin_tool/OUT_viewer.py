@@ -1,6 +1,6 @@
+import argparse
 import sys
 import os
-import re
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QTextEdit,
     QPushButton, QScrollArea, QGroupBox, QHBoxLayout,
@@ -8,95 +8,16 @@ from PyQt6.QtWidgets import (
     QGraphicsRectItem, QFrame, QSplitter
 )
 from PyQt6.QtGui import QBrush, QPen, QColor
-from PyQt6.QtCore import Qt, QRectF
-
-
-def parse_spin_output(file_path):
-    data = {
-        "Compilation Commands": [],
-        "Settings Used": [],
-        "Verification Checks": {},
-        "Statespace Stats": {},
-        "Memory Usage": {},
-        "Unreached Code": [],
-        "Elapsed Time": "",
-        "Final Status": ""
-    }
-    try:
-        with open(file_path, 'r') as file:
-            for line in file:
-                if line.startswith('spin -a') or 'gcc' in line or './pan' in line:
-                    data["Compilation Commands"].append(line.strip())
-
-                if 'Partial Order Reduction' in line:
-                    data["Settings Used"].append("Partial Order Reduction enabled")
-
-                if 'never claim' in line:
-                    data["Verification Checks"]["never_claim"] = '+' in line
-                if 'assertion violations' in line:
-                    data["Verification Checks"]["assertion_violations"] = '+' in line
-                if 'non-progress cycles' in line:
-                    data["Verification Checks"]["non_progress_cycles"] = '+' in line
-                if 'invalid end states' in line:
-                    data["Verification Checks"]["invalid_end_states"] = '+' in line
-
-                if "State-vector" in line:
-                    match = re.search(r'State-vector (\d+) byte, depth reached (\d+), errors: (\d+)', line)
-                    if match:
-                        data["Statespace Stats"]["state_vector_size"] = int(match.group(1))
-                        data["Statespace Stats"]["depth_reached"] = int(match.group(2))
-                        data["Statespace Stats"]["errors"] = int(match.group(3))
-                if "states, stored" in line:
-                    nums = list(map(int, re.findall(r'\d+', line)))
-                    if len(nums) >= 2:
-                        data["Statespace Stats"]["states_stored"] = nums[0]
-                        data["Statespace Stats"]["states_visited"] = nums[1]
-                if "states, matched" in line:
-                    nums = re.findall(r'\d+', line)
-                    if nums:
-                        data["Statespace Stats"]["states_matched"] = int(nums[0])
-                if "transitions" in line:
-                    nums = re.findall(r'\d+', line)
-                    if nums:
-                        data["Statespace Stats"]["transitions"] = int(nums[0])
-                if "atomic steps" in line:
-                    nums = re.findall(r'\d+', line)
-                    if nums:
-                        data["Statespace Stats"]["atomic_steps"] = int(nums[0])
-                if "hash conflicts" in line:
-                    nums = re.findall(r'\d+', line)
-                    if nums:
-                        data["Statespace Stats"]["hash_conflicts"] = int(nums[0])
-
-                if "memory used" in line or "memory usage" in line:
-                    match = re.findall(r'([0-9\.]+)\s+memory used for ([^\(]+)', line)
-                    for value, key in match:
-                        data["Memory Usage"][key.strip()] = float(value)
-
-                if "unreached in proctype" in line or "unreached in init" in line:
-                    data["Unreached Code"].append(line.strip())
-
-                if "elapsed time" in line:
-                    match = re.search(r'elapsed time ([\d\.]+) seconds', line)
-                    if match:
-                        data["Elapsed Time"] = match.group(1) + " seconds"
-
-                if "No errors found" in line or "errors found" in line:
-                    data["Final Status"] = line.strip()
-    except Exception as e:
-        print(f"Error parsing file: {e}")
-
-    return data
-
-
-def find_out_file(directory):
-    try:
-        for filename in os.listdir(directory):
-            if filename.endswith(".out"):
-                return os.path.join(directory, filename)
-    except FileNotFoundError:
-        pass
-    return None
+from PyQt6.QtCore import Qt, QRectF, QTimer
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+from pan_monitor import PanMonitor
+from pan_output import find_out_file, load_pan_output
+from tuning import Metrics, recommend
+
+MAX_CHART_POINTS = 4000
+REFRESH_MS = 400        # a followed run is redrawn at most this often
 
 
 class ExpandableSection(QGroupBox):
@@ -123,8 +44,42 @@ class ExpandableSection(QGroupBox):
         self.text_area.setVisible(checked)
 
 
+class ProgressCharts(FigureCanvas):
+    """State space growth over the run, from pan's periodic progress lines."""
+
+    def __init__(self, progress=None):
+        self.fig = Figure(figsize=(9, 5))
+        super().__init__(self.fig)
+        self.setMinimumHeight(450)
+        if progress is not None:
+            self.draw_series(progress)
+
+    def draw_series(self, progress):
+        self.fig.clear()
+        axes = self.fig.subplots(2, 2, sharex=True)
+        # A stride keeps long runs to a few thousand points per line; rates are taken over the same stride
+        stride = max(len(progress) // MAX_CHART_POINTS, 1)
+        states_t, states_rate = progress.per_second(progress.states, stride)
+        trans_t, trans_rate = progress.per_second(progress.transitions, stride)
+        series = (
+            (axes[0, 0], states_t, states_rate, "States / second"),
+            (axes[0, 1], trans_t, trans_rate, "Transitions / second"),
+            (axes[1, 0], progress.t, progress.memory, "Memory (MB)"),
+            (axes[1, 1], progress.t, progress.depth, "Depth"),
+        )
+        for ax, t, values, title in series:
+            ax.plot(t[::stride], values[::stride], color="#4285F4", linewidth=1)
+            ax.set_title(title, fontsize=9)
+            ax.grid(True, linestyle="--", alpha=0.5)
+            ax.tick_params(labelsize=8)
+        for ax in axes[1]:
+            ax.set_xlabel("Elapsed time (s)", fontsize=8)
+        self.fig.tight_layout()
+        self.draw_idle()
+
+
 class SpinOutViewer(QWidget):
-    def __init__(self):
+    def __init__(self, monitor=None):
         super().__init__()
         self.setWindowTitle("SPIN .out File Viewer")
         self.resize(1000, 700)
@@ -200,89 +155,137 @@ class SpinOutViewer(QWidget):
         btn_layout.addWidget(self.close_all_btn)
         main_layout.addLayout(btn_layout)
 
-        data_folder = os.path.join(os.getcwd(), "data")
-        out_file = find_out_file(data_folder)
-
-        if not out_file:
-            msg = QLabel("No .out file found in the 'data' folder.")
-            main_layout.addWidget(msg)
+        self.sections = {}
+        self.monitor = monitor
+        if monitor is None:
+            out_file = find_out_file(os.path.join(os.getcwd(), "data"))
+            if not out_file:
+                main_layout.addWidget(QLabel("No .out file found in the 'data' folder."))
+                self.setLayout(main_layout)
+                return
+            result = load_pan_output(out_file)
         else:
-            parsed_data = parse_spin_output(out_file)
-            self.sections = {}
-            sections_data = {}
-
-            sections_data["Compilation Commands"] = "\n".join(parsed_data["Compilation Commands"]) or "None"
-            sections_data["Settings Used"] = "\n".join(parsed_data["Settings Used"]) or "None"
-
-            if parsed_data["Verification Checks"]:
-                checks_lines = []
-                for k, v in parsed_data["Verification Checks"].items():
-                    status = "Passed" if v else "Failed"
-                    checks_lines.append(f"{k}: {status}")
-                sections_data["Verification Checks"] = "\n".join(checks_lines)
-            else:
-                sections_data["Verification Checks"] = "None"
-
-            if parsed_data["Statespace Stats"]:
-                stats_lines = []
-                for k, v in parsed_data["Statespace Stats"].items():
-                    stats_lines.append(f"{k}: {v}")
-                sections_data["Statespace Stats"] = "\n".join(stats_lines)
-            else:
-                sections_data["Statespace Stats"] = "None"
-
-            if parsed_data["Memory Usage"]:
-                mem_lines = []
-                for k, v in parsed_data["Memory Usage"].items():
-                    mem_lines.append(f"{k}: {v} units")
-                sections_data["Memory Usage"] = "\n".join(mem_lines)
-            else:
-                sections_data["Memory Usage"] = "None"
-
-            sections_data["Unreached Code"] = "\n".join(parsed_data["Unreached Code"]) or "None"
-            sections_data["Elapsed Time"] = parsed_data["Elapsed Time"] or "Unknown"
-            sections_data["Final Status"] = parsed_data["Final Status"] or "Unknown"
-
-            scroll = QScrollArea()
-            scroll.setWidgetResizable(True)
-            content_widget = QWidget()
-            content_layout = QVBoxLayout()
-
-            for title, text in sections_data.items():
-                section = ExpandableSection(title, text)
-                self.sections[title] = section
-                content_layout.addWidget(section)
-
-            if parsed_data["Memory Usage"] or parsed_data["Statespace Stats"]:
-                chart_layout = QHBoxLayout()
-
-                if parsed_data["Memory Usage"]:
-                    pie_view = QGraphicsView()
-                    pie_scene = QGraphicsScene()
-                    pie_view.setScene(pie_scene)
-                    self.draw_piechart(pie_scene, parsed_data["Memory Usage"], 150, 150, 100)
-                    chart_layout.addWidget(pie_view)
-
-                if parsed_data["Statespace Stats"]:
-                    bar_view = QGraphicsView()
-                    bar_scene = QGraphicsScene()
-                    bar_view.setScene(bar_scene)
-                    self.draw_barchart(bar_scene, parsed_data["Statespace Stats"])
-                    chart_layout.addWidget(bar_view)
-
-                chart_container = QWidget()
-                chart_container.setLayout(chart_layout)
-                content_layout.addWidget(QLabel("Visualizations:"))
-                content_layout.addWidget(chart_container)
-
-            content_widget.setLayout(content_layout)
-            scroll.setWidget(content_widget)
-            main_layout.addWidget(scroll)
-
-            self.open_all_btn.clicked.connect(self.open_all)
-            self.close_all_btn.clicked.connect(self.close_all)
-
+            self.setWindowTitle("SPIN pan Run Monitor")
+            result = monitor.result
+            status_layout = QHBoxLayout()
+            self.status = QLabel()
+            self.status.setWordWrap(True)
+            status_layout.addWidget(self.status, 1)
+            self.stop_btn = QPushButton("Stop Run")
+            self.stop_btn.setObjectName("ClearButton")
+            self.stop_btn.clicked.connect(monitor.stop)
+            status_layout.addWidget(self.stop_btn)
+            main_layout.addLayout(status_layout)
+
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        content_widget = QWidget()
+        content_layout = QVBoxLayout()
+
+        for title, text in describe_sections(result).items():
+            section = ExpandableSection(title, text)
+            self.sections[title] = section
+            content_layout.addWidget(section)
+
+        chart_layout = QHBoxLayout()
+        self.pie_scene = QGraphicsScene()
+        self.pie_view = QGraphicsView(self.pie_scene)
+        chart_layout.addWidget(self.pie_view)
+        self.bar_scene = QGraphicsScene()
+        self.bar_view = QGraphicsView(self.bar_scene)
+        chart_layout.addWidget(self.bar_view)
+        self.chart_label = QLabel("Visualizations:")
+        self.chart_container = QWidget()
+        self.chart_container.setLayout(chart_layout)
+        content_layout.addWidget(self.chart_label)
+        content_layout.addWidget(self.chart_container)
+
+        # A falling states/sec curve with memory still growing points at hash table or memory pressure
+        self.progress_label = QLabel()
+        self.progress_charts = ProgressCharts()
+        self.charted = 0
+        content_layout.addWidget(self.progress_label)
+        content_layout.addWidget(self.progress_charts)
+
+        content_widget.setLayout(content_layout)
+        scroll.setWidget(content_widget)
+        main_layout.addWidget(scroll)
+
+        self.open_all_btn.clicked.connect(self.open_all)
+        self.close_all_btn.clicked.connect(self.close_all)
         self.setLayout(main_layout)
+        self.show_result(result)
+
+        if monitor is not None:
+            self.ended = None
+            monitor.finished.connect(self.run_finished)
+            self.timer = QTimer(self)
+            self.timer.timeout.connect(self.refresh)
+            self.timer.start(REFRESH_MS)
+            self.refresh()
+
+    def show_result(self, result):
+        for title, text in describe_sections(result).items():
+            area = self.sections[title].text_area
+            # Rewriting unchanged text would reset the scroll position on every refresh
+            if area.toPlainText() != text:
+                area.setPlainText(text)
+
+        memory = result.memory_parts()
+        self.chart_label.setVisible(bool(memory or result.stats))
+        self.chart_container.setVisible(bool(memory or result.stats))
+        self.pie_view.setVisible(bool(memory))
+        if memory:
+            self.pie_scene.clear()
+            self.draw_piechart(self.pie_scene, memory, 150, 150, 100)
+        self.bar_view.setVisible(bool(result.stats))
+        if result.stats:
+            self.draw_barchart(self.bar_scene, result.stats)
+
+        progress = result.progress
+        self.progress_label.setVisible(len(progress) > 1)
+        self.progress_charts.setVisible(len(progress) > 1)
+        if len(progress) > 1 and len(progress) != self.charted:
+            self.progress_label.setText(f"State space growth ({len(progress)} progress reports):")
+            self.progress_charts.draw_series(progress)
+            self.charted = len(progress)
+
+    def refresh(self):
+        """Redraw a followed run if new output arrived since the last tick."""
+        if not self.monitor.dirty:
+            return
+        self.monitor.dirty = False
+        result = self.monitor.result
+        result.progress.freeze()
+        self.show_result(result)
+
+        progress = result.progress
+        head = "Running" if self.monitor.running else f"Finished ({self.ended})"
+        lines = [f"{head}: {self.monitor.source}"]
+        if len(progress):
+            line = (f"depth {progress.depth[-1]:,.0f}, {progress.states[-1]:,.0f} states, "
+                    f"{progress.memory[-1]:,.1f} MB after {progress.t[-1]:,.1f} s")
+            if len(progress) > 2:
+                _, rate = progress.per_second(progress.states, max(len(progress) // 10, 1))
+                if len(rate):
+                    line += f", now {rate[-1]:,.0f} states/s"
+            lines.append(line)
+        if result.errors:
+            lines.append(f"{len(result.errors)} error(s): {result.errors[-1]['message']}")
+        if result.warnings:
+            lines.append(result.warnings[-1])
+        self.status.setText("\n".join(lines))
+        self.status.setStyleSheet("color: #c23321;" if result.errors else "")
+
+    def run_finished(self, how):
+        self.ended = how
+        self.stop_btn.setEnabled(False)
+        self.refresh()
+
+    def closeEvent(self, event):
+        if self.monitor is not None:
+            self.monitor.stop()
+        super().closeEvent(event)
 
     def open_all(self):
         for section in self.sections.values():
@@ -331,7 +334,8 @@ class SpinOutViewer(QWidget):
             "states_matched": "Matched",
             "transitions": "Trans",
             "atomic_steps": "Atomic",
-            "hash_conflicts": "Conflicts"
+            "hash_conflicts": "Conflicts",
+            "hash_factor": "HashF"
         }
 
         x = start_x
@@ -351,10 +355,57 @@ class SpinOutViewer(QWidget):
             x += bar_width + spacing
 
 
+def describe_sections(result):
+    sections = {}
+    commands = list(result.compile_commands)
+    if result.flags:
+        commands.append("Flags: " + " ".join(
+            f"-D{name}" + (f"={value}" if value is not None else "") for name, value in result.flags.items()
+        ))
+    sections["Compilation Commands"] = "\n".join(commands) or "None"
+    sections["Settings Used"] = "\n".join(
+        ([f"{result.search} search"] if result.search else []) + [f"{s} enabled" for s in result.settings]
+    ) or "None"
+    sections["Verification Checks"] = "\n".join(
+        f"{k}: {'enabled' if v else 'not selected'}" for k, v in result.checks.items()
+    ) or "None"
+    sections["Statespace Stats"] = "\n".join(f"{k}: {v}" for k, v in result.stats.items()) or "None"
+    sections["Memory Usage"] = "\n".join(f"{k}: {v} MB" for k, v in result.memory.items()) or "None"
+    if result.stats:
+        metrics = Metrics(result)
+        sections["Performance"] = "\n".join(
+            metrics.describe() + ["", "Recommendations:"] + [f"- {r}" for r in recommend(metrics)]
+        )
+    else:
+        sections["Performance"] = "None"
+    sections["Unreached Code"] = "\n".join(u.describe() for u in result.unreached) or "None"
+    sections["Errors"] = "\n".join(e['message'] for e in result.errors) or "None"
+    sections["Elapsed Time"] = f"{result.elapsed} seconds" if result.elapsed is not None else "Unknown"
+    sections["Final Status"] = result.final_status or "Unknown"
+    return sections
+
+
 def main():
     global app
+    parser = argparse.ArgumentParser()
+    live = parser.add_mutually_exclusive_group()
+    live.add_argument("--run", metavar="COMMAND", help="start a pan run (in the data folder) and follow its output")
+    live.add_argument("--follow", metavar="FILE", help="follow a .out file a running pan is writing to")
+    live.add_argument("--standin", nargs="?", const="", metavar="OUT_FILE",
+                      help="follow pan_standin.py replaying OUT_FILE (default: the .out in data/)")
+    args = parser.parse_args()
+
     app = QApplication(sys.argv)
-    viewer = SpinOutViewer()
+    monitor = None
+    if args.run or args.follow or args.standin is not None:
+        monitor = PanMonitor()
+        if args.run:
+            monitor.start(args.run, cwd=os.path.join(os.getcwd(), "data"))
+        elif args.follow:
+            monitor.follow(args.follow)
+        else:
+            monitor.start_standin(args.standin or find_out_file(os.path.join(os.getcwd(), "data")) or "")
+    viewer = SpinOutViewer(monitor)
     viewer.show()
     sys.exit(app.exec())
 
@@ -0,0 +1,55 @@
+import numpy as np
+
+from channels import RECV
+
+
+class CausalSlice:
+    """Sim actions that can have influenced the failing one."""
+
+    def __init__(self, sim, keep, failing):
+        self.failing = failing
+        self.actions = np.flatnonzero(keep)
+        self.rows = sim.row[self.actions]
+
+    def __len__(self):
+        return len(self.actions)
+
+
+def failing_action(sim):
+    if sim.error_actions and sim.error_actions[0] >= 0:
+        return sim.error_actions[0]
+    return len(sim) - 1
+
+
+def causal_slice(sim, flow, failing=None):
+    """Walk back from the failing action over program order, process creation and message edges.
+
+    Every predecessor of an action comes earlier in the Sim log, so one backward sweep marks the
+    whole slice in O(actions).
+    """
+    n = len(sim)
+    if failing is None:
+        failing = failing_action(sim)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0 or failing < 0:
+        return CausalSlice(sim, keep, failing)
+
+    # Previous action of the same process; a process's first action follows the run that created it
+    prev = np.full(n, -1, dtype=np.int64)
+    last = {}
+    for i, p in enumerate(sim.pid.tolist()):
+        prev[i] = last.get(p, flow.run_action.get(p, -1))
+        last[p] = i
+
+    # A receive depends on the send whose message it took
+    sender = np.where(flow.op == RECV, flow.partner, -1).tolist()
+    prev = prev.tolist()
+
+    keep[failing] = True
+    for i in range(failing, -1, -1):
+        if keep[i]:
+            if prev[i] >= 0:
+                keep[prev[i]] = True
+            if sender[i] >= 0:
+                keep[sender[i]] = True
+    return CausalSlice(sim, keep, failing)
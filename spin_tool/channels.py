@@ -0,0 +1,349 @@
+import re
+from collections import deque
+
+import numpy as np
+
+define_re = re.compile(r'^\s*#define\s+(\w+)\s+(\S+)')
+proctype_re = re.compile(r'^\s*(?:active\s+(?:\[\s*\w+\s*\]\s*)?)?proctype\s+(\w+)\s*\(([^)]*)\)')
+init_re = re.compile(r'^\s*init\b')
+chan_decl_re = re.compile(r'\bchan\s+(\w+)\s*(?:\[\s*\w+\s*\])?\s*=\s*\[\s*(\w+)\s*\]\s*of')
+# Sim statement text of a channel operation, e.g. "root!number,n", "c?number,n", "me?lft"
+chan_op_re = re.compile(r'^(\w+(?:\[[^\]]*\])?)\s*(!!|\?\?|!|\?)(.*)$')
+run_re = re.compile(r'^run\s+(\w+)\s*\((.*)\)$')
+# Channel operations inside PML source: a name directly followed by ! or ?, but not != or a poll
+source_op_re = re.compile(r'\b(\w+(?:\[[^\]]*\])?)\s*(!!|\?\?|!|\?)(?![=\[<])')
+
+NONE, SEND, RECV = 0, 1, 2
+
+
+class ChannelDecls:
+    """Channel declarations and chan parameters of a PROMELA model."""
+
+    def __init__(self):
+        self.globals = {}       # name -> capacity (None when it could not be evaluated)
+        self.locals = {}        # proctype -> {name: capacity}
+        self.params = {}        # proctype -> [(name, is_chan)]
+
+
+def split_args(text):
+    """Split on top-level commas only, so run f(a, g(b, c)) gives two arguments."""
+    args, depth, current = [], 0, []
+    for ch in text:
+        if ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        if ch == ',' and depth == 0:
+            args.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    if ''.join(current).strip():
+        args.append(''.join(current).strip())
+    return args
+
+
+def parse_channel_decls(pml_lines):
+    decls = ChannelDecls()
+    defines = {}
+    scope, depth = None, 0
+
+    def capacity(text):
+        text = defines.get(text, text)
+        return int(text) if text.isdigit() else None
+
+    for raw in pml_lines:
+        line = raw.split('//')[0]
+        m = define_re.match(line)
+        if m:
+            defines[m.group(1)] = m.group(2)
+            continue
+
+        m = proctype_re.match(line)
+        if m:
+            scope = m.group(1)
+            params = []
+            for group in m.group(2).split(';'):
+                words = group.replace(',', ' ').split()
+                if len(words) > 1:
+                    params.extend((name, words[0] == 'chan') for name in words[1:])
+            decls.params[scope] = params
+            decls.locals.setdefault(scope, {})
+        elif init_re.match(line):
+            scope = ':init:'
+            decls.locals.setdefault(scope, {})
+
+        for m in chan_decl_re.finditer(line):
+            before = line[:m.start()]
+            if depth + before.count('{') - before.count('}') > 0 and scope is not None:
+                decls.locals[scope][m.group(1)] = capacity(m.group(2))
+            else:
+                decls.globals[m.group(1)] = capacity(m.group(2))
+
+        depth += line.count('{') - line.count('}')
+        if depth <= 0:
+            depth = 0
+            if '}' in line:
+                scope = None
+    return decls
+
+
+def channel_op(stmt):
+    """(kind, channel name) of a Sim statement; polls (c?[..], c?<..>) do not move messages."""
+    m = chan_op_re.match(stmt)
+    if not m or m.group(3).startswith(('[', '<', '=')):
+        return NONE, None
+    return (SEND if m.group(2).startswith('!') else RECV), m.group(1)
+
+
+class ChannelResolver:
+    """Maps the channel name a process uses to the channel instance it refers to.
+
+    Locals are one instance per process ("child@1"); chan parameters are bound to the caller's
+    argument when the parent's "run" statement executes right after the Sim "creates" line.
+    """
+
+    def __init__(self, decls):
+        self.decls = decls
+        self.bindings = {}
+        self.pending = {}
+        self.run_action = {}    # child pid -> index of the run statement that started it
+        self.capacities = dict(decls.globals)
+
+    def spawn(self, parent, child, proctype):
+        local = self.decls.locals.get(proctype, {})
+        self.bindings[child] = {name: f"{name}@{child}" for name in local}
+        for name, capacity in local.items():
+            self.capacities[f"{name}@{child}"] = capacity
+        if parent is not None:
+            self.pending.setdefault(parent, deque()).append((child, proctype))
+
+    def run(self, parent, stmt, action):
+        # Sim prints run statements wrapped in parentheses: "(run sieve(child,n))"
+        stmt = stmt.strip()
+        if stmt.startswith('(') and stmt.endswith(')'):
+            stmt = stmt[1:-1].strip()
+        m = run_re.match(stmt)
+        if not m or not self.pending.get(parent):
+            return
+        child, proctype = self.pending[parent].popleft()
+        self.run_action[child] = action
+        args = split_args(m.group(2))
+        for (name, is_chan), arg in zip(self.decls.params.get(proctype, []), args):
+            if is_chan:
+                self.bindings[child][name] = self.resolve(parent, arg)
+
+    def resolve(self, pid, name):
+        base, _, index = name.partition('[')
+        bound = self.bindings.get(pid, {}).get(base)
+        if bound is None:
+            bound = base if base in self.decls.globals else f"{base}@{pid}"
+        return f"{bound}[{index}" if index else bound
+
+    def capacity(self, channel):
+        return self.capacities.get(channel.split('[')[0])
+
+
+class ChannelStats:
+    """What happened on one channel instance over the whole trace."""
+
+    def __init__(self, name, capacity):
+        self.name = name
+        self.capacity = capacity        # 0 for rendezvous, None if the declaration was not found
+        self.sends = 0
+        self.receives = 0
+        self.peak = 0                   # most messages buffered at once
+        self.buffered = 0               # messages still in the buffer when the trace ends
+        self.unmatched_sends = []       # actions: rendezvous sends nobody took, sends into a full buffer
+        self.unmatched_receives = []    # actions: receives with no message available
+
+    @property
+    def rendezvous(self):
+        return self.capacity == 0
+
+    def describe(self):
+        kind = "rendezvous" if self.rendezvous else f"[{self.capacity if self.capacity is not None else '?'}]"
+        return (f"{self.name} {kind}: {self.sends} sent, {self.receives} received, peak {self.peak}"
+                + (f", {self.buffered} still buffered" if self.buffered else ""))
+
+
+class MessageFlow:
+    """Channel operation of every Sim action and the send each receive took its message from."""
+
+    def __init__(self, n):
+        self.op = np.zeros(n, dtype=np.int8)
+        self.channel = np.full(n, -1, dtype=np.int32)   # index into channel_names
+        self.partner = np.full(n, -1, dtype=np.int64)   # for a receive, the matching send
+        self.channel_names = []
+        self.channels = []      # ChannelStats, indexed like channel_names
+        self.run_action = {}
+        self.resolver = None
+        self.channel_ids = {}   # resolved channel name -> index
+        self.queues = {}        # index -> send actions still pending when the trace ends
+
+    def unmatched(self):
+        """(action, ChannelStats, kind) of every send or receive that had no partner, in trace order."""
+        found = [(i, ch, SEND) for ch in self.channels for i in ch.unmatched_sends]
+        found += [(i, ch, RECV) for ch in self.channels for i in ch.unmatched_receives]
+        return sorted(found, key=lambda f: f[0])
+
+
+def match_messages(sim, decls):
+    """Replay every channel's sends and receives in one pass over the Sim actions.
+
+    Each channel is a FIFO of pending send actions. A receive takes the oldest one; on a rendezvous
+    channel the send has to be from the same depth, so older pending sends found there never met a
+    receiver. Buffered channels track occupancy against the declared capacity.
+    """
+    n = len(sim)
+    flow = MessageFlow(n)
+    resolver = ChannelResolver(decls)
+    channel_ids = {}
+    queues = {}
+    # Statement texts and (pid, name) lookups repeat constantly in long traces
+    ops = {}
+    resolved = {}
+
+    def channel_index(channel):
+        ch = channel_ids.get(channel)
+        if ch is None:
+            ch = channel_ids[channel] = len(flow.channel_names)
+            flow.channel_names.append(channel)
+            flow.channels.append(ChannelStats(channel, resolver.capacity(channel)))
+            queues[ch] = deque()
+        return ch
+
+    creates = sorted(sim.creates, key=lambda c: c[0])
+    c = 0
+    depth = sim.depth.tolist()
+    pid = sim.pid.tolist()
+    for i in range(n):
+        # Creations are logged just before the run statement of the same depth
+        while c < len(creates) and creates[c][0] <= depth[i]:
+            _, parent, child, proctype = creates[c]
+            resolver.spawn(parent, child, proctype)
+            c += 1
+
+        stmt = sim.stmt[i]
+        op = ops.get(stmt)
+        if op is None:
+            op = ops[stmt] = (None, None) if stmt.startswith(('(run', 'run')) else channel_op(stmt)
+        kind, name = op
+        if kind is None:
+            resolver.run(pid[i], stmt, i)
+            continue
+        if kind == NONE:
+            continue
+
+        # A child's parameters are bound by the run that precedes its first action, so this never goes stale
+        ch = resolved.get((pid[i], name))
+        if ch is None:
+            ch = resolved[(pid[i], name)] = channel_index(resolver.resolve(pid[i], name))
+        flow.op[i] = kind
+        flow.channel[i] = ch
+        stats, queue = flow.channels[ch], queues[ch]
+
+        if stats.rendezvous:
+            while queue and depth[queue[0]] < depth[i]:
+                stats.unmatched_sends.append(queue.popleft())
+        if kind == SEND:
+            stats.sends += 1
+            if stats.capacity and len(queue) >= stats.capacity:
+                stats.unmatched_sends.append(i)
+                continue
+            queue.append(i)
+            if not stats.rendezvous:
+                stats.peak = max(stats.peak, len(queue))
+        else:
+            stats.receives += 1
+            if queue:
+                flow.partner[i] = queue.popleft()
+            else:
+                stats.unmatched_receives.append(i)
+
+    for ch, stats in enumerate(flow.channels):
+        if stats.rendezvous:
+            stats.unmatched_sends.extend(queues[ch])
+        else:
+            stats.buffered = len(queues[ch])
+    flow.queues = queues
+    flow.channel_ids = channel_ids
+    flow.run_action = resolver.run_action
+    flow.resolver = resolver
+    return flow
+
+
+def strip_source(text):
+    text = re.sub(r'/\*.*?\*/', ' ', text.split('//')[0])
+    return re.sub(r'"[^"]*"|\'[^\']*\'', '""', text)
+
+
+def pending_ops(pml_lines, line):
+    """Channel operations a process stopped at `line` is about to try.
+
+    SPIN reports a do/if by the line of its keyword, so for those the first statement of every
+    :: guard of that block is used.
+    """
+    if not 0 < line <= len(pml_lines):
+        return []
+    text = strip_source(pml_lines[line - 1])
+    ops = [(m.group(1), m.group(2), line) for m in source_op_re.finditer(text)]
+    if ops or not re.search(r'\b(do|if)\b', text):
+        return ops
+
+    nesting = 0
+    for no in range(line, len(pml_lines) + 1):
+        text = strip_source(pml_lines[no - 1])
+        if no == line:
+            text = text[re.search(r'\b(do|if)\b', text).end():]
+        stripped = text.strip()
+        if nesting == 0 and stripped.startswith('::'):
+            guard = re.split(r'->|;', stripped[2:], maxsplit=1)[0]
+            ops.extend((m.group(1), m.group(2), no) for m in source_op_re.finditer(guard))
+        nesting += len(re.findall(r'\b(do|if)\b', stripped)) - len(re.findall(r'\b(od|fi)\b', stripped))
+        if nesting < 0:
+            break
+    return ops
+
+
+class BlockedOp:
+    """A channel operation a process was waiting on when the trace ended."""
+
+    def __init__(self, pid, proctype, line, kind, channel, source_line, blocked):
+        self.pid = pid
+        self.proctype = proctype
+        self.line = line                # where SPIN reports the process
+        self.kind = kind
+        self.channel = channel
+        self.source_line = source_line  # line of the operation itself
+        self.blocked = blocked          # False when a message or partner is available
+
+    def describe(self):
+        verb = "send to" if self.kind == SEND else "receive from"
+        return f"P{self.pid} {self.proctype} line {self.source_line}: {verb} {self.channel}"
+
+
+def blocked_operations(sim, flow, pml_lines):
+    """Channel operations of every process in the final Sim snapshot, and whether they can proceed."""
+    resolver = flow.resolver
+    waiting = []
+    for _, pid, proctype, line, _ in sim.final:
+        for name, op, source_line in pending_ops(pml_lines, line):
+            kind = SEND if op.startswith('!') else RECV
+            waiting.append((pid, proctype, line, kind, resolver.resolve(pid, name), source_line))
+
+    # On a rendezvous channel a process can only go ahead if another one waits on the opposite end
+    sides = {(channel, kind) for _, _, _, kind, channel, _ in waiting}
+    result = []
+    for pid, proctype, line, kind, channel, source_line in waiting:
+        capacity = resolver.capacity(channel)
+        ch = flow.channel_ids.get(channel)
+        queued = len(flow.queues[ch]) if ch is not None and capacity != 0 else 0
+        if capacity == 0:
+            blocked = (channel, RECV if kind == SEND else SEND) not in sides
+        elif kind == RECV:
+            blocked = queued == 0
+        else:
+            blocked = capacity is not None and queued >= capacity
+        result.append(BlockedOp(pid, proctype, line, kind, channel, source_line, blocked))
+    return result
@@ -0,0 +1,243 @@
+import argparse
+import math
+import os
+import sys
+
+from PyQt6.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QComboBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QSplitter, QAbstractItemView
+)
+from PyQt6.QtCore import Qt
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, NullFormatter
+import numpy as np
+
+from pan_output import find_out_files, load_run_summaries
+
+METRICS = (
+    ('states', "States"),
+    ('transitions', "Transitions"),
+    ('memory', "Memory (MB)"),
+    ('elapsed', "Elapsed (s)"),
+    ('depth', "Depth"),
+)
+COLUMNS = ("Run", "Flags", "Options") + tuple(title for _, title in METRICS) + ("Errors", "Status")
+MAX_CHART_RUNS = 12
+
+
+class SortItem(QTableWidgetItem):
+    """Table cell that sorts by a number instead of its text; missing values sort last."""
+
+    def __init__(self, text, key):
+        super().__init__(text)
+        self.key = key
+
+    def __lt__(self, other):
+        if isinstance(other, SortItem):
+            return self.key < other.key
+        return super().__lt__(other)
+
+
+def sort_key(value):
+    return math.inf if value is None else value
+
+
+def ratio(value, base):
+    if value is None or not base:
+        return None
+    return value / base
+
+
+class RatioChart(FigureCanvas):
+    """Each metric of the charted runs relative to the baseline, one group of bars per metric."""
+
+    def __init__(self):
+        self.fig = Figure(figsize=(9, 4))
+        super().__init__(self.fig)
+        self.setMinimumHeight(300)
+
+    def draw_runs(self, runs, baseline):
+        self.fig.clear()
+        ax = self.fig.add_subplot(111)
+        if not runs or baseline is None:
+            self.draw_idle()
+            return
+        x = np.arange(len(METRICS))
+        width = 0.8 / len(runs)
+        for k, run in enumerate(runs):
+            values = [ratio(run[key], baseline[key]) for key, _ in METRICS]
+            heights = np.array([v if v is not None else np.nan for v in values], dtype=float)
+            # Bars grow up or down from the baseline's 1x so smaller and larger read alike
+            ax.bar(x - 0.4 + (k + 0.5) * width, heights - 1, width, bottom=1, label=run['name'])
+        ax.axhline(1, color="black", linewidth=0.8)
+        ax.set_yscale("log")
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda v, _: f"×{v:g}"))
+        ax.yaxis.set_minor_formatter(NullFormatter())
+        ax.set_xticks(x, [title for _, title in METRICS], fontsize=8)
+        ax.set_ylabel(f"ratio to {baseline['name']}", fontsize=8)
+        ax.tick_params(labelsize=8)
+        ax.grid(True, axis="y", linestyle="--", alpha=0.5)
+        ax.legend(fontsize=7, loc="upper left", bbox_to_anchor=(1.01, 1))
+        self.fig.tight_layout()
+        self.draw_idle()
+
+
+class RunComparison(QWidget):
+    def __init__(self, paths):
+        super().__init__()
+        self.setWindowTitle("SPIN Run Comparison")
+        self.resize(1200, 800)
+        self.paths = []
+        self.runs = []
+
+        layout = QVBoxLayout()
+        controls = QHBoxLayout()
+        add_files_btn = QPushButton("Add Files...")
+        add_files_btn.clicked.connect(self.add_files)
+        add_folder_btn = QPushButton("Add Folder...")
+        add_folder_btn.clicked.connect(self.add_folder)
+        clear_btn = QPushButton("Clear")
+        clear_btn.clicked.connect(self.clear_runs)
+        controls.addWidget(add_files_btn)
+        controls.addWidget(add_folder_btn)
+        controls.addWidget(clear_btn)
+        controls.addStretch(1)
+        controls.addWidget(QLabel("Baseline:"))
+        self.baseline_box = QComboBox()
+        self.baseline_box.setMinimumWidth(250)
+        self.baseline_box.currentIndexChanged.connect(self.baseline_changed)
+        controls.addWidget(self.baseline_box)
+        layout.addLayout(controls)
+
+        self.summary = QLabel()
+        layout.addWidget(self.summary)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.table.horizontalHeader().sortIndicatorChanged.connect(lambda *_: self.draw_chart())
+        self.table.itemSelectionChanged.connect(self.draw_chart)
+        splitter.addWidget(self.table)
+        self.chart = RatioChart()
+        splitter.addWidget(self.chart)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+        self.add_paths(paths)
+
+    def add_files(self):
+        files, _ = QFileDialog.getOpenFileNames(self, "Select pan Outputs", "", "pan Output (*.out)")
+        self.add_paths(files)
+
+    def add_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder with pan Outputs")
+        if folder:
+            self.add_paths([folder])
+
+    def clear_runs(self):
+        self.paths = []
+        self.runs = []
+        self.fill()
+
+    def add_paths(self, paths):
+        known = set(self.paths)
+        new = [p for p in find_out_files(paths) if os.path.abspath(p) not in known]
+        if not new:
+            self.fill()
+            return
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        try:
+            rows = load_run_summaries(new)
+        finally:
+            QApplication.restoreOverrideCursor()
+        for path, row in zip(new, rows):
+            name = os.path.relpath(path)
+            run = dict(row, name=path if name.startswith('..') else name)
+            self.paths.append(os.path.abspath(path))
+            self.runs.append(run)
+        self.fill()
+
+    def fill(self):
+        current = self.baseline_box.currentIndex()
+        self.baseline_box.blockSignals(True)
+        self.baseline_box.clear()
+        self.baseline_box.addItems([run['name'] for run in self.runs])
+        self.baseline_box.setCurrentIndex(min(max(current, 0), len(self.runs) - 1))
+        self.baseline_box.blockSignals(False)
+
+        failed = sum(1 for run in self.runs if run['errors'])
+        self.summary.setText(f"{len(self.runs)} runs, {failed} with errors" if self.runs else "No runs loaded.")
+        self.fill_table()
+
+    def baseline(self):
+        index = self.baseline_box.currentIndex()
+        return self.runs[index] if 0 <= index < len(self.runs) else None
+
+    def baseline_changed(self, _):
+        self.fill_table()
+
+    def fill_table(self):
+        base = self.baseline()
+        table = self.table
+        # Sorting while rows are inserted would shuffle them mid-fill
+        table.setSortingEnabled(False)
+        table.setRowCount(len(self.runs))
+        for row, run in enumerate(self.runs):
+            name_item = SortItem(run['name'], run['name'])
+            name_item.setData(Qt.ItemDataRole.UserRole, row)
+            name_item.setToolTip(run['source']['path'])
+            cells = [name_item, QTableWidgetItem(run['flags']), QTableWidgetItem(run['options'])]
+            for key, _ in METRICS:
+                value = run[key]
+                text = "" if value is None else f"{value:,g}" if isinstance(value, float) else f"{value:,}"
+                r = ratio(value, base[key]) if base is not None and run is not base else None
+                if r is not None:
+                    text += f"  ×{r:.3g}"
+                cells.append(SortItem(text, sort_key(value)))
+            errors = SortItem(str(run['errors'] or 0) + (f" ({', '.join(run['error_types'])})" if run['error_types'] else ""),
+                              run['errors'] or 0)
+            if run['errors']:
+                errors.setForeground(Qt.GlobalColor.red)
+            cells.append(errors)
+            cells.append(QTableWidgetItem(run['status']))
+            for col, item in enumerate(cells):
+                if run is base:
+                    font = item.font()
+                    font.setBold(True)
+                    item.setFont(font)
+                table.setItem(row, col, item)
+        table.setSortingEnabled(True)
+        table.resizeColumnsToContents()
+        self.draw_chart()
+
+    def draw_chart(self):
+        # Selected rows, otherwise the top of the table in its current sort order
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        if not rows:
+            rows = range(min(self.table.rowCount(), MAX_CHART_RUNS))
+        runs = []
+        for row in rows[:MAX_CHART_RUNS]:
+            item = self.table.item(row, 0)
+            if item is not None:
+                runs.append(self.runs[item.data(Qt.ItemDataRole.UserRole)])
+        self.chart.draw_runs(runs, self.baseline())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="*", help=".out files or folders to search (default: data and profiles)")
+    args = parser.parse_args()
+    paths = args.paths or [os.path.join(os.getcwd(), "data"), os.path.join(os.getcwd(), "profiles")]
+
+    app = QApplication(sys.argv)
+    viewer = RunComparison(paths)
+    viewer.show()
+    sys.exit(app.exec())
+
+
+if __name__ == "__main__":
+    main()
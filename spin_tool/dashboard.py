@@ -18,7 +18,7 @@ OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
 PROFILES_DIR = os.path.join(BASE_DIR, 'profiles')
 
 DATA_EXTENSIONS = {".out", ".trail", ".pml", ".isf", ".txt"}
-OUTPUT_EXTENSIONS = {".json", ".png"}
+OUTPUT_EXTENSIONS = {".json", ".png", ".npz"}
 
 os.makedirs(PROFILES_DIR, exist_ok=True)
 
@@ -111,7 +111,9 @@ class Dashboard(QWidget):
         rows = [
             [("Visualizer", "vizualizer_module.py"), ("Timeline", "timeline_evolved.py")],
             [("3D State Graph", "3D_statespace_module.py"), ("Why it Failed", "why_it_failed.py")],
-            [("Overview", "OUT_viewer.py")]
+            [("Overview", "OUT_viewer.py"), ("Merged State Graph", "3D_statespace_module.py --states")],
+            [("Compare Runs", "compare_runs.py"), ("Failure Modes", "trail_clusters.py")],
+            [("Trail Diff", "trail_diff_viewer.py"), ("Variable Values", "var_panel.py")]
         ]
         for row in rows:
             row_layout = QHBoxLayout()
@@ -122,6 +124,14 @@ class Dashboard(QWidget):
             module_layout.addLayout(row_layout)
         main_layout.addWidget(module_frame)
 
+        main_layout.addWidget(self.section_label("Live Verification"))
+        live_frame = self.card_frame()
+        live_layout = QHBoxLayout(live_frame)
+        live_btn = self.styled_button("Monitor pan Run")
+        live_btn.clicked.connect(self.live_run_menu)
+        live_layout.addWidget(live_btn)
+        main_layout.addWidget(live_frame)
+
         main_layout.addWidget(self.section_label("Files in /data:"))
         self.file_display = QTextEdit()
         self.file_display.setReadOnly(True)
@@ -197,16 +207,40 @@ class Dashboard(QWidget):
         try:
             self.run_script("parser_module.py")
             self.run_script("parser_sim.py")
+            self.run_script("run_repository.py ingest data")
         except Exception as e:
             QMessageBox.critical(self, "Parser Error", str(e))
 
     def run_script(self, script_name):
         try:
-            subprocess.Popen([sys.executable, script_name])
+            subprocess.Popen([sys.executable, *script_name.split()])
             #QMessageBox.information(self, "Running", f"{script_name} launched.")
         except Exception as e:
             QMessageBox.critical(self, "Execution Failed", f"Could not launch {script_name}:\n{e}")
 
+    def live_run_menu(self):
+        menu = QMenu()
+        menu.addAction("Start pan Command...").triggered.connect(self.start_live_run)
+        menu.addAction("Follow Running .out File...").triggered.connect(self.follow_live_run)
+        menu.addAction("Stand-in Run (no SPIN needed)").triggered.connect(lambda: self.launch_monitor("--standin"))
+        menu.exec(self.sender().mapToGlobal(QtCore.QPoint(0, self.sender().height())))
+
+    def start_live_run(self):
+        command, ok = QInputDialog.getText(self, "Start pan Run", "Command (runs in /data):", text="./pan -m10000")
+        if ok and command.strip():
+            self.launch_monitor("--run", command.strip())
+
+    def follow_live_run(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Select .out File", DATA_DIR, "pan Output (*.out *.txt);;All Files (*)")
+        if path:
+            self.launch_monitor("--follow", path)
+
+    def launch_monitor(self, *args):
+        try:
+            subprocess.Popen([sys.executable, "OUT_viewer.py", *args])
+        except Exception as e:
+            QMessageBox.critical(self, "Execution Failed", f"Could not start the run monitor:\n{e}")
+
     def create_profile(self):
         name, ok = QInputDialog.getText(self, "Profile Name", "Enter profile name:")
         if not ok or not name.strip():
@@ -0,0 +1,151 @@
+import numpy as np
+
+from channels import RECV, SEND, blocked_operations, strip_source
+
+WHITE, GREY, BLACK = 0, 1, 2
+
+
+class ProcessWait:
+    """Where one live process of the final Sim snapshot is stuck and who could move it on."""
+
+    def __init__(self, pid, proctype, line, statement, ops):
+        self.pid = pid
+        self.proctype = proctype
+        self.line = line
+        self.statement = statement      # PML source of the line SPIN reports the process at
+        self.ops = ops                  # BlockedOp of every channel operation it could take
+        self.peers = {}                 # channel -> [(pid, live)] that could take the other side
+
+    @property
+    def blocked(self):
+        """Waiting on channels only, none of which can proceed; None when it waits on something else."""
+        if not self.ops:
+            return None
+        return all(op.blocked for op in self.ops)
+
+    def describe(self):
+        head = f"P{self.pid} {self.proctype} at line {self.line}: {self.statement or '?'}"
+        if not self.ops:
+            return head + " (not waiting on a channel)"
+        # Several guards of one do/if often use the same channel end
+        sides = {}
+        for op in self.ops:
+            sides.setdefault((op.kind, op.channel), []).append(op)
+        parts = []
+        for (kind, channel), ops in sides.items():
+            verb = "send to" if kind == SEND else "receive from"
+            lines = ", ".join(str(n) for n in sorted({op.source_line for op in ops}))
+            who = ", ".join(f"P{p}" + ("" if live else " (terminated)") for p, live in self.peers.get(channel, []))
+            state = "blocked" if all(op.blocked for op in ops) else "ready"
+            parts.append(f"{verb} {channel} (line {lines}) [{state}], unblocked by {who or 'no process'}")
+        return head + " — " + "; ".join(parts)
+
+
+class DeadlockReport:
+    def __init__(self, waits, cycle):
+        self.waits = waits
+        self.cycle = cycle              # ['P3', 'child@3', 'P7', ...] or [] when the graph is acyclic
+
+    def __len__(self):
+        return len(self.waits)
+
+    def describe_lines(self):
+        lines = [w.describe() for w in self.waits]
+        if self.cycle:
+            lines.append("Wait-for cycle: " + " → ".join(self.cycle + self.cycle[:1]))
+        return lines
+
+
+def channel_users(sim, flow):
+    """(channel index, op) -> pids that performed that operation anywhere in the trace."""
+    acted = np.flatnonzero(flow.op != 0)
+    users = {}
+    if len(acted):
+        pairs = np.unique(np.stack((flow.channel[acted], flow.op[acted], sim.pid[acted])), axis=1)
+        for ch, op, pid in pairs.T.tolist():
+            users.setdefault((ch, op), []).append(pid)
+    return users
+
+
+def find_cycle(graph):
+    """First cycle of a directed graph given as {node: successors}, by iterative three-colour DFS."""
+    colour = {}
+    parent = {}
+    for root in graph:
+        if colour.get(root, WHITE) != WHITE:
+            continue
+        colour[root] = GREY
+        stack = [(root, iter(graph.get(root, ())))]
+        while stack:
+            node, successors = stack[-1]
+            for nxt in successors:
+                c = colour.get(nxt, WHITE)
+                if c == WHITE:
+                    colour[nxt] = GREY
+                    parent[nxt] = node
+                    stack.append((nxt, iter(graph.get(nxt, ()))))
+                    break
+                if c == GREY:
+                    cycle = [node]
+                    while cycle[-1] != nxt:
+                        cycle.append(parent[cycle[-1]])
+                    return cycle[::-1]
+            else:
+                colour[node] = BLACK
+                stack.pop()
+    return []
+
+
+def explain_deadlock(sim, flow, pml_lines, blocked=None):
+    """Join the final Sim snapshot with the PML source and the channel replay.
+
+    The wait-for graph has an edge from every blocked process to the channels it waits on and from
+    each channel to the live processes that could take its other side; a cycle means they wait on
+    each other. Building and searching it is O(processes + channels + edges).
+    """
+    if blocked is None:
+        blocked = blocked_operations(sim, flow, pml_lines)
+    by_pid = {}
+    for op in blocked:
+        by_pid.setdefault(op.pid, []).append(op)
+
+    waits = []
+    for _, pid, proctype, line, _ in sim.final:
+        statement = strip_source(pml_lines[line - 1]).strip() if 0 < line <= len(pml_lines) else ''
+        waits.append(ProcessWait(pid, proctype, line, statement, by_pid.get(pid, [])))
+    live = {w.pid for w in waits}
+
+    # Who could take the other side: processes that did so earlier, live ones about to, and
+    # otherwise any live process that holds the channel as a local or a chan parameter
+    users = channel_users(sim, flow)
+    holders = {}
+    for pid, names in flow.resolver.bindings.items():
+        if pid in live:
+            for channel in set(names.values()):
+                holders.setdefault(channel, []).append(pid)
+    ready = {}
+    for op in blocked:
+        ready.setdefault((op.channel, op.kind), []).append(op.pid)
+    for w in waits:
+        for op in w.ops:
+            other = RECV if op.kind == SEND else SEND
+            ch = flow.channel_ids.get(op.channel)
+            pids = set(users.get((ch, other), [])) if ch is not None else set()
+            pids.update(ready.get((op.channel, other), []))
+            pids.discard(w.pid)
+            if not pids:
+                pids = set(holders.get(op.channel.split('[')[0], [])) - {w.pid}
+            w.peers[op.channel] = sorted(((p, p in live) for p in pids), key=lambda pl: (not pl[1], pl[0]))
+
+    graph = {}
+    for w in waits:
+        if not w.blocked:
+            continue
+        node = f"P{w.pid}"
+        # Dicts keep successors unique and ordered
+        graph[node] = {}
+        for op in w.ops:
+            graph[node][op.channel] = None
+            successors = graph.setdefault(op.channel, {})
+            successors.update((f"P{p}", None) for p, is_live in w.peers[op.channel] if is_live)
+    return DeadlockReport(waits, find_cycle(graph))
@@ -0,0 +1,108 @@
+import os
+import shlex
+import sys
+
+from PyQt6.QtCore import QObject, QProcess, QTimer, pyqtSignal
+
+from pan_output import PanParser
+
+POLL_MS = 200
+STANDIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pan_standin.py")
+
+
+class PanMonitor(QObject):
+    """Follows a pan run while it is going: the output of a command it starts, or a .out file
+    another run is writing. Output is read from the event loop and parsed as it arrives; the
+    viewer redraws on its own timer when `dirty` is set.
+    """
+
+    finished = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parser = PanParser()
+        self.partial = b''
+        self.dirty = True
+        self.running = False
+        self.stopped = False
+        self.source = None
+        self.process = None
+        self.file = None
+        self.poll = None
+
+    @property
+    def result(self):
+        return self.parser.result
+
+    def start(self, command, cwd=None):
+        args = shlex.split(command)
+        self.source = command
+        self.process = QProcess(self)
+        if cwd:
+            self.process.setWorkingDirectory(cwd)
+        # pan reports errors on stdout, but a missing binary or a crash shows up on stderr
+        self.process.setProcessChannelMode(QProcess.ProcessChannelMode.MergedChannels)
+        self.process.readyReadStandardOutput.connect(self.read_process)
+        self.process.finished.connect(self.process_finished)
+        self.process.errorOccurred.connect(self.process_error)
+        self.running = True
+        self.process.start(args[0], args[1:])
+
+    def start_standin(self, out_file, seconds=20):
+        self.start(shlex.join([sys.executable, STANDIN, out_file, "--seconds", str(seconds)]))
+
+    def follow(self, path):
+        """Tail a file pan is redirected to (`./pan -a > run.out`), from its start."""
+        self.source = path
+        self.file = open(path, 'rb')
+        self.running = True
+        self.poll = QTimer(self)
+        self.poll.timeout.connect(self.read_file)
+        self.poll.start(POLL_MS)
+        self.read_file()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.stopped = True
+        if self.process is not None and self.process.state() != QProcess.ProcessState.NotRunning:
+            self.process.kill()
+        if self.poll is not None:
+            self.poll.stop()
+            self.file.close()
+            self.finish("stopped")
+
+    def read_process(self):
+        self.consume(bytes(self.process.readAllStandardOutput()))
+
+    def read_file(self):
+        data = self.file.read()
+        if data:
+            self.consume(data)
+
+    def consume(self, data):
+        # Lines can be split across reads: hold back the unterminated tail
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        self.parser.feed(line.decode('utf-8', errors='replace') for line in lines)
+        self.dirty = True
+
+    def process_finished(self, code, status):
+        self.read_process()
+        if status == QProcess.ExitStatus.CrashExit:
+            self.finish("stopped" if self.stopped else "crashed")
+        else:
+            self.finish(f"exited with code {code}")
+
+    def process_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            self.finish(f"could not start: {self.process.errorString()}")
+
+    def finish(self, how):
+        if self.partial:
+            self.parser.feed([self.partial.decode('utf-8', errors='replace')])
+            self.partial = b''
+        self.parser.finish()
+        self.running = False
+        self.dirty = True
+        self.finished.emit(how)
@@ -0,0 +1,485 @@
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Precompiled once; each is only tried on the lines its dispatch key routes to it
+error_re = re.compile(r'^pan:\d+:\s+(.*?)(?:\s+\(at depth (\d+)\))?$')
+error_kind_re = re.compile(
+    r'assertion violated|invalid end state|deadlock|acceptance cycle|non-progress cycle|claim violated',
+    re.IGNORECASE
+)
+elapsed_re = re.compile(r'elapsed time ([\d.]+) seconds')
+rate_re = re.compile(r'rate\s+([\d.]+) states/second')
+wrote_re = re.compile(r'wrote (\S+)')
+vector_re = re.compile(r'State-vector (\d+) byte, depth reached (\d+), errors: (\d+)')
+check_re = re.compile(r'^([A-Za-z][A-Za-z -]*?)\s*([+-])\s*(?:\((.*)\))?$')
+memory_re = re.compile(r'^([\d.]+)\s+(.*)$')
+option_re = re.compile(r'-(\w)(\S*)')
+define_re = re.compile(r'-D(\w+)(?:=(\S+))?')
+unreached_re = re.compile(r'^unreached in (?:proctype )?(.+)$')
+location_re = re.compile(r'^(\S+):(\d+), state (\d+), "(.*)"$')
+unreached_count_re = re.compile(r'^\((\d+) of (\d+) states\)$')
+int_re = re.compile(r'\d+')
+hash_size_re = re.compile(r'-w(\d+)')
+hash_factor_re = re.compile(r'hash factor:\s*([\d.]+)')
+progress_re = re.compile(r'(\w+)=\s*([-+\d.eE]+)')
+
+RUN_SUMMARIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'run_summaries.json')
+# Bump when summarize_run changes so cached rows are rebuilt
+SUMMARY_VERSION = 1
+# Below this much output to parse, starting worker processes costs more than it saves
+PARALLEL_MIN_BYTES = 8 << 20
+
+# Canonical names for the "Stats on memory usage" lines
+MEMORY_KEYS = (
+    ('equivalent memory usage for states', 'states (equivalent)'),
+    ('actual memory usage for states', 'states'),
+    ('memory used for hash table', 'hash table'),
+    ('memory used for DFS stack', 'DFS stack'),
+    ('total actual memory usage', 'total'),
+)
+# Parts that add up to the total, for the memory chart
+MEMORY_PARTS = ('states', 'hash table', 'DFS stack')
+
+
+class Unreached:
+    """Statements of one proctype that the search never reached."""
+
+    def __init__(self, proctype):
+        self.proctype = proctype
+        self.locations = []     # (file, line, state, statement)
+        self.count = None       # "(3 of 31 states)" -> 3, 31
+        self.total = None
+
+    def describe(self):
+        head = f"unreached in {self.proctype}"
+        if self.count is not None:
+            head += f": {self.count} of {self.total} states"
+        return "\n".join([head] + [f"    {f}:{line} state {state} \"{stmt}\"" for f, line, state, stmt in self.locations])
+
+
+class ProgressSeries:
+    """Periodic "Depth= .. States= .. Transitions= .. Memory= .. t= .. R=" lines as columns.
+
+    Lines are buffered and converted a chunk at a time by numpy's C text parser, so memory stays
+    bounded and a multi-hour log costs about half a second per million progress lines.
+    """
+
+    FIELDS = ('depth', 'states', 'transitions', 'memory', 't', 'rate')
+    NAMES = {'Depth': 'depth', 'States': 'states', 'Transitions': 'transitions', 'Memory': 'memory',
+             't': 't', 'R': 'rate'}
+    CHUNK = 65536
+
+    def __init__(self):
+        self.pending = []
+        self.blocks = []
+        self.values = np.empty((0, len(self.FIELDS)))
+        for field in self.FIELDS:
+            setattr(self, field, self.values[:, 0])
+
+    def __len__(self):
+        return len(self.t)
+
+    def add(self, line):
+        self.pending.append(line)
+        if len(self.pending) >= self.CHUNK:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        try:
+            # pan prints the fields in a fixed order: values are every other whitespace-separated word
+            block = np.loadtxt(self.pending, usecols=(1, 3, 5, 7, 9, 11), ndmin=2)
+        except ValueError:
+            block = np.array([self.parse_line(line) for line in self.pending]).reshape(-1, len(self.FIELDS))
+        self.blocks.append(block)
+        self.pending = []
+
+    def parse_line(self, line):
+        values = {self.NAMES.get(k): float(v) for k, v in progress_re.findall(line)}
+        return [values.get(field, np.nan) for field in self.FIELDS]
+
+    def freeze(self):
+        self.flush()
+        if self.blocks:
+            # A followed run freezes after every refresh, so earlier values are kept
+            self.values = np.concatenate([self.values] + self.blocks)
+            self.blocks = []
+        for k, field in enumerate(self.FIELDS):
+            setattr(self, field, self.values[:, k])
+        return self
+
+    def per_second(self, values, step=1):
+        """Rate of change between progress lines `step` apart, at the later line's time.
+
+        pan prints t= with two decimals, so a wider step also smooths the rate of fast runs.
+        """
+        step = max(min(step, len(self.t) - 1), 1)
+        dt = self.t[step:] - self.t[:-step]
+        keep = dt > 0
+        return self.t[step:][keep], (values[step:] - values[:-step])[keep] / dt[keep]
+
+
+class PanResult:
+    """Everything a pan run prints, from one pass over its output."""
+
+    def __init__(self):
+        self.compile_commands = []      # spin -a / gcc / ./pan lines, in order
+        self.flags = {}                 # -D compile flags: name -> value (None for a bare -DNAME)
+        self.run_options = {}           # ./pan options: letter -> value, e.g. {'m': '10000', 'w': '24'}
+        self.settings = []              # "+ Partial Order Reduction" and the like
+        self.search = None              # "Full statespace", "Bit statespace", ...
+        self.checks = {}                # never_claim, assertion_violations, ... -> enabled
+        self.stats = {}                 # state_vector_size, depth_reached, states_stored, ...
+        self.memory = {}                # canonical name (see MEMORY_KEYS) -> megabytes
+        self.hash_size = None           # log2 of the hash table size, from "(-w24)"
+        self.unreached = []             # Unreached
+        self.elapsed = None             # seconds
+        self.rate = None                # states/second reported by pan
+        self.errors = []                # {'type', 'message', 'depth', 'step'} like the error pipeline uses
+        self.trail_files = []
+        self.trail_errors = []          # index in errors of the error each trail was written for, or None
+        self.warnings = []
+        self.version = None
+        self.final_status = ""
+        self.progress = ProgressSeries()
+
+    def memory_parts(self):
+        return {key: self.memory[key] for key in MEMORY_PARTS if key in self.memory}
+
+
+def on_command(result, line, block):
+    result.compile_commands.append(line)
+    if line.startswith(('gcc', 'cc', 'clang')):
+        for name, value in define_re.findall(line):
+            result.flags[name] = value or None
+    elif line.startswith(('./pan', 'pan ')):
+        for letter, value in option_re.findall(line.split(None, 1)[1] if ' ' in line else ''):
+            result.run_options[letter] = value
+    return None
+
+
+def on_pan(result, line, block):
+    if line[4:5] != ' ':
+        m = error_re.match(line)
+        if m:
+            kind = error_kind_re.search(m.group(1))
+            kind = kind.group(0).lower() if kind else 'unknown'
+            result.errors.append({
+                'type': 'never_claim' if kind == 'claim violated' else kind,
+                'message': line,
+                'depth': int(m.group(2)) if m.group(2) else None,
+                'step': None
+            })
+            return None
+    if line.startswith('pan: elapsed time'):
+        m = elapsed_re.search(line)
+        if m:
+            result.elapsed = float(m.group(1))
+    elif line.startswith('pan: rate'):
+        m = rate_re.search(line)
+        if m:
+            result.rate = float(m.group(1))
+    elif line.startswith('pan: wrote'):
+        m = wrote_re.search(line)
+        if m:
+            result.trail_files.append(m.group(1))
+            # pan -e reports each error just before writing its trail
+            result.trail_errors.append(len(result.errors) - 1 if result.errors else None)
+    else:
+        result.warnings.append(line)
+    return None
+
+
+def on_search(result, line, block):
+    result.search = line[:-len('search for:')].strip()
+    return 'checks'
+
+
+def on_check(result, line, block):
+    m = check_re.match(line)
+    if m:
+        result.checks['_'.join(m.group(1).replace('-', ' ').split())] = m.group(2) == '+'
+    return 'checks'
+
+
+def on_vector(result, line, block):
+    m = vector_re.search(line)
+    if m:
+        result.stats['state_vector_size'] = int(m.group(1))
+        result.stats['depth_reached'] = int(m.group(2))
+        result.stats['errors'] = int(m.group(3))
+    return None
+
+
+def on_number(result, line, block):
+    """Lines that lead with a count: the state space totals, or megabytes inside the memory block."""
+    if block == 'memory':
+        m = memory_re.match(line)
+        if m:
+            value, what = float(m.group(1)), m.group(2)
+            for prefix, key in MEMORY_KEYS:
+                if what.startswith(prefix):
+                    result.memory[key] = value
+                    if key == 'hash table':
+                        w = hash_size_re.search(what)
+                        result.hash_size = int(w.group(1)) if w else None
+                    break
+            else:
+                result.memory[what] = value
+        return 'memory'
+
+    words = line.split()
+    if len(words) < 2:
+        return block
+    value = int(words[0]) if words[0].isdigit() else None
+    if value is None:
+        return block
+    what = words[1]
+    if what == 'states,':
+        if words[2:3] == ['stored']:
+            result.stats['states_stored'] = value
+            visited = int_re.findall(line[len(words[0]):])
+            if visited:
+                result.stats['states_visited'] = int(visited[0])
+        elif words[2:3] == ['matched']:
+            result.stats['states_matched'] = value
+    elif what == 'transitions':
+        result.stats['transitions'] = value
+    elif what == 'atomic':
+        result.stats['atomic_steps'] = value
+    return block
+
+
+def on_hash(result, line, block):
+    if line.startswith('hash conflicts:'):
+        nums = int_re.findall(line)
+        if nums:
+            result.stats['hash_conflicts'] = int(nums[0])
+    else:
+        m = hash_factor_re.match(line)
+        if m:
+            result.stats['hash_factor'] = float(m.group(1))
+    return block
+
+
+def on_stats(result, line, block):
+    return 'memory' if line.startswith('Stats on memory usage') else block
+
+
+def on_unreached(result, line, block):
+    m = unreached_re.match(line)
+    if m:
+        result.unreached.append(Unreached(m.group(1)))
+    return 'unreached'
+
+
+def on_unreached_line(result, line, block):
+    entry = result.unreached[-1]
+    m = location_re.match(line)
+    if m:
+        entry.locations.append((m.group(1), int(m.group(2)), int(m.group(3)), m.group(4)))
+        return 'unreached'
+    m = unreached_count_re.match(line)
+    if m:
+        entry.count, entry.total = int(m.group(1)), int(m.group(2))
+    return 'unreached'
+
+
+def on_progress(result, line, block):
+    result.progress.add(line)
+    return block
+
+
+def on_setting(result, line, block):
+    result.settings.append(line[1:].strip())
+    return block
+
+
+def on_version(result, line, block):
+    if line.startswith('(Spin Version'):
+        result.version = line.strip('()')
+    return None
+
+
+def on_warning(result, line, block):
+    result.warnings.append(line)
+    return None
+
+
+def on_status(result, line, block):
+    # iSpin appends its own verdict ("No errors found -- did you verify all claims?")
+    if 'errors found' in line:
+        result.final_status = line
+    return None
+
+
+# First word of a line -> handler; handlers return the block the next lines belong to
+DISPATCH = {
+    'spin': on_command,
+    'gcc': on_command,
+    'cc': on_command,
+    'clang': on_command,
+    './pan': on_command,
+    'pan:': on_pan,
+    'State-vector': on_vector,
+    'hash': on_hash,
+    'Stats': on_stats,
+    'unreached': on_unreached,
+    '+': on_setting,
+    '(Spin': on_version,
+    'Warning:': on_warning,
+    'No': on_status,
+    'Depth=': on_progress,
+}
+BLOCK_HANDLERS = {
+    'checks': on_check,
+    'unreached': on_unreached_line,
+}
+
+
+class PanParser:
+    """Routes pan output to the handlers as it arrives, so a run can be followed while it is going."""
+
+    def __init__(self):
+        self.result = PanResult()
+        self.block = None
+
+    def feed(self, lines):
+        result, block = self.result, self.block
+        for raw in lines:
+            line = raw.strip()
+            if not line:
+                block = None
+                continue
+            key = line.split(None, 1)[0]
+            if key.startswith('pan:'):
+                key = 'pan:'
+            handler = DISPATCH.get(key)
+            if handler is None:
+                if key[0].isdigit():
+                    handler = on_number
+                elif block in BLOCK_HANDLERS:
+                    handler = BLOCK_HANDLERS[block]
+                elif line.endswith('search for:'):
+                    handler = on_search
+                else:
+                    continue
+            block = handler(result, line, block)
+        self.block = block
+
+    def finish(self):
+        result = self.result
+        result.progress.freeze()
+        if not result.final_status and 'errors' in result.stats:
+            n = result.stats['errors']
+            result.final_status = f"{n} error{'s' if n != 1 else ''} found" if n else "No errors found"
+        return result
+
+
+def parse_pan_lines(lines):
+    parser = PanParser()
+    parser.feed(lines)
+    return parser.finish()
+
+
+def load_pan_output(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return parse_pan_lines(f)
+
+
+def find_out_file(directory):
+    try:
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".out"):
+                return os.path.join(directory, filename)
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def find_out_files(paths):
+    """.out files among `paths`, searching directories recursively."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                found.extend(os.path.join(root, f) for f in sorted(files) if f.endswith('.out'))
+        elif os.path.isfile(path):
+            found.append(path)
+    return found
+
+
+def file_source(path):
+    st = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def summarize_run(path):
+    """The headline numbers of one run, as a small JSON-friendly row for comparing many runs."""
+    result = load_pan_output(path)
+    stats = result.stats
+    return {
+        'source': file_source(path),
+        'states': stats.get('states_stored'),
+        'transitions': stats.get('transitions'),
+        'memory': result.memory.get('total', sum(result.memory_parts().values()) or None),
+        'elapsed': result.elapsed,
+        'depth': stats.get('depth_reached'),
+        'errors': stats.get('errors', len(result.errors)),
+        'error_types': sorted({e['type'] for e in result.errors}),
+        'status': result.final_status,
+        'search': result.search,
+        'flags': " ".join(f"-D{k}" + (f"={v}" if v is not None else "") for k, v in result.flags.items()),
+        'options': " ".join(f"-{k}{v}" for k, v in result.run_options.items()),
+    }
+
+
+def load_run_summaries(paths, cache_path=RUN_SUMMARIES_PATH):
+    """summarize_run for every file, reusing cached rows of files whose size and mtime are unchanged.
+
+    Files that need parsing are spread over worker processes when there is enough output to parse.
+    """
+    try:
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+        runs = cached['runs'] if cached.get('version') == SUMMARY_VERSION else {}
+    except (OSError, ValueError, KeyError, TypeError):
+        runs = {}
+
+    rows = {}
+    todo = []
+    todo_bytes = 0
+    for path in paths:
+        source = file_source(path)
+        row = runs.get(source['path'])
+        if row is not None and row['source'] == source:
+            rows[path] = row
+        else:
+            todo.append(path)
+            todo_bytes += source['size']
+
+    workers = min(os.cpu_count() or 1, len(todo))
+    if workers > 1 and todo_bytes >= PARALLEL_MIN_BYTES:
+        with ProcessPoolExecutor(workers) as pool:
+            parsed = list(pool.map(summarize_run, todo, chunksize=max(len(todo) // (4 * workers), 1)))
+    else:
+        parsed = [summarize_run(path) for path in todo]
+    for path, row in zip(todo, parsed):
+        rows[path] = row
+        runs[row['source']['path']] = row
+
+    if todo:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path + '.tmp', 'w') as f:
+                json.dump({'version': SUMMARY_VERSION, 'runs': runs}, f)
+            os.replace(cache_path + '.tmp', cache_path)
+        except OSError:
+            pass
+    return [rows[path] for path in paths]
@@ -0,0 +1,56 @@
+"""Stand-in for a long pan run, to try the live monitor without SPIN.
+
+Replays a pan .out file, printing a stream of "Depth= States= ..." progress lines for the given
+number of seconds before the final report, the way a real search does while it runs.
+"""
+import argparse
+import os
+import sys
+import time
+
+from pan_output import find_out_file, load_pan_output
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INTERVAL = 0.1
+
+
+def progress_lines(result, seconds):
+    states = result.stats.get('states_stored') or 10_000_000
+    transitions = result.stats.get('transitions') or 2 * states
+    depth = result.stats.get('depth_reached') or 1000
+    memory = result.memory.get('total') or 128.0
+    steps = max(int(seconds / INTERVAL), 1)
+    for k in range(1, steps + 1):
+        # Searches slow down as the hash table fills: growth follows a square root
+        f = (k / steps) ** 0.5
+        t = k * INTERVAL
+        s = max(int(states * f), 1)
+        yield (f"Depth= {int(depth * min(2 * f, 1)):7d} States= {s:8.3g} Transitions= {transitions * f:8.3g} "
+               f"Memory= {memory * (0.5 + 0.5 * f):9.3f}\tt= {t:8.2f} R= {s / t:7.0g}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("out_file", nargs="?", help="pan output to replay (default: the .out in data/)")
+    parser.add_argument("--seconds", type=float, default=20, help="how long the search appears to run")
+    args = parser.parse_args()
+
+    path = args.out_file or find_out_file(os.path.join(BASE_DIR, "data")) \
+        or find_out_file(os.path.join(BASE_DIR, "examples", "eratosthenes"))
+    result = load_pan_output(path)
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        lines = [line.rstrip('\n') for line in f if not line.startswith('Depth=')]
+
+    # pan prints its progress before the "(Spin Version" report
+    report = next((i for i, line in enumerate(lines) if line.startswith('(Spin Version')), 0)
+    for line in lines[:report]:
+        print(line, flush=True)
+    for line in progress_lines(result, args.seconds):
+        print(line, flush=True)
+        time.sleep(INTERVAL)
+    for line in lines[report:]:
+        print(line, flush=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,69 +4,106 @@ import re
 import json
 from collections import defaultdict
 
+from channels import match_messages, parse_channel_decls
+from pan_output import load_pan_output
+from sim_index import load_sim_trace
+from trail_model import SimStepMap, TrailColumns, load_pml_lines
+
 
 def parse_trail_file(trail_path):
+    """Steps of a pan trail.
+
+    Marker lines have negative fields: "-2:N:-2" names the never claim's pid, "-1:-1:-1" marks where
+    the cycle of a liveness counterexample starts (every later step is in the loop) and
+    "-4:-4:-4" only says statements were merged.
+    """
     steps = []
+    claim_pid = None
+    in_cycle = False
     with open(trail_path, 'r') as f:
         for line in f:
             line = line.strip()
-            if not line or line.startswith('-4'):
+            if not line:
                 continue
             parts = line.split(':')
             if len(parts) != 3:
                 continue
+            if line.startswith('-'):
+                if parts[0] == '-2':
+                    claim_pid = int(parts[1])
+                elif parts[0] == '-1':
+                    in_cycle = True
+                continue
             step, proc_id, line_no = parts
-            steps.append({
+            claim = int(proc_id) == claim_pid
+            entry = {
                 "step": int(step),
                 "proc_id": int(proc_id),
-                "proc_name": f"Process_{proc_id}",
+                "proc_name": "never_claim" if claim else f"Process_{proc_id}",
                 "line": int(line_no),
                 "action": f"Executed line {line_no}"
-            })
+            }
+            if claim:
+                entry["claim"] = True
+            if in_cycle:
+                entry["cycle"] = True
+            steps.append(entry)
     return steps
 
 
+def find_trail_files(data_dir):
+    """Every trail of a run in the order pan wrote them: model.pml.trail, model.pml1.trail, model.pml2.trail, ..."""
+    names = [f for f in os.listdir(data_dir) if f.endswith(".trail")]
+    names.sort(key=lambda name: [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)])
+    return [os.path.join(data_dir, name) for name in names]
+
+
+def mark_cycle(trail, sim):
+    """Flag the steps from the Sim "START OF CYCLE" marker on, for trails that carry no cycle marker.
+
+    Only a spin -t replay of this very trail numbers its depths like the trail's steps; for any other
+    Sim trace the cycle stays unmarked rather than guessed.
+    """
+    if sim.cycle_depth is None or any(e.get("cycle") for e in trail):
+        return trail
+    if not SimStepMap(TrailColumns(trail), sim).valid:
+        return trail
+    for e in trail:
+        if e["step"] >= sim.cycle_depth:
+            e["cycle"] = True
+    return trail
+
+
 def parse_pan_out(pan_path):
+    """Errors pan reported, from the same single-pass parser the overview uses."""
+    return load_pan_output(pan_path).errors
+
+
+def find_unmatched_comm(data_dir, sim=None):
+    """One unmatched_comm error per channel whose sends or receives had no partner in the Sim trace."""
+    if sim is None:
+        sim = load_sim_trace(data_dir)
+    if sim is None or len(sim) == 0:
+        return []
+    flow = match_messages(sim, parse_channel_decls(load_pml_lines(data_dir)))
     errors = []
-    error_pattern = re.compile(
-        r'^(.*?)(assertion violated|invalid end state|deadlock)(.*)$', re.IGNORECASE
-    )
-    step_depth_pattern = re.compile(
-        r'at depth (\d+)|step (\d+)', re.IGNORECASE
-    )
-
-    with open(pan_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
+    for stats in flow.channels:
+        for actions, what in ((stats.unmatched_sends, "send(s) never received"),
+                              (stats.unmatched_receives, "receive(s) with no message")):
+            if not actions:
                 continue
-
-            match = error_pattern.search(line)
-            if match:
-                err_type = match.group(2).lower()
-                msg = line
-
-                depth = None
-                step_num = None
-                depth_match = re.search(r'at depth (\d+)', line, re.IGNORECASE)
-                if depth_match:
-                    depth = int(depth_match.group(1))
-                else:
-                    step_match = re.search(r'step (\d+)', line, re.IGNORECASE)
-                    if step_match:
-                        step_num = int(step_match.group(1))
-
-                errors.append({
-                    'type': err_type,
-                    'message': msg,
-                    'depth': depth,
-                    'step': step_num
-                })
+            first = actions[0]
+            errors.append({
+                'type': 'unmatched_comm',
+                'message': f"{stats.name}: {len(actions)} {what}, first by proc {sim.pid[first]} "
+                           f"at depth {sim.depth[first]} [{sim.stmt[first]}]",
+                'depth': int(sim.depth[first]),
+                'step': None
+            })
     return errors
 
 
-
-def save_parsed_output(parsed_trail, parsed_errors, out_path="output/parsed_data.json"):
+def save_parsed_output(parsed_trail, parsed_errors, processes=None, out_path="output/parsed_data.json"):
     base_dir = os.path.dirname(os.path.abspath(__file__))
     abs_out_path = os.path.join(base_dir, out_path)
 
@@ -74,7 +111,8 @@ def save_parsed_output(parsed_trail, parsed_errors, out_path="output/parsed_data
     with open(abs_out_path, 'w') as f:
         json.dump({
             'trail': parsed_trail,
-            'errors': parsed_errors
+            'errors': parsed_errors,
+            'processes': processes or {}
         }, f, indent=2)
     print(f"Saved parsed data to {abs_out_path}")
 
@@ -107,7 +145,7 @@ def parse_msc_txt(txt_path):
     proc_names = {}
     events = []
 
-    create_re = re.compile(r'proc\s+(\d+)\s+\([^)]+\)\s+creates proc\s+(\d+)\s+\(([^)]+)\)')
+    create_re = re.compile(r'proc\s+(\d+|-)\s+\([^)]+\)\s+creates proc\s+(\d+)\s+\(([^)]+)\)')
     action_re = re.compile(r'proc\s+(\d+)\s+\([^)]+\)\s+([^\[]+)\[(.+)\]')
 
     for line in sim_block.strip().splitlines():
@@ -115,7 +153,7 @@ def parse_msc_txt(txt_path):
         if 'creates proc' in line:
             m = create_re.search(line)
             if m:
-                src_pid = int(m.group(1))
+                src_pid = int(m.group(1)) if m.group(1) != '-' else None
                 dst_pid = int(m.group(2))
                 dst_name = m.group(3)
                 proc_names[dst_pid] = dst_name
@@ -157,19 +195,24 @@ def main():
     base_dir = os.path.dirname(os.path.abspath(__file__))
     data_dir = os.path.join(base_dir, "data")
 
-    trail_files = [f for f in os.listdir(data_dir) if f.endswith(".trail")]
+    trail_files = find_trail_files(data_dir)
     if not trail_files:
         raise FileNotFoundError("No .trail file found in /data")
-    trail_path = os.path.join(data_dir, trail_files[0])
+    trail_path = trail_files[0]
     
     out_files = [f for f in os.listdir(data_dir) if f.endswith(".out")]
     if not out_files:
         raise FileNotFoundError("No .out file found in /data")
     pan_path = os.path.join(data_dir, out_files[0])
     
+    sim = load_sim_trace(data_dir)
     trail_data = parse_trail_file(trail_path)   
+    if sim is not None:
+        mark_cycle(trail_data, sim)
     error_data = parse_pan_out(pan_path)        
+    error_data += find_unmatched_comm(data_dir, sim)
 
+    proc_names = {}
     txt_path = convert_isf_to_txt(data_dir)
     if txt_path:
         proc_names, events = parse_msc_txt(txt_path)
@@ -177,7 +220,7 @@ def main():
     else:
         print("No .txt file for MSC parsing.")
 
-    save_parsed_output(trail_data, error_data)
+    save_parsed_output(trail_data, error_data, proc_names)
 
 if __name__ == '__main__':
     main()
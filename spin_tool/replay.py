@@ -0,0 +1,151 @@
+from PyQt6.QtWidgets import (
+    QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QSlider, QComboBox,
+    QLabel, QListWidget, QListView
+)
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+from trail_model import ReplayFrames
+
+FPS = 30
+SPEEDS = [1, 2, 5, 10, 25, 100, 1000]   # steps per second
+
+
+class ReplayController(QObject):
+    """Play/pause/seek over precomputed frames; fast speeds skip frames instead of ticking faster."""
+
+    frameChanged = pyqtSignal(int)
+    playingChanged = pyqtSignal(bool)
+
+    def __init__(self, frames, parent=None):
+        super().__init__(parent)
+        self.frames = frames
+        self.index = 0
+        self.speed = 5
+        self.pending = 0.0
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000 // FPS)
+        self.timer.timeout.connect(self.tick)
+
+    def is_playing(self):
+        return self.timer.isActive()
+
+    def play(self):
+        if len(self.frames) == 0:
+            return
+        if self.index >= len(self.frames) - 1:
+            self.seek(0)
+        self.pending = 0.0
+        self.timer.start()
+        self.playingChanged.emit(True)
+
+    def pause(self):
+        if self.timer.isActive():
+            self.timer.stop()
+            self.playingChanged.emit(False)
+
+    def toggle(self):
+        self.pause() if self.is_playing() else self.play()
+
+    def set_speed(self, steps_per_second):
+        self.speed = steps_per_second
+
+    def seek(self, index):
+        index = min(max(int(index), 0), len(self.frames) - 1)
+        if index != self.index or index == 0:
+            self.index = index
+            self.frameChanged.emit(index)
+
+    def tick(self):
+        self.pending += self.speed / FPS
+        advance = int(self.pending)
+        if advance:
+            self.pending -= advance
+            self.seek(self.index + advance)
+        if self.index >= len(self.frames) - 1:
+            self.pause()
+
+    def locations(self):
+        return self.frames.locations(self.index)
+
+
+class ReplayBar(QWidget):
+    """Replay controls plus the current statement and the location of every process."""
+
+    def __init__(self, columns, pml_lines=None, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.pml_lines = pml_lines or []
+        self.controller = ReplayController(ReplayFrames(columns), self)
+        self.shown_lines = [None] * len(columns.proc_names)
+        self.current_row = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+
+        controls = QHBoxLayout()
+        self.play_btn = QPushButton("Play")
+        self.play_btn.clicked.connect(self.controller.toggle)
+        controls.addWidget(self.play_btn)
+
+        self.slider = QSlider(Qt.Orientation.Horizontal)
+        self.slider.setRange(0, max(len(columns) - 1, 0))
+        self.slider.valueChanged.connect(self.controller.seek)
+        controls.addWidget(self.slider, stretch=1)
+
+        self.speed_box = QComboBox()
+        for speed in SPEEDS:
+            self.speed_box.addItem(f"{speed} steps/s", speed)
+        self.speed_box.setCurrentIndex(SPEEDS.index(self.controller.speed))
+        self.speed_box.currentIndexChanged.connect(
+            lambda i: self.controller.set_speed(self.speed_box.itemData(i))
+        )
+        controls.addWidget(self.speed_box)
+        layout.addLayout(controls)
+
+        self.status = QLabel()
+        self.status.setStyleSheet("font-family: Courier; font-weight: normal; margin: 0px;")
+        layout.addWidget(self.status)
+
+        self.location_list = QListWidget()
+        self.location_list.setFlow(QListView.Flow.LeftToRight)
+        self.location_list.setWrapping(True)
+        self.location_list.setMaximumHeight(60)
+        self.location_list.addItems(columns.proc_names)
+        layout.addWidget(self.location_list)
+
+        self.controller.frameChanged.connect(self.show_frame)
+        self.controller.playingChanged.connect(
+            lambda playing: self.play_btn.setText("Pause" if playing else "Play")
+        )
+        if len(columns):
+            self.show_frame(0)
+
+    def code_at(self, line):
+        if 0 < line <= len(self.pml_lines):
+            return self.pml_lines[line - 1].strip()
+        return ""
+
+    def show_frame(self, index):
+        self.slider.blockSignals(True)
+        self.slider.setValue(index)
+        self.slider.blockSignals(False)
+
+        row = self.columns.row[index]
+        line = int(self.columns.line[index])
+        code = self.code_at(line)
+        self.status.setText(
+            f"Step {self.columns.step[index]} | {self.columns.proc_names[row]} | {self.columns.location(index)}"
+            + (f": {code}" if code else "")
+        )
+
+        # Only touch the list items whose location changed since the last frame
+        for r, loc in enumerate(self.controller.locations().tolist()):
+            if self.shown_lines[r] != loc:
+                self.shown_lines[r] = loc
+                where = self.columns.location(loc) if loc >= 0 else "not started"
+                self.location_list.item(r).setText(f"{self.columns.proc_names[r]}: {where}")
+        if self.current_row is not None:
+            self.location_list.item(self.current_row).setSelected(False)
+        self.location_list.item(row).setSelected(True)
+        self.current_row = row
@@ -0,0 +1,305 @@
+"""Every parsed run, kept in a local SQLite database so results outlive "Clear Files".
+
+    python run_repository.py ingest DIR [DIR ...]     store the run(s) in each folder
+    python run_repository.py errors --line 33 --type "assertion violated"
+    python run_repository.py trend MODEL               states/sec over the model's runs
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from pan_output import find_out_file, load_pan_output
+from parser_module import parse_trail_file
+from sim_index import find_sim_file, iter_sim_lines, parse_sim_lines
+from trail_model import SimStepMap, TrailColumns
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_PATH = os.path.join(BASE_DIR, 'repository', 'runs.db')
+BATCH_RUNS = 50             # runs per transaction when ingesting many folders
+SIM_COLUMNS = ('depth', 'pid', 'line', 'state')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,   -- sha1 of the .out, .trail and .pml contents
+    model TEXT NOT NULL,
+    model_hash TEXT,                    -- sha1 of the .pml source: one per model revision
+    source_dir TEXT,
+    recorded_at REAL,                   -- mtime of the .out: when the run finished
+    ingested_at REAL,
+    flags TEXT,
+    options TEXT,
+    search TEXT,
+    states INTEGER,
+    transitions INTEGER,
+    memory REAL,
+    elapsed REAL,
+    states_per_second REAL,
+    depth INTEGER,
+    errors INTEGER,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model, recorded_at);
+CREATE INDEX IF NOT EXISTS runs_flags ON runs (flags);
+
+CREATE TABLE IF NOT EXISTS run_flags (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS run_flags_name ON run_flags (name, value);
+CREATE INDEX IF NOT EXISTS run_flags_run ON run_flags (run_id);
+
+CREATE TABLE IF NOT EXISTS errors (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    type TEXT NOT NULL,
+    message TEXT,
+    depth INTEGER,
+    file TEXT,
+    line INTEGER                        -- failing PML line from the Sim trace, NULL when it is unknown
+);
+CREATE INDEX IF NOT EXISTS errors_type_line ON errors (type, line);
+CREATE INDEX IF NOT EXISTS errors_line ON errors (line);
+CREATE INDEX IF NOT EXISTS errors_run ON errors (run_id);
+
+CREATE TABLE IF NOT EXISTS trail_steps (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    trail INTEGER NOT NULL,             -- index of the trail file within the run
+    step INTEGER NOT NULL,
+    pid INTEGER NOT NULL,
+    transition INTEGER NOT NULL,        -- pan's transition id (the trail's third field), not a PML line
+    claim INTEGER NOT NULL DEFAULT 0,
+    cycle INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, trail, step)
+) WITHOUT ROWID;
+
+-- Sim traces run to millions of events: one compressed column per field instead of a row per event
+CREATE TABLE IF NOT EXISTS sim_columns (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (run_id, name)
+) WITHOUT ROWID;
+"""
+
+
+def connect(path=REPOSITORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    # Repositories created before trail_steps.line was renamed to what it holds
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(trail_steps)")]
+    if "line" in columns:
+        conn.execute("ALTER TABLE trail_steps RENAME COLUMN line TO transition")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def find_files(run_dir, extension):
+    return [os.path.join(run_dir, f) for f in sorted(os.listdir(run_dir)) if f.endswith(extension)]
+
+
+def sha1_files(paths):
+    h = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+    return h.hexdigest()
+
+
+def failing_line(error, sim, trail):
+    """PML line an error happened at: SPIN's own report in the Sim trace, else the line a spin -t replay
+    of the trail gives the step at the error's depth. The trail alone only has transition ids: (None, None)."""
+    if sim is None:
+        return None, None
+    if sim.errors:
+        file, line, _ = sim.errors[0]
+        return file, line
+    if error['depth'] is None or not trail:
+        return None, None
+    columns = TrailColumns(trail)
+    step_map = SimStepMap(columns, sim)
+    steps = np.flatnonzero((columns.step <= error['depth']) & ~columns.claim)
+    return None, step_map.line_at(int(steps[-1])) if len(steps) else None
+
+
+def read_run(run_dir):
+    """Everything to store for the run in one folder, or None when it has no pan output."""
+    out_path = find_out_file(run_dir)
+    if out_path is None:
+        return None
+    pml_paths = find_files(run_dir, '.pml')
+    trail_paths = find_files(run_dir, '.trail')
+    sim_path = find_sim_file(run_dir)
+
+    result = load_pan_output(out_path)
+    trails = [parse_trail_file(path) for path in trail_paths]
+    sim = parse_sim_lines(iter_sim_lines(sim_path)) if sim_path else None
+    stats = result.stats
+    elapsed = result.elapsed
+    states = stats.get('states_stored')
+    model = os.path.splitext(os.path.basename(pml_paths[0]))[0] if pml_paths else \
+        os.path.splitext(os.path.basename(out_path))[0]
+
+    errors = []
+    for error in result.errors:
+        file, line = failing_line(error, sim, trails[0] if trails else [])
+        errors.append((error['type'], error['message'], error['depth'], file, line))
+
+    return {
+        'fingerprint': sha1_files([out_path] + trail_paths + pml_paths),
+        'model': model,
+        'model_hash': sha1_files(pml_paths[:1]) if pml_paths else None,
+        'source_dir': os.path.abspath(run_dir),
+        'recorded_at': os.stat(out_path).st_mtime,
+        'flags': " ".join(f"-D{k}" + (f"={v}" if v is not None else "") for k, v in result.flags.items()),
+        'flag_list': list(result.flags.items()),
+        'options': " ".join(f"-{k}{v}" for k, v in result.run_options.items()),
+        'search': result.search,
+        'states': states,
+        'transitions': stats.get('transitions'),
+        'memory': result.memory.get('total'),
+        'elapsed': elapsed,
+        'states_per_second': states / elapsed if states is not None and elapsed else result.rate,
+        'depth': stats.get('depth_reached'),
+        'errors': stats.get('errors', len(result.errors)),
+        'status': result.final_status,
+        'error_rows': errors,
+        'trails': trails,
+        'sim': sim,
+    }
+
+
+RUN_FIELDS = ('fingerprint', 'model', 'model_hash', 'source_dir', 'recorded_at', 'flags', 'options', 'search',
+              'states', 'transitions', 'memory', 'elapsed', 'states_per_second', 'depth', 'errors', 'status')
+
+
+def store_run(conn, run):
+    """Insert one read_run result; returns its id, or None when the same run is already stored."""
+    cur = conn.execute(
+        f"INSERT OR IGNORE INTO runs ({', '.join(RUN_FIELDS)}, ingested_at) "
+        f"VALUES ({', '.join('?' * len(RUN_FIELDS))}, ?)",
+        [run[k] for k in RUN_FIELDS] + [time.time()]
+    )
+    if cur.rowcount == 0:
+        return None
+    run_id = cur.lastrowid
+    conn.executemany("INSERT INTO run_flags (run_id, name, value) VALUES (?, ?, ?)",
+                     [(run_id, name, value) for name, value in run['flag_list']])
+    conn.executemany("INSERT INTO errors (run_id, type, message, depth, file, line) VALUES (?, ?, ?, ?, ?, ?)",
+                     [(run_id,) + row for row in run['error_rows']])
+    conn.executemany(
+        "INSERT OR REPLACE INTO trail_steps (run_id, trail, step, pid, transition, claim, cycle) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((run_id, k, e['step'], e['proc_id'], e['line'], int(bool(e.get('claim'))), int(bool(e.get('cycle'))))
+         for k, trail in enumerate(run['trails']) for e in trail)
+    )
+    sim = run['sim']
+    if sim is not None and len(sim):
+        columns = [(name, getattr(sim, name).dtype.str, getattr(sim, name).tobytes()) for name in SIM_COLUMNS]
+        columns.append(('stmt', 'text', '\n'.join(sim.stmt).encode('utf-8')))
+        conn.executemany(
+            "INSERT INTO sim_columns (run_id, name, dtype, data) VALUES (?, ?, ?, ?)",
+            [(run_id, name, dtype, zlib.compress(raw, 1)) for name, dtype, raw in columns]
+        )
+    return run_id
+
+
+def ingest(conn, run_dirs, batch=BATCH_RUNS):
+    """Store the run of every folder, committing once per `batch` runs; returns the new run ids."""
+    ids = []
+    for start in range(0, len(run_dirs), batch):
+        runs = [run for run in map(read_run, run_dirs[start:start + batch]) if run is not None]
+        with conn:
+            for run in runs:
+                run_id = store_run(conn, run)
+                if run_id is not None:
+                    ids.append(run_id)
+    return ids
+
+
+def load_sim_columns(conn, run_id):
+    """The stored Sim trace of a run as {field: numpy array}, with 'stmt' as a list of strings."""
+    columns = {}
+    for name, dtype, data in conn.execute("SELECT name, dtype, data FROM sim_columns WHERE run_id = ?", (run_id,)):
+        raw = zlib.decompress(data)
+        columns[name] = raw.decode('utf-8').split('\n') if dtype == 'text' else np.frombuffer(raw, dtype=dtype)
+    return columns
+
+
+def runs_with_error(conn, line=None, error_type=None, model=None):
+    """Runs whose error fired at `line` (and/or of `error_type`), newest first."""
+    query = ("SELECT runs.id, runs.model, runs.recorded_at, runs.flags, errors.type, errors.line, errors.message "
+             "FROM errors JOIN runs ON runs.id = errors.run_id WHERE 1=1")
+    args = []
+    if line is not None:
+        query += " AND errors.line = ?"
+        args.append(line)
+    if error_type is not None:
+        query += " AND errors.type = ?"
+        args.append(error_type)
+    if model is not None:
+        query += " AND runs.model = ?"
+        args.append(model)
+    return conn.execute(query + " ORDER BY runs.recorded_at DESC", args).fetchall()
+
+
+def runs_with_flag(conn, name, value=None):
+    query = "SELECT DISTINCT run_id FROM run_flags WHERE name = ?"
+    args = [name]
+    if value is not None:
+        query += " AND value = ?"
+        args.append(value)
+    return [row[0] for row in conn.execute(query, args)]
+
+
+def states_per_second_trend(conn, model):
+    """(recorded_at, states/sec, flags, model revision) of every run of a model, oldest first."""
+    return conn.execute(
+        "SELECT recorded_at, states_per_second, flags, model_hash FROM runs "
+        "WHERE model = ? ORDER BY recorded_at", (model,)
+    ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_cmd = commands.add_parser("ingest", help="store the run in each folder")
+    ingest_cmd.add_argument("dirs", nargs="+")
+    errors_cmd = commands.add_parser("errors", help="runs with a matching error")
+    errors_cmd.add_argument("--line", type=int)
+    errors_cmd.add_argument("--type")
+    errors_cmd.add_argument("--model")
+    trend_cmd = commands.add_parser("trend", help="states/sec over the runs of a model")
+    trend_cmd.add_argument("model")
+    parser.add_argument("--db", default=REPOSITORY_PATH)
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "ingest":
+        ids = ingest(conn, [d for d in args.dirs if os.path.isdir(d)])
+        print(f"{len(ids)} new run(s) stored in {args.db}")
+    elif args.command == "errors":
+        for run_id, model, recorded_at, flags, kind, line, message in runs_with_error(conn, args.line, args.type, args.model):
+            print(f"run {run_id} {model} {time.strftime('%Y-%m-%d %H:%M', time.localtime(recorded_at))} "
+                  f"[{flags}] line {line}: {message}")
+    else:
+        for recorded_at, rate, flags, model_hash in states_per_second_trend(conn, args.model):
+            rate = f"{rate:,.0f}" if rate is not None else "?"
+            print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(recorded_at))} {rate} states/s "
+                  f"[{flags}] rev {(model_hash or '?')[:8]}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+import json
+import mmap
+import os
+import re
+
+import numpy as np
+
+SIM_START = '===start Sim==='
+SIM_END = '===end Sim==='
+SPAWN_TREE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'spawn_tree.json')
+
+action_re = re.compile(
+    r'^\s*(\d+):\s+proc\s+(\d+)\s+\((.*?)\)\s+(\S+):(\d+)\s+\(state\s+(\d+)\)\s*(?:\[(.*)\])?\s*$'
+)
+create_re = re.compile(r'^\s*(\d+):\s+proc\s+(\d+|-)\s+\((.*?)\)\s+creates proc\s+(\d+)\s+\((.*?)\)')
+terminate_re = re.compile(r'^\s*(\d+):\s+proc\s+(\d+)\s+\((.*?)\)\s+terminates')
+error_re = re.compile(r'^spin:\s+(.*?):(\d+),\s+Error:\s+(.*)$')
+depth_re = re.compile(r'^\s*(\d+):')
+# Never claim moves have no pid: "  4:	proc  - (never_0:1) model.pml:20 (state 3)	[(!(p))]"
+claim_re = re.compile(r'^\s*(\d+):\s+proc\s+-\s+\((.*?)\)\s+(\S+):(\d+)\s+\(state\s+(\d+)\)\s*(?:\[(.*)\])?\s*$')
+CYCLE_MARK = 'START OF CYCLE'
+
+
+def proctype_of(proc_label):
+    """'sieve:1' -> 'sieve', ':init::1' -> ':init:'."""
+    name = proc_label.rsplit(':', 1)[0] if proc_label.count(':') else proc_label
+    return name or proc_label
+
+
+class SimTrace:
+    """Columnar view of the Sim block of an .isf file, built in a single pass over its lines."""
+
+    def __init__(self):
+        # One entry per executed statement
+        self.depth = []
+        self.pid = []
+        self.line = []
+        self.state = []
+        self.stmt = []
+        self.row = []               # line of the action within the Sim block
+        # Process creations as (depth, parent pid or None for :root:, child pid, proctype)
+        self.creates = []
+        self.terminates = []        # (depth, pid)
+        self.final = []             # (depth, pid, proctype, line, state) where each process ended
+        self.errors = []            # (file, line, message)
+        self.error_actions = []     # index of the last action executed before each error
+        self.proc_types = {}
+        # Liveness counterexamples are lassos: actions from cycle_start on repeat forever
+        self.cycle_start = None     # index of the first action in the loop
+        self.cycle_depth = None     # depth of the first step after the cycle marker
+        self.claim = []             # never claim moves as (depth, line, state, stmt)
+
+    def __len__(self):
+        return len(self.depth)
+
+    def freeze(self):
+        self.depth = np.asarray(self.depth, dtype=np.int64)
+        self.pid = np.asarray(self.pid, dtype=np.int64)
+        self.line = np.asarray(self.line, dtype=np.int64)
+        self.state = np.asarray(self.state, dtype=np.int64)
+        self.row = np.asarray(self.row, dtype=np.int64)
+        return self
+
+
+def parse_sim_lines(lines):
+    trace = SimTrace()
+    in_snapshot = False
+
+    for row, raw in enumerate(lines):
+        if raw.startswith('spin:'):
+            m = error_re.match(raw.strip())
+            if m:
+                trace.errors.append((m.group(1), int(m.group(2)), m.group(3)))
+                trace.error_actions.append(len(trace.depth) - 1)
+            continue
+        if raw.startswith('#processes:'):
+            in_snapshot = True
+            continue
+        if CYCLE_MARK in raw:
+            trace.cycle_start = len(trace.depth)
+            continue
+        if 'proc' not in raw:
+            continue
+
+        m = action_re.match(raw)
+        if m:
+            depth, pid, line, state = int(m.group(1)), int(m.group(2)), int(m.group(5)), int(m.group(6))
+            trace.proc_types.setdefault(pid, proctype_of(m.group(3)))
+            if in_snapshot and m.group(7) is None:
+                trace.final.append((depth, pid, proctype_of(m.group(3)), line, state))
+                continue
+            if trace.cycle_start is not None and trace.cycle_depth is None:
+                trace.cycle_depth = depth
+            trace.depth.append(depth)
+            trace.pid.append(pid)
+            trace.line.append(line)
+            trace.state.append(state)
+            trace.stmt.append(m.group(7) or '')
+            trace.row.append(row)
+            continue
+
+        m = claim_re.match(raw)
+        if m:
+            if in_snapshot and m.group(6) is None:
+                continue
+            depth = int(m.group(1))
+            if trace.cycle_start is not None and trace.cycle_depth is None:
+                trace.cycle_depth = depth
+            trace.claim.append((depth, int(m.group(4)), int(m.group(5)), m.group(6) or ''))
+            continue
+
+        m = create_re.match(raw)
+        if m:
+            parent = int(m.group(2)) if m.group(2) != '-' else None
+            child = int(m.group(4))
+            trace.proc_types[child] = m.group(5)
+            trace.creates.append((int(m.group(1)), parent, child, m.group(5)))
+            continue
+
+        m = terminate_re.match(raw)
+        if m:
+            trace.terminates.append((int(m.group(1)), int(m.group(2))))
+
+    return trace.freeze()
+
+
+def iter_sim_lines(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.startswith(SIM_START):
+                break
+        for line in f:
+            if line.startswith(SIM_END):
+                break
+            yield line.rstrip('\n')
+
+
+def find_sim_file(data_dir="data"):
+    if not os.path.isdir(data_dir):
+        return None
+    names = sorted(os.listdir(data_dir))
+    for ext in ('.isf', '.txt'):
+        for filename in names:
+            if filename.endswith(ext):
+                return os.path.join(data_dir, filename)
+    return None
+
+
+def load_sim_trace(data_dir="data"):
+    path = find_sim_file(data_dir)
+    if path is None:
+        return None
+    return parse_sim_lines(iter_sim_lines(path))
+
+
+class SpawnTree:
+    """Which process created which, from the Sim "creates proc" events."""
+
+    def __init__(self, creates):
+        self.parent = {}            # pid -> creating pid, None for processes started by :root:
+        self.proc_types = {}
+        self.created_at = {}        # pid -> depth of its creation
+        self.depth = {}
+        self.children = {}
+        for at, parent, child, proctype in creates:
+            self.parent[child] = parent
+            self.proc_types[child] = proctype
+            self.created_at[child] = at
+            # Creations are logged in order, so the parent's depth is already known
+            self.depth[child] = self.depth.get(parent, -1) + 1 if parent is not None else 0
+            self.children.setdefault(parent, []).append(child)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def depth_of(self, pid, default=0):
+        return self.depth.get(int(pid), default)
+
+    def ancestry(self, pid):
+        """pid followed by its creator, its creator's creator, ... up to the first process."""
+        chain = [int(pid)]
+        while self.parent.get(chain[-1]) is not None and len(chain) <= len(self.parent):
+            chain.append(self.parent[chain[-1]])
+        return chain
+
+    def describe(self, pid):
+        return " \u2190 ".join(f"P{p} {self.proc_types.get(p, '?')}" for p in self.ancestry(pid))
+
+
+def iter_creates(lines):
+    for raw in lines:
+        if 'creates' not in raw:
+            continue
+        m = create_re.match(raw)
+        if m:
+            parent = int(m.group(2)) if m.group(2) != '-' else None
+            yield int(m.group(1)), parent, int(m.group(4)), m.group(5)
+
+
+def load_spawn_tree(data_dir="data", cache_path=SPAWN_TREE_PATH):
+    """Spawn tree of the run in data_dir, cached on disk so every module window reads the same index.
+
+    The cache is keyed on the Sim file's path, size and mtime and rebuilt when any of them change.
+    """
+    path = find_sim_file(data_dir)
+    if path is None:
+        return None
+    st = os.stat(path)
+    source = {'path': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+    try:
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+        if cached.get('source') == source:
+            return SpawnTree([tuple(c) for c in cached['creates']])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    creates = list(iter_creates(iter_sim_lines(path)))
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path + '.tmp', 'w') as f:
+            json.dump({'source': source, 'creates': creates}, f)
+        os.replace(cache_path + '.tmp', cache_path)
+    except OSError:
+        pass
+    return SpawnTree(creates)
+
+
+class SimLineIndex:
+    """Byte offsets of every line in the Sim block of a file, so lines are read on demand instead of loaded."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+        start = self.mm.find(SIM_START.encode())
+        if start < 0:
+            self.begin = self.end = 0
+        else:
+            self.begin = self.mm.find(b'\n', start) + 1 or size
+            self.end = self.mm.find(SIM_END.encode(), self.begin)
+            if self.end < 0:
+                self.end = size
+
+        buf = np.frombuffer(self.mm, dtype=np.uint8, count=self.end - self.begin, offset=self.begin) \
+            if self.end > self.begin else np.empty(0, dtype=np.uint8)
+        newlines = np.flatnonzero(buf == 10) + self.begin
+        del buf     # a live numpy view would keep the mmap from closing
+        self.starts = np.concatenate(([self.begin], newlines + 1))
+        self.ends = np.concatenate((newlines, [self.end]))
+        if self.starts[-1] >= self.end:
+            self.starts, self.ends = self.starts[:-1], self.ends[:-1]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.file.close()
+
+    def line(self, i):
+        return self.mm[self.starts[i]:self.ends[i]].decode('utf-8', errors='replace').rstrip('\r')
+
+    def line_at_offset(self, offset):
+        return int(np.searchsorted(self.starts, offset, side='right')) - 1
+
+    def depth(self, i):
+        m = depth_re.match(self.line(i))
+        return int(m.group(1)) if m else None
+
+    def find(self, text, from_line=0, backwards=False):
+        """Line of the next (or previous) match of text, wrapping around; None if absent.
+
+        Matching is case-sensitive like PROMELA identifiers, which keeps it a plain mmap scan.
+        """
+        if not text or len(self) == 0:
+            return None
+        needle = text.encode('utf-8')
+        pos = int(self.starts[min(max(from_line, 0), len(self) - 1)])
+        if backwards:
+            hit = self.mm.rfind(needle, self.begin, pos)
+            if hit < 0:
+                hit = self.mm.rfind(needle, pos, self.end)
+        else:
+            hit = self.mm.find(needle, pos, self.end)
+            if hit < 0:
+                hit = self.mm.find(needle, self.begin, pos)
+        return self.line_at_offset(hit) if hit >= 0 else None
+
+    def line_of_step(self, step):
+        """First line at depth >= step; Sim depths never decrease, so this is a binary search."""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            # Lines without a depth prefix (creates, errors, blanks) defer to the next one that has it
+            j, d = mid, None
+            while j < hi and d is None:
+                d = self.depth(j)
+                j += 1
+            if d is None or d >= step:
+                hi = mid
+            else:
+                lo = j
+        return min(lo, len(self) - 1)
@@ -0,0 +1,52 @@
+import os
+import json
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SELECTION_PATH = os.path.join(BASE_DIR, "output", "selected_step.json")
+
+
+def publish_step(step, source=""):
+    """Share the selected step with the other module windows, which run as separate processes."""
+    os.makedirs(os.path.dirname(SELECTION_PATH), exist_ok=True)
+    tmp_path = SELECTION_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"step": int(step), "source": source}, f)
+    os.replace(tmp_path, SELECTION_PATH)
+
+
+def read_selected_step():
+    try:
+        with open(SELECTION_PATH, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class StepLinkWatcher(QObject):
+    stepSelected = pyqtSignal(int)
+
+    def __init__(self, source="", parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.last_seen = None
+        os.makedirs(os.path.dirname(SELECTION_PATH), exist_ok=True)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPath(os.path.dirname(SELECTION_PATH))
+        self.watcher.directoryChanged.connect(self.check)
+        self.watcher.fileChanged.connect(self.check)
+        # Deferred so the owner can connect stepSelected and pick up the current selection
+        QTimer.singleShot(0, self.check)
+
+    def check(self, _path=None):
+        # os.replace swaps the inode, so the file has to be re-watched after every publish
+        if os.path.exists(SELECTION_PATH) and SELECTION_PATH not in self.watcher.files():
+            self.watcher.addPath(SELECTION_PATH)
+
+        selection = read_selected_step()
+        if not selection or selection == self.last_seen:
+            return
+        self.last_seen = selection
+        if selection.get("source") != self.source:
+            self.stepSelected.emit(selection["step"])
@@ -1,55 +1,433 @@
 import sys
 import json
-from collections import defaultdict
 
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QScrollArea, QWidget,
-    QVBoxLayout
+    QApplication, QMainWindow, QScrollBar, QWidget,
+    QVBoxLayout, QSplitter
 )
+from PyQt6.QtCore import Qt
 
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
+from matplotlib.artist import Artist
+from matplotlib.collections import PolyCollection
+from matplotlib.font_manager import FontProperties
+from matplotlib.patches import Rectangle
 import matplotlib.pyplot as plt
+import numpy as np
+
+from trail_model import (
+    TrailColumns, BinPyramid, RowLayout, process_spans, resolve_lines, step_span_index, step_at, load_pml_lines
+)
+from step_link import StepLinkWatcher, publish_step
+from replay import ReplayBar
+from sim_index import load_sim_trace, load_spawn_tree
+from var_panel import VariablePanel
+from var_values import load_var_timeline
+
+
+MAX_LABELS = 2000
+LABEL_MIN_PX = 22
+
+
+class SpanLabelLayer(Artist):
+    """Draws all span labels of the timeline as one artist, skipping the ones that do not fit."""
+
+    def __init__(self, ax, x, y, width, texts, fontsize=7):
+        super().__init__()
+        self.ax = ax
+        order = np.argsort(x, kind="stable")
+        self.x = x[order]
+        self.y = y[order]
+        self.width = width[order]
+        # Spans are sorted by start, not end: a running max of ends bounds where visible spans begin
+        self.max_end = np.maximum.accumulate(self.x + self.width) if len(order) else self.x
+        self.texts = [texts[i] for i in order]
+        self.font = FontProperties(size=fontsize)
+        self.set_transform(ax.transData)
+        self.set_clip_on(False)
+        self.set_zorder(3)
+
+    def visible_indices(self):
+        x0, x1 = sorted(self.ax.get_xlim())
+        lo = np.searchsorted(self.max_end, x0, side="right")
+        hi = np.searchsorted(self.x, x1, side="right")
+        if hi <= lo:
+            return np.empty(0, dtype=np.int64)
+
+        px_per_step = self.ax.bbox.width / max(x1 - x0, 1e-9)
+        idx = np.arange(lo, hi)
+        width = self.width[lo:hi]
+        idx = idx[(self.x[lo:hi] + width > x0) & (width * px_per_step >= LABEL_MIN_PX)]
+        return idx[:MAX_LABELS]
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        idx = self.visible_indices()
+        if len(idx) == 0:
+            return
+
+        pts = self.ax.transData.transform(np.column_stack((self.x[idx], self.y[idx])))
+        pad = renderer.points_to_pixels(2)
+        baseline = renderer.points_to_pixels(self.font.get_size_in_points()) / 3
+        gc = renderer.new_gc()
+        gc.set_foreground("black")
+        gc.set_clip_rectangle(self.ax.bbox)
+        flip = renderer.flipy()
+        height = renderer.get_canvas_width_height()[1]
+        for (px, py), i in zip(pts, idx):
+            py -= baseline
+            renderer.draw_text(gc, px + pad, height - py if flip else py, self.texts[i], self.font, 0)
+        gc.restore()
 
 
 class TimelineCanvas(FigureCanvas):
-    def __init__(self, trail_data):
-        self.fig = Figure(figsize=(40, 6))
+    def __init__(self, trail_data, proc_types=None, sim=None):
+        self.fig = Figure()
         super().__init__(self.fig)
         self.ax = self.fig.add_subplot(111)
-        self.trail_data = trail_data
+        self.columns = TrailColumns(trail_data)
+        # PML lines of the steps, when the Sim trace is a replay of this trail
+        self.step_map = resolve_lines(self.columns, sim)
+        self.spans = process_spans(self.columns)
+        self.row_layout = RowLayout(self.columns.row_pid, proc_types or {}, claim_pids=self.columns.claim_pids)
+        self.pyramid = BinPyramid(self.columns)
+        self.span_of = step_span_index(self.columns, self.spans)
+        self.pml_lines = load_pml_lines()
+        self.colors = plt.get_cmap("tab10")
+        self.dynamic = []
+        self.mode = None
+        self.background = None
+        self.selected = None
+        self.on_select = None
         self.draw_timeline()
 
-    def draw_timeline(self):
-        self.ax.clear()
+        self.ax.callbacks.connect("xlim_changed", lambda ax: self.render_window())
+        self.mpl_connect("scroll_event", self.on_scroll)
+        self.mpl_connect("resize_event", lambda event: self.render_window())
+        self.mpl_connect("draw_event", self.on_draw)
+        self.mpl_connect("motion_notify_event", self.on_motion)
+        self.mpl_connect("button_press_event", self.on_click)
+        self.mpl_connect("figure_leave_event", lambda event: self.hide_hover())
 
-        process_timelines = defaultdict(list)
-        for entry in self.trail_data:
-            process_timelines[entry["proc_name"]].append((entry["step"], entry["line"], entry["action"]))
+        self.link = StepLinkWatcher(source="timeline", parent=self)
+        self.link.stepSelected.connect(self.show_step)
 
-        processes = list(process_timelines.keys())
-        colors = plt.cm.get_cmap("tab10", len(processes))
+    def extent(self):
+        if not len(self.columns):
+            return 0, 1
+        return int(self.columns.step[0]), int(self.columns.step[-1]) + 1
 
-        for i, proc in enumerate(processes):
-            timeline = process_timelines[proc]
-            y = i
-            for step, line, action in timeline:
-                self.ax.broken_barh([(step, 1)], (y - 0.4, 0.8), facecolors=colors(i), edgecolor="black")
-                if len(timeline) < 100:
-                    self.ax.text(step + 0.1, y, f"L{line}", va="center", ha="left", fontsize=7)
+    def draw_timeline(self):
+        self.ax.clear()
+        self.dynamic = []
 
-        self.ax.set_yticks(range(len(processes)))
-        self.ax.set_yticklabels(processes)
+        self.ax.set_autoscale_on(False)
+        self.ax.set_xlim(*self.extent())
+        self.set_row_ticks()
         self.ax.set_xlabel("Step")
         self.ax.set_title("Process Execution Timeline")
         self.ax.grid(True, axis="x", linestyle="--", alpha=0.5)
+        self.draw_lasso()
+
+        # Overlays are animated: left out of full redraws and blitted over a cached background
+        self.cursor = self.ax.axvline(0, color="red", linewidth=1, animated=True, visible=False)
+        self.selection = Rectangle(
+            (0, 0), 1, 0.9, facecolor="none", edgecolor="red", linewidth=2, animated=True, visible=False
+        )
+        self.ax.add_patch(self.selection)
+        self.tooltip = self.ax.annotate(
+            "", xy=(0, 0), xytext=(12, 12), textcoords="offset points", fontsize=8,
+            bbox=dict(boxstyle="round", facecolor="#ffffe0", alpha=0.95),
+            annotation_clip=False, animated=True, visible=False
+        )
+        self.overlays = [self.selection, self.cursor, self.tooltip]
 
         self.fig.tight_layout()
-        self.draw()
+        self.render_window()
+
+    def draw_lasso(self):
+        """Shade the loop of a liveness counterexample and arc back from its end to where it starts."""
+        start = self.columns.cycle_start
+        if start is None:
+            return
+        first, end = int(self.columns.step[start]), self.extent()[1]
+        band = self.ax.get_xaxis_transform()   # x in steps, y in axes fractions
+        self.ax.axvspan(first, end, color="#ff7f0e", alpha=0.12, zorder=0)
+        self.ax.axvline(first, color="#ff7f0e", linewidth=1.5, zorder=1)
+        self.ax.annotate(
+            "", xy=(first, 0.93), xytext=(end, 0.93), xycoords=band, textcoords=band,
+            arrowprops=dict(arrowstyle="->", color="#d95f02", linewidth=1.5, connectionstyle="arc3,rad=-0.08")
+        )
+        self.ax.text(first, 0.99, f" cycle: steps {first}-{end - 1} repeat", transform=band,
+                     color="#d95f02", fontsize=8, va="top")
+        if start > 0:
+            self.ax.text(int(self.columns.step[0]), 0.99, " stem", transform=band, color="#555555", fontsize=8, va="top")
+
+    def set_row_ticks(self):
+        # Top to bottom, so group rows sit above their expanded members
+        n = len(self.row_layout)
+        self.ax.set_ylim(n - 0.5, -0.5)
+        self.ax.set_yticks(range(n))
+        self.ax.set_yticklabels([self.row_layout.label(y, self.columns.proc_names) for y in range(n)])
+
+    def toggle_group(self, y):
+        if not self.row_layout.toggle(y):
+            return
+        self.relayout()
+
+    def relayout(self):
+        self.set_row_ticks()
+        self.render_window()
+        if self.selected is not None:
+            self.select_index(self.selected)
+
+    def entry_color(self, y):
+        kind, g, _ = self.row_layout.entries[y]
+        base = np.array(self.colors(g % self.colors.N)[:3])
+        # Members of a group share its hue, lightened a little per instance
+        shade = 0.12 * (self.row_layout.member_index(y) % 5) if kind == "row" else 0.0
+        return tuple(base + (1 - base) * shade)
+
+    def render_window(self):
+        """Redraw only what lies inside the current x limits, at a level of detail matching the zoom."""
+        for artist in self.dynamic:
+            artist.remove()
+        self.dynamic = []
+
+        x0, x1 = self.ax.get_xlim()
+        steps_per_px = (x1 - x0) / max(self.ax.bbox.width, 1)
+
+        if steps_per_px <= 1 / LABEL_MIN_PX:
+            self.mode = "steps"
+            self.draw_steps(x0, x1)
+        elif self.visible_span_count(x0, x1) <= 2 * self.ax.bbox.width:
+            self.mode = "spans"
+            self.draw_spans(x0, x1)
+        else:
+            self.mode = "bins"
+            self.draw_bins(x0, x1, steps_per_px)
+
+        self.ax.set_title(f"Process Execution Timeline (steps {int(x0)}-{int(x1)}, {self.mode})")
+        self.draw_idle()
+
+    def visible_span_count(self, x0, x1):
+        total = 0
+        for spans in self.spans:
+            lo, hi = spans.window(x0, x1)
+            total += hi - lo
+        return total
+
+    def add_row_bars(self, y, x0, widths, aggregate=False):
+        if len(x0) == 0:
+            return
+        verts = np.empty((len(x0), 4, 2))
+        verts[:, 0, 0] = verts[:, 1, 0] = x0
+        verts[:, 2, 0] = verts[:, 3, 0] = x0 + widths
+        verts[:, [0, 3], 1] = y - 0.4
+        verts[:, [1, 2], 1] = y + 0.4
+        bars = PolyCollection(
+            verts, facecolors=self.entry_color(y), alpha=0.6 if aggregate else None,
+            edgecolors="none" if aggregate else "black", linewidths=0.5
+        )
+        self.ax.add_collection(bars, autolim=False)
+        self.dynamic.append(bars)
+
+    def add_labels(self, x, y, widths, texts):
+        if texts:
+            layer = SpanLabelLayer(self.ax, x, y, widths, texts)
+            self.ax.add_artist(layer)
+            self.dynamic.append(layer)
+
+    def draw_steps(self, x0, x1):
+        lo, hi = self.columns.window(np.floor(x0), np.ceil(x1) + 1)
+        steps = self.columns.step[lo:hi].astype(float)
+        rows = self.columns.row[lo:hi]
+        groups = self.row_layout.group_of_row[rows]
+        label_y, label_i = [], []
+        for y, (kind, g, members) in enumerate(self.row_layout.entries):
+            mask = (rows == members[0]) if kind == "row" else (groups == g)
+            self.add_row_bars(y, steps[mask], 1.0, aggregate=kind == "group")
+            if kind == "row":
+                idx = np.flatnonzero(mask)
+                label_i.append(idx)
+                label_y.append(np.full(len(idx), y, dtype=float))
+
+        if label_i:
+            idx = np.concatenate(label_i)
+            self.add_labels(
+                steps[idx], np.concatenate(label_y), np.ones(len(idx)),
+                [self.columns.location(i) for i in (lo + idx).tolist()]
+            )
+
+    def draw_spans(self, x0, x1):
+        label_x, label_y, label_w, label_text = [], [], [], []
+        for y, (kind, g, members) in enumerate(self.row_layout.entries):
+            starts, lengths = [], []
+            for row in members:
+                spans = self.spans[row]
+                lo, hi = spans.window(x0, x1)
+                if hi <= lo:
+                    continue
+                starts.append(spans.start[lo:hi].astype(float))
+                lengths.append(spans.length[lo:hi].astype(float))
+                if kind == "group":
+                    continue
+
+                label_x.append(starts[-1])
+                label_y.append(np.full(hi - lo, y, dtype=float))
+                label_w.append(lengths[-1])
+                label_text.extend(
+                    self.columns.span_location(a, b)
+                    for a, b in zip(spans.first[lo:hi].tolist(), spans.last[lo:hi].tolist())
+                )
+            if starts:
+                self.add_row_bars(y, np.concatenate(starts), np.concatenate(lengths), aggregate=kind == "group")
+
+        if label_text:
+            self.add_labels(
+                np.concatenate(label_x), np.concatenate(label_y), np.concatenate(label_w), label_text
+            )
+
+    def draw_bins(self, x0, x1, steps_per_px):
+        level = self.pyramid.level_for(steps_per_px)
+        width = level[0]
+        start, counts = self.pyramid.window(level, x0, x1)
+        if counts.shape[1] == 0:
+            return
+
+        # Row colour, with opacity showing how much of each bin the process (or group) was running
+        entry_counts = np.array([counts[members].sum(axis=0) for _, _, members in self.row_layout.entries])
+        density = entry_counts / width
+        rgba = np.empty(entry_counts.shape + (4,))
+        rgba[..., :3] = np.array([self.entry_color(y) for y in range(len(self.row_layout))])[:, None, :]
+        rgba[..., 3] = np.where(density > 0, 0.25 + 0.75 * density, 0.0)
+
+        image = self.ax.imshow(
+            rgba, origin="upper", aspect="auto", interpolation="nearest",
+            extent=(start, start + counts.shape[1] * width, len(self.row_layout) - 0.5, -0.5),
+        )
+        self.dynamic.append(image)
+
+    def on_draw(self, event):
+        self.background = self.copy_from_bbox(self.fig.bbox)
+        for artist in self.overlays:
+            self.ax.draw_artist(artist)
+
+    def blit_overlays(self):
+        if self.background is None:
+            return
+        self.restore_region(self.background)
+        for artist in self.overlays:
+            self.ax.draw_artist(artist)
+        self.blit(self.fig.bbox)
+
+    def describe_step(self, i):
+        step = int(self.columns.step[i])
+        line = int(self.columns.line[i])
+        spans = self.spans[self.columns.row[i]]
+        span = self.span_of[i]
+        code = self.pml_lines[line - 1].strip() if 0 < line <= len(self.pml_lines) else ""
+        row = self.columns.row[i]
+        proctype = self.row_layout.groups[self.row_layout.group_of_row[row]][0]
+        text = f"Step {step} | {self.columns.proc_names[row]} ({proctype}) | {self.columns.location(i)}"
+        if spans.length[span] > 1:
+            text += f"\nRun of {spans.length[span]} steps from step {spans.start[span]}"
+        if code:
+            text += f"\n{code}"
+        return text
+
+    def hide_hover(self):
+        if self.cursor.get_visible() or self.tooltip.get_visible():
+            self.cursor.set_visible(False)
+            self.tooltip.set_visible(False)
+            self.blit_overlays()
+
+    def on_motion(self, event):
+        if event.inaxes is not self.ax or event.xdata is None:
+            self.hide_hover()
+            return
+        step_x = np.floor(event.xdata) + 0.5
+        self.cursor.set_xdata([step_x, step_x])
+        self.cursor.set_visible(True)
+
+        i = self.hit_test(event.xdata, event.ydata)
+        if i is None:
+            self.tooltip.set_visible(False)
+        else:
+            self.tooltip.set_text(self.describe_step(i))
+            self.tooltip.xy = (step_x, round(event.ydata))
+            self.tooltip.set_visible(True)
+        self.blit_overlays()
+
+    def hit_test(self, x, y):
+        i = step_at(self.columns, x)
+        entry = int(round(y))
+        if i is None or not 0 <= entry < len(self.row_layout) or abs(y - entry) > 0.4:
+            return None
+        return i if self.row_layout.shows(entry, self.columns.row[i]) else None
+
+    def on_click(self, event):
+        if event.button != 1:
+            return
+        if self.toolbar is not None and self.toolbar.mode != "":
+            return
+
+        # Clicking a group's label, or double-clicking its row, expands or collapses it
+        if event.inaxes is None:
+            if event.x < self.ax.bbox.x0 and self.ax.bbox.y0 <= event.y <= self.ax.bbox.y1:
+                self.toggle_group(int(round(self.ax.transData.inverted().transform((0, event.y))[1])))
+            return
+        if event.dblclick:
+            self.toggle_group(int(round(event.ydata)))
+            return
+
+        i = self.hit_test(event.xdata, event.ydata)
+        if i is not None:
+            self.select_index(i)
+            publish_step(self.columns.step[i], source="timeline")
+
+    def select_index(self, i):
+        self.selected = i
+        spans = self.spans[self.columns.row[i]]
+        span = self.span_of[i]
+        y = self.row_layout.y_of_row[self.columns.row[i]]
+        self.selection.set_bounds(spans.start[span], y - 0.45, spans.length[span], 0.9)
+        self.selection.set_visible(True)
+        self.blit_overlays()
+        if self.on_select:
+            self.on_select(int(self.columns.step[i]))
+
+    def show_step(self, step):
+        i = int(np.searchsorted(self.columns.step, step))
+        if i >= len(self.columns) or self.columns.step[i] != step:
+            return
+        x0, x1 = self.ax.get_xlim()
+        if not x0 <= step < x1:
+            lo, hi = self.extent()
+            width = x1 - x0
+            left = min(max(step - width / 2, lo), hi - width)
+            self.ax.set_xlim(left, left + width)
+        self.cursor.set_xdata([step + 0.5, step + 0.5])
+        self.cursor.set_visible(True)
+        self.select_index(i)
+
+    def on_scroll(self, event):
+        if event.xdata is None:
+            return
+        factor = 1 / 1.25 if event.button == "up" else 1.25
+        lo, hi = self.extent()
+        x0, x1 = self.ax.get_xlim()
+        new_width = min(max((x1 - x0) * factor, 4), hi - lo)
+        left = event.xdata - (event.xdata - x0) * new_width / (x1 - x0)
+        left = min(max(left, lo), hi - new_width)
+        self.ax.set_xlim(left, left + new_width)
 
 
 class TimelineViewer(QMainWindow):
-    def __init__(self, trail_data):
+    def __init__(self, trail_data, proc_types=None):
         super().__init__()
         self.setWindowTitle("SPIN Process Timeline Viewer")
         self.resize(1500, 500)
@@ -57,23 +435,76 @@ class TimelineViewer(QMainWindow):
         main_widget = QWidget()
         main_layout = QVBoxLayout()
 
+        sim = load_sim_trace()
+        self.canvas = TimelineCanvas(trail_data, proc_types, sim)
+        self.toolbar = NavigationToolbar(self.canvas, self)
+        self.toolbar.addSeparator()
+        self.toolbar.addAction("Expand Groups", lambda: self.set_groups_expanded(True))
+        self.toolbar.addAction("Collapse Groups", lambda: self.set_groups_expanded(False))
+
+        # Scrolling pans the visible step window instead of a huge pre-rendered canvas
+        self.scrollbar = QScrollBar(Qt.Orientation.Horizontal)
+        self.scrollbar.valueChanged.connect(self.scroll_to)
+        self.canvas.ax.callbacks.connect("xlim_changed", lambda ax: self.sync_scrollbar())
+        self.sync_scrollbar()
 
-        canvas_container = QWidget()
-        canvas_layout = QVBoxLayout()
-        self.canvas = TimelineCanvas(trail_data)
-        self.canvas.setMinimumWidth(2000)  
-        canvas_layout.addWidget(self.canvas)
-        canvas_container.setLayout(canvas_layout)
+        self.replay = ReplayBar(self.canvas.columns, self.canvas.pml_lines)
+        self.replay.controller.frameChanged.connect(
+            lambda index: self.canvas.show_step(int(self.canvas.columns.step[index]))
+        )
 
-        
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setWidget(canvas_container)
+        # Variable values from the .isf are recorded by Sim depth. A spin -t replay of this trail numbers
+        # its depths like the trail's steps, so only then does the panel share the timeline's axis
+        timeline = load_var_timeline()
+        self.variables = None
+        if timeline is not None and len(timeline):
+            step_map = self.canvas.step_map
+            if step_map is not None and step_map.valid:
+                self.variables = VariablePanel(timeline, self.canvas.extent(), axis_label="Step")
+                self.variables.set_xlim(*self.canvas.ax.get_xlim())
+                self.canvas.ax.callbacks.connect("xlim_changed", lambda ax: self.variables.set_xlim(*ax.get_xlim()))
+                self.canvas.on_select = self.variables.set_step
+            else:
+                self.variables = VariablePanel(timeline)
+                self.variables.setToolTip("Not linked to the timeline: "
+                                          + (step_map.describe() if step_map is not None else "no Sim trace"))
+            self.toolbar.addAction("Variables", lambda: self.variables.setVisible(not self.variables.isVisible()))
 
-        main_layout.addWidget(scroll_area)
+        main_layout.addWidget(self.toolbar)
+        if self.variables is not None:
+            splitter = QSplitter(Qt.Orientation.Vertical)
+            splitter.addWidget(self.canvas)
+            splitter.addWidget(self.variables)
+            splitter.setSizes([500, 250])
+            main_layout.addWidget(splitter)
+            self.resize(1500, 750)
+        else:
+            main_layout.addWidget(self.canvas)
+        main_layout.addWidget(self.scrollbar)
+        main_layout.addWidget(self.replay)
         main_widget.setLayout(main_layout)
         self.setCentralWidget(main_widget)
 
+    def sync_scrollbar(self):
+        lo, hi = self.canvas.extent()
+        x0, x1 = self.canvas.ax.get_xlim()
+        width = int(round(x1 - x0))
+        self.scrollbar.blockSignals(True)
+        self.scrollbar.setRange(0, max(hi - lo - width, 0))
+        self.scrollbar.setPageStep(max(width, 1))
+        self.scrollbar.setSingleStep(max(width // 10, 1))
+        self.scrollbar.setValue(int(round(x0)) - lo)
+        self.scrollbar.blockSignals(False)
+
+    def set_groups_expanded(self, expanded):
+        self.canvas.row_layout.set_all_expanded(expanded)
+        self.canvas.relayout()
+
+    def scroll_to(self, value):
+        lo, _ = self.canvas.extent()
+        x0, x1 = self.canvas.ax.get_xlim()
+        self.canvas.ax.set_xlim(lo + value, lo + value + (x1 - x0))
+
 
 def load_trail_from_file(path: str):
     with open(path, "r") as f:
@@ -81,12 +512,21 @@ def load_trail_from_file(path: str):
     return data["trail"]
 
 
+def load_process_types(path: str):
+    spawn_tree = load_spawn_tree()
+    if spawn_tree:
+        return spawn_tree.proc_types
+    with open(path, "r") as f:
+        data = json.load(f)
+    return data.get("processes", {})
+
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
 
     try:
         trail_data = load_trail_from_file("output/parsed_data.json")
-        viewer = TimelineViewer(trail_data)
+        viewer = TimelineViewer(trail_data, load_process_types("output/parsed_data.json"))
         viewer.show()
         sys.exit(app.exec())
     except Exception as e:
@@ -0,0 +1,174 @@
+from PyQt6.QtWidgets import (
+    QApplication, QWidget, QHBoxLayout, QVBoxLayout, QLineEdit, QPushButton, QSpinBox, QLabel, QTableView, QHeaderView, QAbstractItemView
+)
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+from PyQt6.QtGui import QBrush, QColor, QFont
+import numpy as np
+
+SEARCH_DELAY_MS = 150
+
+
+class TraceModel(QAbstractListModel):
+    """Sim block lines served straight from a SimLineIndex; the view only asks for the rows on screen."""
+
+    FAILING = QBrush(QColor("#ffd6d6"))
+    ERROR = QBrush(QColor("#ff9999"))
+
+    def __init__(self, lines, failing_step=None, parent=None):
+        super().__init__(parent)
+        self.lines = lines
+        self.failing_step = failing_step
+        self.shown = None       # sorted line numbers when filtered, None for every line
+
+    def set_shown(self, shown):
+        self.beginResetModel()
+        self.shown = shown
+        self.endResetModel()
+
+    def line_of_row(self, row):
+        return int(self.shown[row]) if self.shown is not None else row
+
+    def row_of_line(self, line):
+        """Row showing `line`, or the next shown row after it when it is filtered out."""
+        if self.shown is None:
+            return line
+        return min(int(np.searchsorted(self.shown, line)), len(self.shown) - 1)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.shown) if self.shown is not None else len(self.lines)
+
+    def data(self, model_index, role=Qt.ItemDataRole.DisplayRole):
+        if not model_index.isValid():
+            return None
+        row = self.line_of_row(model_index.row())
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.lines.line(row)
+        if role == Qt.ItemDataRole.BackgroundRole:
+            line = self.lines.line(row)
+            if line.startswith("spin:") and "Error" in line:
+                return self.ERROR
+            if self.failing_step is not None and self.lines.depth(row) == self.failing_step:
+                return self.FAILING
+        return None
+
+
+class TraceViewer(QWidget):
+    """Virtualized Sim trace with incremental search and jump-to-step."""
+
+    def __init__(self, lines, failing_step=None, parent=None):
+        super().__init__(parent)
+        self.lines = lines
+        self.failing_step = failing_step
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+
+        controls = QHBoxLayout()
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search trace (Enter: next, Shift+Enter: previous)")
+        controls.addWidget(self.search_box, stretch=1)
+        prev_btn = QPushButton("Prev")
+        next_btn = QPushButton("Next")
+        controls.addWidget(prev_btn)
+        controls.addWidget(next_btn)
+
+        controls.addWidget(QLabel("Step:"))
+        self.step_box = QSpinBox()
+        self.step_box.setRange(0, 2 ** 31 - 1)
+        self.step_box.setKeyboardTracking(False)
+        controls.addWidget(self.step_box)
+        if failing_step is not None:
+            fail_btn = QPushButton("Failing Step")
+            fail_btn.clicked.connect(lambda: self.go_to_step(failing_step))
+            controls.addWidget(fail_btn)
+
+        self.status = QLabel(f"{len(lines)} lines")
+        controls.addWidget(self.status)
+        layout.addLayout(controls)
+
+        # Fixed-height table rows are placed by arithmetic; list and tree views visit every row to lay them out
+        self.view = QTableView()
+        self.view.setFont(QFont("Courier", 9))
+        self.view.setShowGrid(False)
+        self.view.setWordWrap(False)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.view.horizontalHeader().hide()
+        self.view.horizontalHeader().setStretchLastSection(True)
+        rows = self.view.verticalHeader()
+        rows.hide()
+        rows.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        rows.setDefaultSectionSize(self.view.fontMetrics().height() + 2)
+        self.model = TraceModel(lines, failing_step, self)
+        self.view.setModel(self.model)
+        layout.addWidget(self.view)
+
+        # Incremental search waits for a pause in typing instead of scanning on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(lambda: self.search(from_current=True))
+        self.search_box.textChanged.connect(lambda _: self.search_timer.start())
+        self.search_box.returnPressed.connect(self.on_return)
+        next_btn.clicked.connect(lambda: self.search())
+        prev_btn.clicked.connect(lambda: self.search(backwards=True))
+        self.step_box.valueChanged.connect(self.go_to_step)
+
+        if failing_step is not None:
+            QTimer.singleShot(0, lambda: self.go_to_step(failing_step))
+
+    def current_row(self):
+        """Sim block line of the current row."""
+        current = self.view.currentIndex()
+        return self.model.line_of_row(current.row()) if current.isValid() else 0
+
+    def set_filter(self, lines=None):
+        """Only show the given Sim block lines (sorted), keeping the current line in view."""
+        current = self.current_row()
+        self.model.set_shown(lines)
+        if self.model.rowCount():
+            self.select_row(current)
+
+    def select_row(self, line):
+        if not self.model.rowCount():
+            return
+        model_index = self.model.index(self.model.row_of_line(line), 0)
+        self.view.setCurrentIndex(model_index)
+        self.view.scrollTo(model_index, QAbstractItemView.ScrollHint.PositionAtCenter)
+
+    def on_return(self):
+        backwards = bool(QApplication.keyboardModifiers() & Qt.KeyboardModifier.ShiftModifier)
+        self.search(backwards=backwards)
+
+    def search(self, backwards=False, from_current=False):
+        self.search_timer.stop()
+        text = self.search_box.text()
+        if not text:
+            self.status.setText(f"{len(self.lines)} lines")
+            return
+        row = self.current_row()
+        start = row if from_current or backwards else row + 1
+        found = self.lines.find(text, start, backwards)
+        # With a filter on, step past matches on hidden lines (bounded by one full wrap-around)
+        seen = set()
+        while found is not None and self.model.shown is not None and found not in seen:
+            if self.model.line_of_row(self.model.row_of_line(found)) == found:
+                break
+            seen.add(found)
+            found = self.lines.find(text, found if backwards else found + 1, backwards)
+        if found is None or found in seen:
+            self.status.setText("No match")
+            return
+        self.status.setText(f"Line {found + 1} of {len(self.lines)}")
+        self.select_row(found)
+
+    def go_to_step(self, step):
+        if len(self.lines) == 0:
+            return
+        self.step_box.blockSignals(True)
+        self.step_box.setValue(int(step))
+        self.step_box.blockSignals(False)
+        self.select_row(self.lines.line_of_step(int(step)))
@@ -0,0 +1,279 @@
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from PyQt6.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QHeaderView, QAbstractItemView, QMessageBox
+)
+
+from channels import strip_source
+from pan_output import find_out_file, load_pan_output
+from parser_module import find_trail_files, parse_trail_file
+from sim_index import load_sim_trace
+from trail_model import SimStepMap, TrailColumns, load_pml_lines
+from trail_store import CLAIM_PID, TrailStore, normalize_steps
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARSED_DATA_PATH = os.path.join(BASE_DIR, "output", "parsed_data.json")
+TRAIL_STORE_PATH = os.path.join(BASE_DIR, "output", "trail_store.npz")
+# Below this much trail data, starting worker processes costs more than it saves
+PARALLEL_MIN_BYTES = 4 << 20
+END_STATE_ERRORS = ('invalid end state', 'deadlock')
+CYCLE_ERRORS = ('acceptance cycle', 'non-progress cycle', 'never_claim')
+
+
+def trail_key(path):
+    """Name of a trail file in the store: its path, size and mtime, so an edited trail is stored again."""
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def read_trail_steps(path):
+    """Normalised (pid, transition) steps and cycle start of one trail, sent back from a worker process."""
+    return normalize_steps(parse_trail_file(path))
+
+
+def load_trail_steps(paths):
+    """read_trail_steps for every path, on a process pool when there are several cores and enough to parse."""
+    workers = min(os.cpu_count() or 1, len(paths))
+    if workers > 1 and sum(os.path.getsize(p) for p in paths) >= PARALLEL_MIN_BYTES:
+        with ProcessPoolExecutor(workers) as pool:
+            return list(pool.map(read_trail_steps, paths, chunksize=max(len(paths) // (4 * workers), 1)))
+    return [read_trail_steps(path) for path in paths]
+
+
+def load_trail_store(paths, store_path=TRAIL_STORE_PATH):
+    """TrailStore of the trails in paths, named by trail_key: the saved store, with only the trails added
+    or changed since it was saved parsed and added to it."""
+    try:
+        store = TrailStore.load(store_path)
+    except (OSError, ValueError, KeyError):
+        store = TrailStore()
+    keys = [trail_key(path) for path in paths]
+    added = [(path, key) for path, key in zip(paths, keys) if key not in store.names]
+    for (path, key), (steps, cycle) in zip(added, load_trail_steps([path for path, _ in added])):
+        store.add_steps(steps, cycle, key)
+    stale = set(store.names) - set(keys)
+    if stale:
+        # Rebuild from the stored steps so removed or edited trails stop taking space
+        old, store = store, TrailStore()
+        for key in keys:
+            uid = old.names[key]
+            store.add_steps(old.get(uid), old.cycle[uid], key)
+    if added or stale:
+        try:
+            os.makedirs(os.path.dirname(store_path), exist_ok=True)
+            # np.savez appends .npz to names without it, so the temporary name keeps the extension
+            tmp_path = store_path[:-4] + ".tmp.npz"
+            store.save(tmp_path)
+            os.replace(tmp_path, store_path)
+        except OSError:
+            pass
+    return store, keys
+
+
+def summarize_steps(path, uid, steps, cycle):
+    """What clustering needs from one trail's normalised steps.
+
+    The second column is pan's transition id, not a PML line.
+    """
+    moves = steps[steps[:, 0] != CLAIM_PID]
+    cycle_moves = steps[cycle:][steps[cycle:, 0] != CLAIM_PID] if cycle is not None else moves[:0]
+    last_transition = {}
+    for pid, transition in moves.tolist():
+        last_transition[pid] = transition
+    return {
+        "path": path,
+        "unique": uid,
+        "steps": len(moves),
+        "last_transition": int(moves[-1, 1]) if len(moves) else None,
+        # Sorted ids rather than pid -> id, so runs that only number their processes differently match
+        "end_transitions": sorted(last_transition.values()),
+        "cycle_transitions": sorted(set(cycle_moves[:, 1].tolist())),
+    }
+
+
+class TrailCluster:
+    """Trails that failed the same way: same error type at the same location."""
+
+    def __init__(self, error_type, transitions):
+        self.error_type = error_type
+        self.transitions = transitions
+        self.trails = []
+
+    def __len__(self):
+        return len(self.trails)
+
+    @property
+    def representative(self):
+        # The shortest counterexample is the easiest one to read
+        return min(self.trails, key=lambda t: (t["steps"], t["path"]))
+
+    def location(self, pml_lines, transition_lines):
+        """(where, statement) of the failing transitions: PML lines and their source when every id
+        resolves through transition_lines, the bare transition ids otherwise."""
+        if not self.transitions:
+            return "unknown location", ""
+        if all(t in transition_lines for t in self.transitions):
+            lines = [transition_lines[t] for t in self.transitions]
+            unique = sorted(set(lines))
+            where = f"line {unique[0]}" if len(unique) == 1 else "lines " + ", ".join(str(n) for n in lines)
+            source = " | ".join(" ".join(strip_source(pml_lines[n - 1]).split())
+                                for n in unique if 0 < n <= len(pml_lines))
+            return where, source
+        unique = sorted(set(self.transitions))
+        if len(unique) == 1:
+            return f"transition {unique[0]}", ""
+        return "transitions " + ", ".join(str(t) for t in self.transitions), ""
+
+
+def trail_error_types(result, paths):
+    """Error type of each trail, from the order pan reported errors and wrote trails in."""
+    by_name = {}
+    for name, index in zip(result.trail_files, result.trail_errors):
+        if index is not None:
+            by_name[os.path.basename(name)] = result.errors[index]["type"]
+    # A single error in the .out belongs to every trail
+    default = result.errors[0]["type"] if len({e["type"] for e in result.errors}) == 1 else "unknown"
+    return [by_name.get(os.path.basename(p), default) for p in paths]
+
+
+def cluster_trails(summaries, error_types):
+    """Group trails by error type and failing location, largest failure mode first.
+
+    Safety violations fail at the last step; deadlocks and invalid end states at the transitions every
+    process ended on; liveness violations at the transitions of their cycle.
+    """
+    clusters = {}
+    for summary, error_type in zip(summaries, error_types):
+        if error_type in END_STATE_ERRORS:
+            transitions = tuple(summary["end_transitions"])
+        elif error_type in CYCLE_ERRORS and summary["cycle_transitions"]:
+            transitions = tuple(summary["cycle_transitions"])
+        else:
+            last = summary["last_transition"]
+            transitions = (last,) if last is not None else ()
+        key = (error_type, transitions)
+        if key not in clusters:
+            clusters[key] = TrailCluster(error_type, transitions)
+        clusters[key].trails.append(summary)
+    return sorted(clusters.values(), key=lambda c: (-len(c), c.error_type, c.transitions))
+
+
+def replay_transition_lines(sim, trails):
+    """Transition id -> PML line, learned from whichever of the trails the Sim trace is a spin -t replay of.
+
+    Transition ids belong to the model, so one replayed trail resolves them for every trail of the run.
+    """
+    lines = {}
+    if sim is None or not len(sim):
+        return lines
+    for trail in trails:
+        step_map = SimStepMap(TrailColumns(trail), sim)
+        if step_map.valid:
+            lines.update(step_map.transition_lines())
+    return lines
+
+
+def use_trail(path, out_path=PARSED_DATA_PATH):
+    """Make `path` the trail the other modules show, keeping the errors and processes already parsed."""
+    data = {}
+    if os.path.exists(out_path):
+        with open(out_path, "r") as f:
+            data = json.load(f)
+    data["trail"] = parse_trail_file(path)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+class TrailClusterView(QWidget):
+    COLUMNS = ("Error", "Location", "Statement", "Trails", "Shortest (steps)", "Representative")
+
+    def __init__(self, data_dir):
+        super().__init__()
+        self.setWindowTitle("SPIN Failure Modes")
+        self.resize(1000, 500)
+
+        paths = find_trail_files(data_dir) if os.path.isdir(data_dir) else []
+        out_file = find_out_file(data_dir)
+        result = load_pan_output(out_file) if out_file else None
+        # Copies of one counterexample (up to pid renumbering) are stored once, the rest as deltas
+        self.store, keys = load_trail_store(paths)
+        summaries = []
+        for path, key in zip(paths, keys):
+            uid = self.store.names[key]
+            summaries.append(summarize_steps(path, uid, self.store.get(uid), self.store.cycle[uid]))
+        error_types = trail_error_types(result, paths) if result else ["unknown"] * len(paths)
+        self.clusters = cluster_trails(summaries, error_types)
+        pml_lines = load_pml_lines(data_dir)
+        transition_lines = replay_transition_lines(load_sim_trace(data_dir), self.candidate_trails())
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"{self.store.describe()}\n{len(self.clusters)} distinct failure mode(s)"))
+
+        self.table = QTableWidget(len(self.clusters), len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        for row, cluster in enumerate(self.clusters):
+            where, source = cluster.location(pml_lines, transition_lines)
+            rep = cluster.representative
+            members = "\n".join(os.path.basename(t["path"]) for t in cluster.trails)
+            unique = len({t["unique"] for t in cluster.trails})
+            cells = (cluster.error_type, where, source, f"{len(cluster)} ({unique} unique)", str(rep["steps"]),
+                     os.path.basename(rep["path"]))
+            for col, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                item.setToolTip(members if col == 3 else text)
+                self.table.setItem(row, col, item)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        self.table.resizeColumnsToContents()
+        self.table.cellDoubleClicked.connect(lambda row, _: self.load_representative(row))
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        load_btn = QPushButton("Load Representative Trail")
+        load_btn.clicked.connect(lambda: self.load_representative(self.table.currentRow()))
+        buttons.addStretch(1)
+        buttons.addWidget(load_btn)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def candidate_trails(self):
+        """The current trail, which the Sim was most likely replayed from, then each cluster's representative."""
+        if os.path.exists(PARSED_DATA_PATH):
+            try:
+                with open(PARSED_DATA_PATH, "r") as f:
+                    yield json.load(f).get("trail", [])
+            except (OSError, ValueError):
+                pass
+        for cluster in self.clusters:
+            yield parse_trail_file(cluster.representative["path"])
+
+    def load_representative(self, row):
+        if not 0 <= row < len(self.clusters):
+            return
+        path = self.clusters[row].representative["path"]
+        try:
+            use_trail(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Could not load {path}:\n{e}")
+            return
+        QMessageBox.information(self, "Trail Loaded",
+                                f"{os.path.basename(path)} is now the current trail: open the Visualizer, "
+                                f"Timeline or 3D State Graph to explore it.")
+
+
+def main():
+    app = QApplication(sys.argv)
+    view = TrailClusterView(os.path.join(os.getcwd(), "data"))
+    view.show()
+    sys.exit(app.exec())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import numpy as np
+
+EQUAL, DELETE, INSERT, REPLACE = 0, 1, 2, 3
+KIND_NAMES = {EQUAL: 'equal', DELETE: 'removed', INSERT: 'inserted', REPLACE: 'changed'}
+# Edit distance past which a region is reported as replaced instead of diffed step by step
+MAX_EDIT_COST = 2000
+SHORT_RUN = 16
+
+
+def trail_tokens(old, new):
+    """Integer token per step of both trails; equal tokens mean equal (pid, transition id).
+
+    The third field of a trail step is pan's transition id, not a PML line, so steps are compared on
+    what the trail itself records.
+    """
+    ids = {}
+
+    def tokens(trail):
+        out = np.empty(len(trail), dtype=np.int64)
+        for i, e in enumerate(trail):
+            out[i] = ids.setdefault((e["proc_id"], e["line"]), len(ids))
+        return out
+
+    return tokens(old), tokens(new)
+
+
+class Matcher:
+    """Shortest edit script between two token arrays: Myers' O((N+M)D) algorithm in its linear-space
+    form, recursing on the middle snake (an explicit stack, so 1M-step trails do not hit Python's
+    recursion limit). Common prefixes and suffixes are stripped with numpy before every split, and long
+    runs of equal steps are compared a chunk at a time.
+    """
+
+    def __init__(self, a, b, max_cost=MAX_EDIT_COST):
+        self.a, self.b = np.asarray(a), np.asarray(b)
+        self.ra, self.rb = self.a[::-1].copy(), self.b[::-1].copy()
+        self.al, self.bl = self.a.tolist(), self.b.tolist()
+        self.ral, self.rbl = self.al[::-1], self.bl[::-1]
+        self.max_cost = max_cost
+
+    def run_length(self, reverse, i, j, n):
+        """Length of the common run starting at a[i], b[j] (of the reversed arrays when `reverse`), at most n."""
+        xl, yl = (self.ral, self.rbl) if reverse else (self.al, self.bl)
+        k = 0
+        limit = min(n, SHORT_RUN)
+        while k < limit:
+            if xl[i + k] != yl[j + k]:
+                return k
+            k += 1
+        x, y = (self.ra, self.rb) if reverse else (self.a, self.b)
+        step = 256
+        while k < n:
+            m = min(step, n - k)
+            neq = np.flatnonzero(x[i + k:i + k + m] != y[j + k:j + k + m])
+            if len(neq):
+                return k + int(neq[0])
+            k += m
+            step *= 4
+        return k
+
+    def middle_snake(self, a0, a1, b0, b1):
+        """(D, x, y, u, v): the snake from (x, y) to (u, v), relative to (a0, b0), that an optimal path
+        of D edits passes through the middle of; None when D exceeds max_cost."""
+        N, M = a1 - a0, b1 - b0
+        L = N + M
+        Z = 2 * min(N, M) + 2
+        w = N - M
+        forward, backward = [0] * Z, [0] * Z
+        ra0, rb0 = len(self.a) - a1, len(self.b) - b1
+        for h in range(0, L // 2 + (L % 2) + 1):
+            if 2 * h > self.max_cost:
+                return None
+            for o in (1, 0):
+                c, d = (forward, backward) if o else (backward, forward)
+                x0, y0 = (a0, b0) if o else (ra0, rb0)
+                for k in range(-(h - 2 * max(0, h - M)), h - 2 * max(0, h - N) + 1, 2):
+                    if k == -h or (k != h and c[(k - 1) % Z] < c[(k + 1) % Z]):
+                        x = c[(k + 1) % Z]
+                    else:
+                        x = c[(k - 1) % Z] + 1
+                    y = x - k
+                    s, t = x, y
+                    if x < N and y < M:
+                        n = self.run_length(not o, x0 + x, y0 + y, min(N - x, M - y))
+                        x, y = x + n, y + n
+                    c[k % Z] = x
+                    z = w - k
+                    if L % 2 == o and -(h - o) <= z <= h - o and x + d[z % Z] >= N:
+                        if o:
+                            return 2 * h - 1, s, t, x, y
+                        return 2 * h, N - x, M - y, N - s, M - t
+        return None
+
+    def edits(self):
+        """Sorted (kind, a0, a1, b0, b1) of every non-equal region."""
+        out = []
+        stack = [(0, len(self.a), 0, len(self.b))]
+        while stack:
+            a0, a1, b0, b1 = stack.pop()
+            n = self.run_length(False, a0, b0, min(a1 - a0, b1 - b0))
+            a0, b0 = a0 + n, b0 + n
+            n = self.run_length(True, len(self.a) - a1, len(self.b) - b1, min(a1 - a0, b1 - b0))
+            a1, b1 = a1 - n, b1 - n
+            if a0 == a1 and b0 == b1:
+                continue
+            if a0 == a1:
+                out.append((INSERT, a0, a1, b0, b1))
+                continue
+            if b0 == b1:
+                out.append((DELETE, a0, a1, b0, b1))
+                continue
+            snake = self.middle_snake(a0, a1, b0, b1)
+            if snake is None:
+                out.append((REPLACE, a0, a1, b0, b1))
+                continue
+            D, x, y, u, v = snake
+            if D > 1 or (x != u and y != v):
+                stack.append((a0 + u, a1, b0 + v, b1))
+                stack.append((a0, a0 + x, b0, b0 + y))
+            elif b1 - b0 > a1 - a0:
+                out.append((INSERT, a1, a1, b0 + (a1 - a0), b1))
+            elif b1 - b0 < a1 - a0:
+                out.append((DELETE, a0 + (b1 - b0), a1, b1, b1))
+        out.sort(key=lambda e: (e[1], e[3]))
+        return merge_edits(out)
+
+
+def merge_edits(edits):
+    """Join touching edits, so a removal right next to an insertion reads as one changed segment."""
+    merged = []
+    for kind, a0, a1, b0, b1 in edits:
+        if merged and merged[-1][2] == a0 and merged[-1][4] == b0:
+            _, pa0, _, pb0, _ = merged[-1]
+            merged[-1] = (REPLACE if (a1 > pa0 and b1 > pb0) else kind, pa0, a1, pb0, b1)
+        else:
+            merged.append((REPLACE if a1 > a0 and b1 > b0 else kind, a0, a1, b0, b1))
+    return merged
+
+
+class TrailDiff:
+    """Two trails aligned row by row: old index, new index (-1 where a side has no step) and row kind."""
+
+    def __init__(self, old, new, max_cost=MAX_EDIT_COST):
+        self.old, self.new = old, new
+        a, b = trail_tokens(old, new)
+        self.edits = Matcher(a, b, max_cost).edits()
+
+        old_idx, new_idx, kinds = [], [], []
+        ai = bi = 0
+        for kind, a0, a1, b0, b1 in self.edits:
+            # The equal run before the edit
+            n = a0 - ai
+            old_idx.append(np.arange(ai, a0))
+            new_idx.append(np.arange(bi, bi + n))
+            kinds.append(np.full(n, EQUAL, dtype=np.int8))
+            rows = max(a1 - a0, b1 - b0)
+            old_part = np.full(rows, -1, dtype=np.int64)
+            new_part = np.full(rows, -1, dtype=np.int64)
+            old_part[:a1 - a0] = np.arange(a0, a1)
+            new_part[:b1 - b0] = np.arange(b0, b1)
+            old_idx.append(old_part)
+            new_idx.append(new_part)
+            kinds.append(np.full(rows, kind, dtype=np.int8))
+            ai, bi = a1, b1
+        old_idx.append(np.arange(ai, len(a)))
+        new_idx.append(np.arange(bi, len(b)))
+        kinds.append(np.full(len(a) - ai, EQUAL, dtype=np.int8))
+        self.old_index = np.concatenate(old_idx).astype(np.int64)
+        self.new_index = np.concatenate(new_idx).astype(np.int64)
+        self.kind = np.concatenate(kinds)
+
+        changed = np.flatnonzero(self.kind != EQUAL)
+        self.first_divergence = int(changed[0]) if len(changed) else None
+
+    def __len__(self):
+        return len(self.kind)
+
+    def segments(self):
+        """(kind, first row, last row + 1) of every non-equal region, in row order."""
+        edges = np.flatnonzero(np.diff(self.kind, prepend=-1, append=-1))
+        return [(int(self.kind[s]), int(s), int(e)) for s, e in zip(edges[:-1], edges[1:]) if self.kind[s] != EQUAL]
+
+    def describe(self):
+        if self.first_divergence is None:
+            return f"The trails are identical ({len(self.old)} steps)."
+        row = self.first_divergence
+        old_i, new_i = self.old_index[row], self.new_index[row]
+        where = []
+        if old_i >= 0:
+            where.append(f"old step {self.old[old_i]['step']}")
+        if new_i >= 0:
+            where.append(f"new step {self.new[new_i]['step']}")
+        counts = {}
+        for kind, s, e in self.segments():
+            n, steps = counts.get(kind, (0, 0))
+            counts[kind] = (n + 1, steps + e - s)
+        parts = [f"{n} {KIND_NAMES[kind]} segment(s) ({steps} rows)" for kind, (n, steps) in sorted(counts.items())]
+        return (f"First divergence after {row} common steps, at {' / '.join(where)}. "
+                + ", ".join(parts) + f". Old trail {len(self.old)} steps, new trail {len(self.new)} steps.")
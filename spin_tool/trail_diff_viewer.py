@@ -0,0 +1,211 @@
+import argparse
+import os
+import sys
+
+from PyQt6.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView,
+    QHeaderView, QAbstractItemView, QFileDialog, QSplitter
+)
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QBrush, QColor, QFont
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+import numpy as np
+
+from channels import strip_source
+from parser_module import find_trail_files, parse_trail_file
+from sim_index import load_sim_trace
+from trail_diff import DELETE, INSERT, KIND_NAMES, REPLACE, TrailDiff
+from trail_model import SimStepMap, TrailColumns, load_pml_lines
+
+KIND_COLORS = {DELETE: "#f4a6a6", INSERT: "#a8e0a8", REPLACE: "#f7d98b"}
+
+
+class DiffModel(QAbstractTableModel):
+    """Aligned rows of a TrailDiff, served on demand so million-step diffs scroll freely.
+
+    Statements are shown for steps of the new trail whose transition id resolves to a PML line
+    through transition_lines; the old trail may come from another model, whose ids differ.
+    """
+
+    COLUMNS = ("Old step", "Old proc", "Old transition", "New step", "New proc", "New transition", "Statement")
+    BRUSHES = {kind: QBrush(QColor(color)) for kind, color in KIND_COLORS.items()}
+
+    def __init__(self, diff, pml_lines, transition_lines, parent=None):
+        super().__init__(parent)
+        self.diff = diff
+        self.pml_lines = pml_lines
+        self.transition_lines = transition_lines
+        self.bold = QFont()
+        self.bold.setBold(True)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.diff)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            old_i, new_i = self.diff.old_index[row], self.diff.new_index[row]
+            if col < 3:
+                step = self.diff.old[old_i] if old_i >= 0 else None
+            elif col < 6:
+                step = self.diff.new[new_i] if new_i >= 0 else None
+            else:
+                line = self.transition_lines.get(self.diff.new[new_i]["line"], 0) if new_i >= 0 else 0
+                return strip_source(self.pml_lines[line - 1]).strip() if 0 < line <= len(self.pml_lines) else ""
+            if step is None:
+                return ""
+            return str((step["step"], step["proc_id"], step["line"])[col % 3])
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return self.BRUSHES.get(int(self.diff.kind[row]))
+        if role == Qt.ItemDataRole.FontRole and row == self.diff.first_divergence:
+            return self.bold
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return KIND_NAMES[int(self.diff.kind[row])]
+        return None
+
+
+class DiffTimeline(FigureCanvas):
+    """Old and new trail as two strips over the aligned rows, with every changed segment coloured."""
+
+    def __init__(self, diff, on_row=None):
+        self.fig = Figure(figsize=(9, 1.6))
+        super().__init__(self.fig)
+        self.setFixedHeight(150)
+        self.on_row = on_row
+        ax = self.ax = self.fig.add_subplot(111)
+        n = max(len(diff), 1)
+        ax.broken_barh([(0, n)], (0.6, 0.8), color="#e6e6e6")
+        ax.broken_barh([(0, n)], (1.6, 0.8), color="#e6e6e6")
+        spans = {kind: [] for kind in KIND_COLORS}
+        for kind, start, end in diff.segments():
+            spans[kind].append((start, end - start))
+        # Removed steps exist only in the old trail, inserted ones only in the new one
+        ax.broken_barh(spans[DELETE], (1.6, 0.8), color=KIND_COLORS[DELETE])
+        ax.broken_barh(spans[INSERT], (0.6, 0.8), color=KIND_COLORS[INSERT])
+        for y in (0.6, 1.6):
+            ax.broken_barh(spans[REPLACE], (y, 0.8), color=KIND_COLORS[REPLACE])
+        if diff.first_divergence is not None:
+            ax.axvline(diff.first_divergence, color="#c23321", linewidth=1.2)
+        ax.set_xlim(0, n)
+        ax.set_ylim(0.4, 2.6)
+        ax.set_yticks([1, 2], ["new", "old"])
+        ax.set_xlabel("Aligned step", fontsize=8)
+        ax.tick_params(labelsize=8)
+        self.fig.tight_layout()
+        self.mpl_connect("button_press_event", self.clicked)
+
+    def clicked(self, event):
+        if event.inaxes is self.ax and event.xdata is not None and self.on_row:
+            self.on_row(int(event.xdata))
+
+
+class TrailDiffViewer(QWidget):
+    def __init__(self, diff, pml_lines, transition_lines, old_name, new_name):
+        super().__init__()
+        self.setWindowTitle(f"Trail Diff: {old_name} → {new_name}")
+        self.resize(1100, 750)
+        self.diff = diff
+        self.starts = np.array([start for _, start, _ in diff.segments()], dtype=np.int64)
+
+        layout = QVBoxLayout()
+        summary = QLabel(diff.describe() + ("" if transition_lines else
+                         " Statements need a Sim trace that is a spin -t replay of the new trail."))
+        summary.setWordWrap(True)
+        layout.addWidget(summary)
+
+        controls = QHBoxLayout()
+        first_btn = QPushButton("First Divergence")
+        first_btn.clicked.connect(lambda: self.show_row(diff.first_divergence))
+        prev_btn = QPushButton("Previous Change")
+        prev_btn.clicked.connect(lambda: self.jump(-1))
+        next_btn = QPushButton("Next Change")
+        next_btn.clicked.connect(lambda: self.jump(1))
+        for btn in (first_btn, prev_btn, next_btn):
+            btn.setEnabled(diff.first_divergence is not None)
+            controls.addWidget(btn)
+        controls.addStretch(1)
+        for kind in (DELETE, INSERT, REPLACE):
+            legend = QLabel(f" {KIND_NAMES[kind]} ")
+            legend.setStyleSheet(f"background-color: {KIND_COLORS[kind]};")
+            controls.addWidget(legend)
+        layout.addLayout(controls)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.timeline = DiffTimeline(diff, self.show_row)
+        splitter.addWidget(self.timeline)
+        self.table = QTableView()
+        self.table.setModel(DiffModel(diff, pml_lines, transition_lines, self))
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        self.table.horizontalHeader().setSectionResizeMode(6, QHeaderView.ResizeMode.Stretch)
+        splitter.addWidget(self.table)
+        layout.addWidget(splitter)
+        self.setLayout(layout)
+
+        if diff.first_divergence is not None:
+            self.show_row(diff.first_divergence)
+
+    def show_row(self, row):
+        if row is None or not len(self.diff):
+            return
+        row = min(max(row, 0), len(self.diff) - 1)
+        index = self.table.model().index(row, 0)
+        self.table.selectRow(row)
+        self.table.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+
+    def jump(self, direction):
+        if not len(self.starts):
+            return
+        current = self.table.currentIndex().row()
+        if direction > 0:
+            k = int(np.searchsorted(self.starts, current, side='right'))
+            row = self.starts[min(k, len(self.starts) - 1)]
+        else:
+            k = int(np.searchsorted(self.starts, current, side='left')) - 1
+            row = self.starts[max(k, 0)]
+        self.show_row(int(row))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("old", nargs="?", help="trail to compare against (asked for when omitted)")
+    parser.add_argument("new", nargs="?", help="new trail (default: the first trail in data/)")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    data_dir = os.path.join(os.getcwd(), "data")
+    new_path = args.new
+    if new_path is None:
+        trails = find_trail_files(data_dir) if os.path.isdir(data_dir) else []
+        new_path = trails[0] if trails else None
+    old_path = args.old or QFileDialog.getOpenFileName(None, "Select the Trail to Compare Against", "",
+                                                       "Trail Files (*.trail)")[0]
+    if not old_path or not new_path:
+        print("Two trails are needed: the one in data/ and one to compare it with.")
+        return 1
+
+    new = parse_trail_file(new_path)
+    diff = TrailDiff(parse_trail_file(old_path), new)
+    # Transition ids only name PML lines through a Sim replay of the new trail
+    sim = load_sim_trace(data_dir)
+    step_map = SimStepMap(TrailColumns(new), sim) if sim is not None and len(sim) else None
+    transition_lines = step_map.transition_lines() if step_map is not None else {}
+    viewer = TrailDiffViewer(diff, load_pml_lines(data_dir), transition_lines, os.path.basename(old_path),
+                             os.path.basename(new_path))
+    viewer.show()
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
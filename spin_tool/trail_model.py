@@ -0,0 +1,383 @@
+import os
+
+import numpy as np
+
+
+def load_pml_lines(data_dir="data"):
+    if not os.path.isdir(data_dir):
+        return []
+    for filename in os.listdir(data_dir):
+        if filename.endswith(".pml"):
+            with open(os.path.join(data_dir, filename), "r", encoding="utf-8") as f:
+                return f.readlines()
+    return []
+
+
+class TrailColumns:
+    """Column-oriented copy of the parsed trail (one numpy array per field)."""
+
+    def __init__(self, trail_data):
+        trail_data = sorted(trail_data, key=lambda e: e["step"])
+        n = len(trail_data)
+        self.step = np.fromiter((e["step"] for e in trail_data), dtype=np.int64, count=n)
+        self.proc_id = np.fromiter((e["proc_id"] for e in trail_data), dtype=np.int64, count=n)
+        # The trail's third field is pan's transition id (kept under "line" in the parsed JSON); the PML
+        # line of a step is only known once a Sim replay of the trail resolves it (-1 until then)
+        self.transition = np.fromiter((e["line"] for e in trail_data), dtype=np.int64, count=n)
+        self.line = np.full(n, -1, dtype=np.int64)
+        # Never claim moves, and the loop of a liveness counterexample (a suffix of the trail)
+        self.claim = np.fromiter((e.get("claim", False) for e in trail_data), dtype=bool, count=n)
+        self.cycle = np.fromiter((e.get("cycle", False) for e in trail_data), dtype=bool, count=n)
+        self.claim_pids = set(self.proc_id[self.claim].tolist())
+
+        # Rows are numbered in order of first appearance, like the original timeline
+        self.proc_names = []
+        self.row_pid = []
+        row_of = {}
+        rows = np.empty(n, dtype=np.int32)
+        for i, e in enumerate(trail_data):
+            name = e["proc_name"]
+            if name not in row_of:
+                row_of[name] = len(self.proc_names)
+                self.proc_names.append(name)
+                self.row_pid.append(e["proc_id"])
+            rows[i] = row_of[name]
+        self.row = rows
+
+    def __len__(self):
+        return len(self.step)
+
+    @property
+    def cycle_start(self):
+        """Index of the first step of the loop, None when the trail is not a lasso."""
+        if not self.cycle.any():
+            return None
+        return int(np.argmax(self.cycle))
+
+    def window(self, step0, step1):
+        """Index range of the steps falling inside [step0, step1)."""
+        return np.searchsorted(self.step, step0), np.searchsorted(self.step, step1)
+
+    def location(self, i):
+        """"L<line>" for a step whose PML line is known, else "t<transition id>"."""
+        line = int(self.line[i])
+        return f"L{line}" if line >= 0 else f"t{int(self.transition[i])}"
+
+    def span_location(self, first, last):
+        if self.line[first] >= 0 and self.line[last] >= 0:
+            a, b, prefix = int(self.line[first]), int(self.line[last]), "L"
+        else:
+            a, b, prefix = int(self.transition[first]), int(self.transition[last]), "t"
+        return f"{prefix}{a}" if a == b else f"{prefix}{a}-{b}"
+
+
+class RowSpans:
+    """Run-length encoded steps of one process row."""
+
+    def __init__(self, start, length, first, last):
+        self.start = start      # step where the span begins
+        self.length = length    # number of consecutive steps covered
+        self.first = first      # index into TrailColumns of the first step
+        self.last = last        # index into TrailColumns of the last step
+        self.end = start + length
+
+    def __len__(self):
+        return len(self.start)
+
+    def window(self, step0, step1):
+        """Index range of the spans overlapping [step0, step1)."""
+        return np.searchsorted(self.end, step0, side="right"), np.searchsorted(self.start, step1)
+
+
+def process_spans(columns):
+    """Merge consecutive steps of the same process into spans, one RowSpans per row."""
+    n = len(columns)
+    if n == 0:
+        return []
+
+    order = np.lexsort((columns.step, columns.row))
+    rows = columns.row[order]
+    steps = columns.step[order]
+
+    breaks = np.ones(n, dtype=bool)
+    breaks[1:] = (rows[1:] != rows[:-1]) | (steps[1:] != steps[:-1] + 1)
+    heads = np.flatnonzero(breaks)
+    tails = np.append(heads[1:], n) - 1
+
+    span_rows = rows[heads]
+    spans = []
+    bounds = np.searchsorted(span_rows, np.arange(len(columns.proc_names) + 1))
+    for r in range(len(columns.proc_names)):
+        lo, hi = bounds[r], bounds[r + 1]
+        h, t = heads[lo:hi], tails[lo:hi]
+        spans.append(RowSpans(
+            start=steps[h],
+            length=steps[t] - steps[h] + 1,
+            first=order[h],
+            last=order[t],
+        ))
+    return spans
+
+
+def step_span_index(columns, spans):
+    """For every step, the index of the span containing it within its own row."""
+    index = np.empty(len(columns), dtype=np.int64)
+    if len(columns) == 0:
+        return index
+    order = np.lexsort((columns.step, columns.row))
+    index[order] = np.concatenate([np.repeat(np.arange(len(s)), s.length) for s in spans])
+    return index
+
+
+def step_at(columns, step_x):
+    """Index of the step covering x coordinate step_x, or None."""
+    if len(columns) == 0:
+        return None
+    step = int(np.floor(step_x))
+    i = int(np.searchsorted(columns.step, step))
+    if i >= len(columns) or columns.step[i] != step:
+        return None
+    return i
+
+
+def group_processes(row_pids, proc_types, claim_pids=()):
+    """Group rows by the proctype recorded in the Sim "creates proc" events, in order of first appearance."""
+    groups = {}
+    for row, pid in enumerate(row_pids):
+        if pid in claim_pids:
+            proctype = "never claim"
+        else:
+            proctype = proc_types.get(pid) or proc_types.get(str(pid)) or f"proc_{pid}"
+        groups.setdefault(proctype, []).append(row)
+    return list(groups.items())
+
+
+class RowLayout:
+    """Display rows of a timeline: processes, with proctypes of several instances folded into group rows."""
+
+    def __init__(self, row_pids, proc_types, collapse_above=10, claim_pids=()):
+        self.groups = group_processes(row_pids, proc_types, claim_pids)
+        self.expanded = set()
+        if len(row_pids) <= collapse_above:
+            self.expanded = {g for g, (_, rows) in enumerate(self.groups) if len(rows) > 1}
+        self.row_pids = row_pids
+        self.group_of_row = np.empty(len(row_pids), dtype=np.int64)
+        self.member_of_row = np.empty(len(row_pids), dtype=np.int64)
+        for g, (_, rows) in enumerate(self.groups):
+            self.group_of_row[rows] = g
+            self.member_of_row[rows] = np.arange(len(rows))
+        self.rebuild()
+
+    def rebuild(self):
+        # Each entry: (kind, group index, member rows); kind is "group" for an aggregate row
+        self.entries = []
+        for g, (name, rows) in enumerate(self.groups):
+            if len(rows) == 1:
+                self.entries.append(("row", g, rows))
+                continue
+            self.entries.append(("group", g, rows))
+            if g in self.expanded:
+                self.entries.extend(("row", g, [r]) for r in rows)
+
+        # Display position of every process row: its own row if shown, else its collapsed group row
+        self.y_of_row = np.empty(len(self.row_pids), dtype=np.int64)
+        for y, (kind, g, rows) in enumerate(self.entries):
+            if kind == "row" or g not in self.expanded:
+                self.y_of_row[rows] = y
+
+    def __len__(self):
+        return len(self.entries)
+
+    def toggle(self, y):
+        kind, g, _ = self.entries[y]
+        if kind != "group":
+            return False
+        self.expanded ^= {g}
+        self.rebuild()
+        return True
+
+    def set_all_expanded(self, expanded):
+        self.expanded = {g for g, (_, rows) in enumerate(self.groups) if len(rows) > 1} if expanded else set()
+        self.rebuild()
+
+    def label(self, y, proc_names):
+        kind, g, rows = self.entries[y]
+        name = self.groups[g][0]
+        if kind == "group":
+            arrow = "\u25be" if g in self.expanded else "\u25b8"
+            return f"{arrow} {name} ({len(rows)})"
+        indent = "    " if len(self.groups[g][1]) > 1 else ""
+        return f"{indent}{proc_names[rows[0]]}"
+
+    def member_index(self, y):
+        """Position of a process row inside its group, used to shade colours within a group."""
+        kind, g, rows = self.entries[y]
+        return 0 if kind == "group" else int(self.member_of_row[rows[0]])
+
+    def shows(self, y, row):
+        kind, g, rows = self.entries[y]
+        return rows[0] == row if kind == "row" else self.group_of_row[row] == g
+
+
+class BinPyramid:
+    """Per-row step counts binned at doubling widths, built once per trail for zoomed-out views."""
+
+    def __init__(self, columns, base_width=16, min_bins=64):
+        self.origin = int(columns.step[0]) if len(columns) else 0
+        self.levels = []    # (bin width in steps, counts array of shape rows x bins)
+
+        n_rows = len(columns.proc_names)
+        if len(columns) == 0:
+            return
+
+        width = base_width
+        n_bins = int((columns.step[-1] - self.origin) // width) + 1
+        flat = columns.row.astype(np.int64) * n_bins + (columns.step - self.origin) // width
+        counts = np.bincount(flat, minlength=n_rows * n_bins).reshape(n_rows, n_bins).astype(np.int32)
+
+        while True:
+            self.levels.append((width, counts))
+            if counts.shape[1] <= min_bins:
+                break
+            if counts.shape[1] % 2:
+                counts = np.pad(counts, ((0, 0), (0, 1)))
+            counts = counts[:, 0::2] + counts[:, 1::2]
+            width *= 2
+
+    def level_for(self, steps_per_px):
+        """Coarsest level whose bins are still at least one pixel wide."""
+        chosen = self.levels[0]
+        for level in self.levels:
+            if level[0] > steps_per_px:
+                break
+            chosen = level
+        return chosen
+
+    def window(self, level, step0, step1):
+        """Slice of a level covering [step0, step1), returned with the step where it starts."""
+        width, counts = level
+        lo = max(int((step0 - self.origin) // width), 0)
+        hi = min(int((step1 - self.origin) // width) + 1, counts.shape[1])
+        return self.origin + lo * width, counts[:, lo:hi]
+
+
+class ReplayFrames:
+    """Location of every process at every step, so a replay can jump to any step without re-running it.
+
+    The full steps x processes matrix is kept when it fits in max_cells; otherwise only every
+    keyframe_every-th row is stored and a seek applies at most that many steps on top of it.
+    """
+
+    def __init__(self, columns, max_cells=10_000_000, keyframe_every=256):
+        self.columns = columns
+        n, p = len(columns), len(columns.proc_names)
+        self.stride = 1 if n * p <= max_cells else keyframe_every
+
+        # Forward-fill each process's last executed step down the step axis (-1 = not started yet)
+        keep = np.arange(0, n, self.stride)
+        if self.stride == 1:
+            latest = np.full((n, p), -1, dtype=np.int32)
+            latest[np.arange(n), columns.row] = np.arange(n)
+            np.maximum.accumulate(latest, axis=0, out=latest)
+            self.keyframes = latest
+        else:
+            self.keyframes = np.empty((len(keep), p), dtype=np.int32)
+            current = np.full(p, -1, dtype=np.int32)
+            for k, start in enumerate(keep):
+                current[columns.row[start]] = start
+                self.keyframes[k] = current
+                # Carry the state over the block up to the next keyframe
+                stop = min(start + self.stride, n)
+                np.maximum.at(current, columns.row[start + 1:stop], np.arange(start + 1, stop, dtype=np.int32))
+
+    def __len__(self):
+        return len(self.columns)
+
+    def locations(self, index):
+        """Index of the last step each process executed up to step `index` (-1 if it has not run yet)."""
+        base = index // self.stride
+        frame = self.keyframes[base].copy()
+        # Empty when every step is a keyframe
+        for i in range(base * self.stride + 1, index + 1):
+            frame[self.columns.row[i]] = i
+        return frame
+
+
+
+# Share of a trail's steps the Sim must reproduce for it to count as a replay of that trail
+MIN_REPLAY_MATCH = 0.9
+
+
+class SimStepMap:
+    """Trail steps matched to the Sim actions of a `spin -t` replay of that same trail.
+
+    The trail's third field is pan's transition id, not a source line, so nothing in the trail alone
+    says where a step is in the model. A replay numbers its steps with the trail's own depths: trail
+    step k is the Sim action at depth k by the same pid, which also gives the step's PML line. When
+    too few steps find their action the Sim is not a replay of this trail, `valid` is False and steps
+    must not be translated either way.
+    """
+
+    def __init__(self, columns, sim):
+        self.columns = columns
+        self.sim_of = np.full(len(columns), -1, dtype=np.int64)
+        self.trail_of = np.full(len(sim), -1, dtype=np.int64)
+        first = {}
+        for a, key in enumerate(zip(sim.depth.tolist(), sim.pid.tolist())):
+            first.setdefault(key, a)
+        for i, (step, pid, claim) in enumerate(zip(columns.step.tolist(), columns.proc_id.tolist(),
+                                                   columns.claim.tolist())):
+            a = first.get((step, pid))
+            if not claim and a is not None:
+                self.sim_of[i] = a
+                self.trail_of[a] = i
+        matched = self.sim_of >= 0
+        self.matched = int(matched.sum())
+        steps = int((~columns.claim).sum())
+        self.valid = steps > 0 and self.matched >= MIN_REPLAY_MATCH * steps
+        self.lines = np.full(len(columns), -1, dtype=np.int64)
+        self.lines[matched] = sim.line[self.sim_of[matched]]
+
+    def describe(self):
+        if self.valid:
+            return f"the Sim trace replays this trail ({self.matched} of {len(self.columns)} steps matched)"
+        return f"the Sim trace is not a replay of this trail (only {self.matched} of {len(self.columns)} steps match)"
+
+    def line_at(self, index):
+        """PML line of trail step `index`, None when it is unknown."""
+        if not self.valid or not 0 <= index < len(self.lines) or self.lines[index] < 0:
+            return None
+        return int(self.lines[index])
+
+    def depth_at(self, index):
+        """Sim depth of trail step `index`: its own step number, when the Sim replays the trail."""
+        if not self.valid or not 0 <= index < len(self.columns):
+            return None
+        return int(self.columns.step[index])
+
+    def steps_of_actions(self, actions):
+        """Trail steps of the Sim actions among `actions` that are steps of this trail."""
+        if not self.valid:
+            return np.empty(0, dtype=np.int64)
+        index = self.trail_of[np.asarray(actions, dtype=np.int64)]
+        return np.unique(self.columns.step[index[index >= 0]])
+
+    def transition_lines(self):
+        """Transition id -> PML line for every matched step, leaving out ids seen on more than one line."""
+        lines = {}
+        if not self.valid:
+            return lines
+        for transition, line in zip(self.columns.transition[self.sim_of >= 0].tolist(),
+                                    self.lines[self.sim_of >= 0].tolist()):
+            lines.setdefault(transition, set()).add(line)
+        return {t: next(iter(ls)) for t, ls in lines.items() if len(ls) == 1}
+
+
+def resolve_lines(columns, sim):
+    """Fill in columns.line from a Sim replay of the trail; returns the SimStepMap (None without a Sim)."""
+    if sim is None or not len(sim):
+        return None
+    step_map = SimStepMap(columns, sim)
+    if step_map.valid:
+        columns.line = step_map.lines
+    return step_map
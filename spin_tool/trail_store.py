@@ -0,0 +1,170 @@
+import numpy as np
+
+# Odd 64-bit multipliers: uint64 arithmetic wraps, so hashes are polynomials mod 2^64
+HASH_BASE = np.uint64(0x9E3779B97F4A7C15)
+PID_MIX = np.uint64(0xC2B2AE3D27D4EB4F)
+LINE_MIX = np.uint64(0x165667B19E3779F9)
+CLAIM_PID = -1              # never claim steps, whatever pid pan gave the claim
+BLOCK = 64                  # prefix hashes are indexed every BLOCK steps
+
+
+def normalize_steps(trail):
+    """(n, 2) int64 array of (pid, line) with pids renumbered by first appearance.
+
+    Two trails that differ only in how pan numbered their processes normalise to the same array.
+    Returns the array and the index of the first cycle step (None for a trail without a cycle).
+    """
+    renumber = {}
+    steps = np.empty((len(trail), 2), dtype=np.int64)
+    cycle = None
+    for i, e in enumerate(trail):
+        if e.get("claim"):
+            pid = CLAIM_PID
+        else:
+            pid = renumber.setdefault(e["proc_id"], len(renumber))
+        steps[i, 0] = pid
+        steps[i, 1] = e["line"]
+        if cycle is None and e.get("cycle"):
+            cycle = i
+    return steps, cycle
+
+
+def prefix_hashes(steps):
+    """h[k] is a hash of the first k steps: sum of token_j * BASE^j, so h extends as steps are added."""
+    with np.errstate(over='ignore'):
+        tokens = (steps[:, 0] + 2).astype(np.uint64) * PID_MIX + (steps[:, 1] + 1).astype(np.uint64) * LINE_MIX
+        powers = np.cumprod(np.full(len(steps), HASH_BASE, dtype=np.uint64)) if len(steps) else tokens
+        h = np.zeros(len(steps) + 1, dtype=np.uint64)
+        np.cumsum(tokens * powers, out=h[1:])
+    return h
+
+
+class TrailStore:
+    """Unique trails stored once each, and as a delta against the stored trail they share the longest
+    prefix with.
+
+    Exact copies (after pid normalisation) are found by their full hash. For the rest, prefix hashes
+    of every stored trail are indexed at every BLOCK-th step, which acts as a trie with BLOCK-step
+    edges: walking it finds the trail with the longest common prefix in O(length / BLOCK) lookups,
+    and only the steps after that prefix are kept.
+    """
+
+    def __init__(self):
+        self.base = []              # unique id -> id of the trail its prefix comes from, or -1
+        self.prefix = []            # length of the prefix taken from the base
+        self.suffix = []            # (k, 2) steps after the prefix
+        self.length = []
+        self.cycle = []
+        self.hashes = []            # prefix hashes of each unique trail, for the trie walk
+        self.by_key = {}            # trail_key -> unique id
+        self.trie = {}              # (block, prefix hash at block * BLOCK) -> unique id
+        self.names = {}             # name given to add() -> unique id
+
+    def __len__(self):
+        return len(self.base)
+
+    def add(self, trail, name=None):
+        """Store a parsed trail; returns (unique id, whether it was new)."""
+        steps, cycle = normalize_steps(trail)
+        return self.add_steps(steps, cycle, name)
+
+    def add_steps(self, steps, cycle=None, name=None):
+        h = prefix_hashes(steps)
+        key = (len(steps), int(h[-1]), cycle)
+        uid = self.by_key.get(key)
+        if uid is not None and np.array_equal(self.get(uid), steps):
+            if name is not None:
+                self.names[name] = uid
+            return uid, False
+
+        base, shared = self.longest_prefix(steps, h)
+        uid = len(self.base)
+        self.base.append(base)
+        self.prefix.append(shared)
+        self.suffix.append(steps[shared:].copy())
+        self.length.append(len(steps))
+        self.cycle.append(cycle)
+        self.hashes.append(h)
+        self.by_key.setdefault(key, uid)
+        for block in range(1, len(steps) // BLOCK + 1):
+            self.trie.setdefault((block, int(h[block * BLOCK])), uid)
+        if name is not None:
+            self.names[name] = uid
+        return uid, True
+
+    def longest_prefix(self, steps, h):
+        base, block = -1, 0
+        while (block + 1) * BLOCK <= len(steps):
+            uid = self.trie.get((block + 1, int(h[(block + 1) * BLOCK])))
+            if uid is None:
+                break
+            base, block = uid, block + 1
+        if base < 0:
+            if not self.base:
+                return -1, 0
+            # No shared block: the most recent trail may still share a few steps
+            base = len(self.base) - 1
+        # Extend within the next block by comparing prefix hashes
+        other = self.hashes[base]
+        limit = min(len(steps), self.length[base])
+        shared = block * BLOCK
+        end = min(shared + BLOCK, limit)
+        diff = np.flatnonzero(other[shared + 1:end + 1] != h[shared + 1:end + 1])
+        shared = shared + diff[0] if len(diff) else end
+        return (base, shared) if shared else (-1, 0)
+
+    def get(self, uid):
+        """The normalised (pid, line) steps of a unique trail."""
+        pieces = []
+        limit = self.length[uid]
+        while uid >= 0:
+            # This trail's steps [prefix, limit) are in its suffix, the ones before come from its base
+            prefix = self.prefix[uid]
+            if limit > prefix:
+                pieces.append(self.suffix[uid][:limit - prefix])
+                limit = prefix
+            uid = self.base[uid]
+        return np.concatenate(pieces[::-1]) if pieces else np.empty((0, 2), dtype=np.int64)
+
+    def stored_steps(self):
+        return sum(len(s) for s in self.suffix)
+
+    def describe(self):
+        stored = self.stored_steps()
+        added = sum(self.length[uid] for uid in self.names.values())
+        return (f"{len(self.names)} trail(s), {len(self)} unique after pid normalisation; "
+                f"{added:,} steps stored as {stored:,}" + (f" ({added / stored:.1f}x smaller)" if stored else ""))
+
+    def save(self, path):
+        offsets = np.cumsum([0] + [len(s) for s in self.suffix])
+        np.savez_compressed(
+            path,
+            base=np.array(self.base, dtype=np.int64),
+            prefix=np.array(self.prefix, dtype=np.int64),
+            cycle=np.array([-1 if c is None else c for c in self.cycle], dtype=np.int64),
+            offsets=offsets,
+            steps=np.concatenate(self.suffix) if self.suffix else np.empty((0, 2), dtype=np.int64),
+            names=np.array(list(self.names), dtype=str),
+            name_ids=np.array(list(self.names.values()), dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path):
+        store = cls()
+        with np.load(path) as data:
+            offsets, steps = data["offsets"], data["steps"]
+            for uid, (base, prefix, cycle) in enumerate(zip(data["base"].tolist(), data["prefix"].tolist(),
+                                                             data["cycle"].tolist())):
+                store.base.append(base)
+                store.prefix.append(prefix)
+                store.suffix.append(steps[offsets[uid]:offsets[uid + 1]])
+                store.cycle.append(None if cycle < 0 else cycle)
+                store.length.append(prefix + offsets[uid + 1] - offsets[uid])
+                full = store.get(uid)
+                h = prefix_hashes(full)
+                store.hashes.append(h)
+                store.by_key.setdefault((len(full), int(h[-1]), store.cycle[-1]), uid)
+                for block in range(1, len(full) // BLOCK + 1):
+                    store.trie.setdefault((block, int(h[block * BLOCK])), uid)
+            store.names = dict(zip(data["names"].tolist(), data["name_ids"].tolist()))
+        return store
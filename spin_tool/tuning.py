@@ -0,0 +1,130 @@
+import math
+
+MB = 1 << 20
+DEFAULT_HASH_SIZE = 24      # pan's -w when none is given
+DEFAULT_MAX_DEPTH = 10000   # pan's -m when none is given
+STATE_REDUCTIONS = ('COLLAPSE', 'HC0', 'HC1', 'HC2', 'HC3', 'HC4', 'MA', 'BITSTATE')
+
+
+class Metrics:
+    """Figures derived from one pan run; None where the output did not have what is needed."""
+
+    def __init__(self, result):
+        stats, memory, options = result.stats, result.memory, result.run_options
+        self.flags = result.flags
+        self.stored = stats.get('states_stored')
+        self.depth = stats.get('depth_reached')
+        self.vector = stats.get('state_vector_size')
+
+        self.elapsed = result.elapsed
+        self.states_per_second = None
+        if self.stored is not None and self.elapsed:
+            self.states_per_second = self.stored / self.elapsed
+        elif result.rate:
+            self.states_per_second = result.rate
+
+        self.bytes_per_state = None
+        self.compression = None
+        if self.stored and 'states' in memory:
+            self.bytes_per_state = memory['states'] * MB / self.stored
+            if memory.get('states (equivalent)'):
+                self.compression = memory['states'] / memory['states (equivalent)']
+
+        self.hash_size = result.hash_size or int_option(options.get('w')) or DEFAULT_HASH_SIZE
+        self.load_factor = self.stored / 2 ** self.hash_size if self.stored is not None else None
+        self.conflicts_per_state = None
+        if self.stored and 'hash_conflicts' in stats:
+            self.conflicts_per_state = stats['hash_conflicts'] / self.stored
+        self.hash_factor = stats.get('hash_factor')
+
+        self.max_depth = int_option(options.get('m')) or DEFAULT_MAX_DEPTH
+        self.stack_usage = self.depth / self.max_depth if self.depth is not None else None
+        self.depth_limited = any('max search depth too small' in w for w in result.warnings) or \
+            (self.depth is not None and self.depth >= self.max_depth)
+
+        self.memory_total = memory.get('total')
+        self.memory_split = {k: memory[k] for k in ('states', 'hash table', 'DFS stack') if k in memory}
+        self.memlim = int_option(self.flags.get('MEMLIM'))     # megabytes
+        self.memory_exhausted = any('out of memory' in w or 'MEMLIM' in w for w in result.warnings)
+
+    def describe(self):
+        lines = []
+        if self.states_per_second is not None:
+            lines.append(f"States/second: {self.states_per_second:,.0f}")
+        if self.bytes_per_state is not None:
+            line = f"Bytes per stored state: {self.bytes_per_state:,.1f}"
+            if self.vector is not None:
+                line += f" (state vector {self.vector} bytes)"
+            if self.compression is not None:
+                line += f", {self.compression:.0%} of uncompressed"
+            lines.append(line)
+        if self.load_factor is not None:
+            lines.append(f"Hash table load factor: {self.load_factor:.3g} ({self.stored:,} states in 2^{self.hash_size} slots)")
+        if self.conflicts_per_state is not None:
+            lines.append(f"Hash conflicts per state: {self.conflicts_per_state:.3g}")
+        if self.hash_factor is not None:
+            lines.append(f"Hash factor: {self.hash_factor:g}")
+        if self.stack_usage is not None:
+            lines.append(f"DFS stack: depth {self.depth:,} of -m{self.max_depth} ({self.stack_usage:.0%})")
+        if self.memory_split:
+            total = self.memory_total or sum(self.memory_split.values())
+            lines.append("Memory: " + ", ".join(
+                f"{k} {v:,.1f} MB ({v / total:.0%})" if total else f"{k} {v:,.1f} MB"
+                for k, v in self.memory_split.items()
+            ))
+        return lines
+
+
+def int_option(value):
+    return int(value) if value and value.isdigit() else None
+
+
+def recommend(m):
+    """Concrete pan/compile settings to try next, most pressing first."""
+    advice = []
+    flags = m.flags
+    reduced = [f for f in STATE_REDUCTIONS if f in flags]
+
+    if m.depth_limited:
+        advice.append(f"The search reached the -m{m.max_depth} depth limit, so it was truncated: "
+                      f"rerun with -m{max(2 * (m.depth or m.max_depth), m.max_depth * 2)}.")
+    elif m.stack_usage is not None and m.stack_usage < 0.05 and m.memory_split.get('DFS stack', 0) > 64:
+        advice.append(f"Only {m.stack_usage:.0%} of the DFS stack was used: -m{max(2 * m.depth, 1000)} "
+                      f"frees most of its {m.memory_split['DFS stack']:,.0f} MB.")
+
+    if 'BITSTATE' in flags:
+        if m.hash_factor is not None and m.hash_factor < 100:
+            # The hash factor is roughly bits per stored state, 2^w / stored
+            w = math.ceil(math.log2(max(m.stored or 1, 1) * 100))
+            advice.append(f"Hash factor {m.hash_factor:g} is below 100, so coverage is poor: raise -w to at least "
+                          f"-w{max(w, m.hash_size + 1)} or run a swarm of searches.")
+    elif m.load_factor is not None:
+        needed = math.ceil(math.log2(max(m.stored, 1))) + 1
+        if m.load_factor > 1 or (m.conflicts_per_state or 0) > 0.5:
+            advice.append(f"The hash table is overloaded (load factor {m.load_factor:.2g}"
+                          + (f", {m.conflicts_per_state:.2g} conflicts per state" if m.conflicts_per_state else "")
+                          + f"): use -w{needed}.")
+        elif m.load_factor < 0.01 and m.memory_split.get('hash table', 0) > 64 and needed < m.hash_size:
+            advice.append(f"The hash table holds {m.stored:,} states in 2^{m.hash_size} slots and takes "
+                          f"{m.memory_split['hash table']:,.0f} MB: "
+                          f"-w{max(needed, 10)} gives the same search with far less memory.")
+
+    memory_bound = m.memory_exhausted or (
+        m.memlim is not None and m.memory_total is not None and m.memory_total > 0.9 * m.memlim
+    )
+    if memory_bound:
+        if 'COLLAPSE' not in flags and 'BITSTATE' not in flags:
+            advice.append("Memory is the limit: compile with -DCOLLAPSE (lossless, often 3-10x smaller states).")
+        if not any(f.startswith('HC') for f in flags) and 'BITSTATE' not in flags:
+            advice.append("For more headroom, -DHC4 hash-compacts states to a few bytes each with a tiny loss of coverage.")
+        if 'BITSTATE' not in flags:
+            advice.append("If a full search cannot fit, -DBITSTATE with a large -w gives a fast approximate search.")
+        if m.memlim is not None:
+            advice.append(f"-DMEMLIM={m.memlim} caps the run; raise it if the machine has more memory.")
+    elif m.bytes_per_state is not None and m.bytes_per_state > 64 and not reduced and (m.stored or 0) > 1_000_000:
+        advice.append(f"States take {m.bytes_per_state:,.0f} bytes each: -DCOLLAPSE would shrink them "
+                      f"before memory becomes the limit.")
+
+    if not advice:
+        advice.append("No tuning needed: the hash table, depth limit and memory all have headroom.")
+    return advice
@@ -0,0 +1,182 @@
+import json
+import os
+import sys
+
+from PyQt6.QtWidgets import (
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QListWidget, QListWidgetItem,
+    QSpinBox, QSplitter
+)
+from PyQt6.QtCore import Qt
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+import matplotlib.pyplot as plt
+import numpy as np
+
+from sim_index import load_sim_trace
+from step_link import StepLinkWatcher
+from trail_model import SimStepMap, TrailColumns
+from var_values import load_var_timeline
+
+MAX_PLOTTED = 10
+
+
+class VariablePanel(QWidget):
+    """Chosen variables plotted as step functions over Sim depths, with their values at one depth.
+
+    Values are recorded by Sim depth. Trail steps only share that numbering when the Sim trace is a
+    spin -t replay of the trail; the owner links the panel to trail steps in that case only.
+    """
+
+    def __init__(self, timeline, extent=None, axis_label="Sim depth", parent=None):
+        super().__init__(parent)
+        self.timeline = timeline
+        self.axis_label = axis_label
+        if extent is None:
+            lo = int(timeline.step.min()) if len(timeline.step) else 0
+            hi = int(timeline.step.max()) + 1 if len(timeline.step) else 1
+            extent = (lo, hi)
+        self.extent = extent
+        self.step = None
+        self.colors = plt.get_cmap("tab10")
+
+        self.filter = QLineEdit()
+        self.filter.setPlaceholderText("Filter variables...")
+        self.filter.textChanged.connect(self.apply_filter)
+        self.list = QListWidget()
+        for name in timeline.names:
+            changes = timeline.changes(name)
+            item = QListWidgetItem(f"{name}  ({changes} value{'s' if changes != 1 else ''})")
+            item.setData(Qt.ItemDataRole.UserRole, name)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Unchecked)
+            self.list.addItem(item)
+        self.list.itemChanged.connect(lambda _: self.redraw())
+
+        self.step_box = QSpinBox()
+        self.step_box.setRange(*self.extent)
+        self.step_box.setPrefix(f"Value at {axis_label.lower()} ")
+        self.step_box.valueChanged.connect(self.set_step)
+        self.values = QLabel()
+        self.values.setWordWrap(True)
+        self.values.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+
+        side = QWidget()
+        side_layout = QVBoxLayout(side)
+        side_layout.setContentsMargins(0, 0, 0, 0)
+        side_layout.addWidget(self.filter)
+        side_layout.addWidget(self.list)
+        side_layout.addWidget(self.step_box)
+        side_layout.addWidget(self.values)
+
+        self.fig = Figure(figsize=(8, 2.5))
+        self.canvas = FigureCanvas(self.fig)
+        self.ax = self.fig.add_subplot(111)
+        self.cursor = None
+
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        splitter.addWidget(side)
+        splitter.addWidget(self.canvas)
+        splitter.setStretchFactor(1, 1)
+        splitter.setSizes([260, 1000])
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(splitter)
+
+        self.redraw()
+        self.set_step(self.extent[0])
+
+    def chosen(self):
+        return [self.list.item(i).data(Qt.ItemDataRole.UserRole) for i in range(self.list.count())
+                if self.list.item(i).checkState() == Qt.CheckState.Checked]
+
+    def apply_filter(self, text):
+        for i in range(self.list.count()):
+            item = self.list.item(i)
+            item.setHidden(text.lower() not in item.data(Qt.ItemDataRole.UserRole).lower())
+
+    def redraw(self):
+        xlim = self.ax.get_xlim() if self.ax.lines else self.extent
+        self.ax.clear()
+        names = self.chosen()
+        for k, name in enumerate(names[:MAX_PLOTTED]):
+            steps, values = self.timeline.series(name)
+            if not len(steps):
+                continue
+            # Hold the last value up to the end of the trail
+            x = np.append(steps, max(self.extent[1], steps[-1]))
+            y = np.append(values, values[-1])
+            self.ax.step(x, y, where="post", color=self.colors(k % 10), label=name, linewidth=1.2)
+            self.ax.plot(steps, values, "o", color=self.colors(k % 10), markersize=2.5)
+        if names:
+            self.ax.legend(loc="upper left", fontsize=7, ncol=min(len(names), 4))
+        else:
+            self.ax.text(0.5, 0.5, "Tick variables on the left to plot them", ha="center", va="center",
+                         transform=self.ax.transAxes, color="#777777")
+        self.ax.set_xlim(*xlim)
+        self.ax.set_xlabel(self.axis_label, fontsize=8)
+        self.ax.tick_params(labelsize=8)
+        self.ax.grid(True, axis="x", linestyle="--", alpha=0.5)
+        self.cursor = self.ax.axvline(self.step if self.step is not None else 0, color="red", linewidth=1,
+                                      visible=self.step is not None)
+        self.fig.tight_layout()
+        self.canvas.draw_idle()
+        self.show_values()
+
+    def set_xlim(self, x0, x1):
+        self.ax.set_xlim(x0, x1)
+        self.canvas.draw_idle()
+
+    def set_step(self, step):
+        step = int(step)
+        if step == self.step:
+            return
+        self.step = step
+        self.step_box.blockSignals(True)
+        self.step_box.setValue(step)
+        self.step_box.blockSignals(False)
+        if self.cursor is not None:
+            self.cursor.set_xdata([step, step])
+            self.cursor.set_visible(True)
+            self.canvas.draw_idle()
+        self.show_values()
+
+    def show_values(self):
+        if self.step is None:
+            return
+        names = self.chosen()
+        if not names:
+            self.values.setText("")
+            return
+        rows = []
+        for name in names:
+            value = self.timeline.value_at(name, self.step)
+            rows.append(f"{name} = {'?' if value is None else value}")
+        self.values.setText("\n".join(rows))
+
+
+def main():
+    app = QApplication(sys.argv)
+    timeline = load_var_timeline(os.path.join(os.getcwd(), "data"))
+    if timeline is None or not len(timeline):
+        print("No variable values found: the .isf needs a Data block or a Sim trace with VarVals (spin -g -l).")
+        return 1
+    # Other modules publish trail steps: follow them only when the Sim is a replay of the parsed trail
+    linked = False
+    trail_path = os.path.join(os.getcwd(), "output", "parsed_data.json")
+    sim = load_sim_trace(os.path.join(os.getcwd(), "data"))
+    if os.path.exists(trail_path) and sim is not None and len(sim):
+        with open(trail_path, "r") as f:
+            columns = TrailColumns(json.load(f).get("trail", []))
+        linked = len(columns) > 0 and SimStepMap(columns, sim).valid
+    panel = VariablePanel(timeline, axis_label="Step" if linked else "Sim depth")
+    panel.setWindowTitle("SPIN Variable Values")
+    panel.resize(1200, 400)
+    if linked:
+        link = StepLinkWatcher(source="variables", parent=panel)
+        link.stepSelected.connect(panel.set_step)
+    panel.show()
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import json
+import os
+import re
+
+import numpy as np
+
+from sim_index import depth_re, find_sim_file
+
+VAR_VALUES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output', 'var_values.npz')
+
+block_re = re.compile(r'^===(start|end) (.+?)===')
+data_step_re = re.compile(r'^\[variable values, step\s+(\d+)\]')
+# "sieve(1):n = 23", ":init:(0):n = 24", "n = 3", "a[2] = 1"; printf output such as "MSC: 10 = 2*5" does not match
+var_re = re.compile(r'^(\s*)(?:(\S+?)\((\d+)\):)?([A-Za-z_]\w*(?:\[\d+\])?(?:\.\w+(?:\[\d+\])?)*)\s+=\s+(-?\d+)\s*$')
+GLOBAL_PID = -1
+
+
+def iter_var_values(lines):
+    """(step, name, pid, value) of every variable value in an .isf.
+
+    The Sim block of a run with VarVals (spin -g -l) lists the variables each step changed, indented
+    under the step; the Data block lists the final values at the step in its header.
+    """
+    block = None
+    step = 0
+    for raw in lines:
+        m = block_re.match(raw)
+        if m:
+            block = m.group(2) if m.group(1) == 'start' else None
+            step = 0
+            continue
+        if block == 'Data':
+            m = data_step_re.match(raw)
+            if m:
+                step = int(m.group(1))
+                continue
+        elif block == 'Sim':
+            m = depth_re.match(raw)
+            if m:
+                step = int(m.group(1))
+                continue
+        else:
+            continue
+        m = var_re.match(raw)
+        # Unindented Sim lines are printf output, not variable dumps
+        if m and (block == 'Data' or m.group(1)):
+            scope, pid, var = m.group(2), m.group(3), m.group(4)
+            name = f'{scope}({pid}):{var}' if scope else var
+            yield step, name, int(pid) if pid is not None else GLOBAL_PID, int(m.group(5))
+
+
+class VarTimeline:
+    """Value series of every variable, stored as flat step/value columns sorted by (series, step).
+
+    Variables hold their value until the next recorded change, so the value at step k is the last
+    entry at or before k: a binary search within the series' slice.
+    """
+
+    def __init__(self, names, pids, series, step, value):
+        self.names = list(names)
+        self.pids = np.asarray(pids, dtype=np.int64)
+        series = np.asarray(series, dtype=np.int64)
+        step = np.asarray(step, dtype=np.int64)
+        value = np.asarray(value, dtype=np.int64)
+        order = np.lexsort((step, series))
+        series, step, value = series[order], step[order], value[order]
+        # Several values of one variable at one step (a dump and the final Data block): keep the last
+        keep = np.ones(len(step), dtype=bool)
+        keep[:-1] = (series[1:] != series[:-1]) | (step[1:] != step[:-1])
+        self.step, self.value = step[keep], value[keep]
+        self.offsets = np.searchsorted(series[keep], np.arange(len(self.names) + 1))
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def from_values(cls, values):
+        names, pids, index = [], [], {}
+        series, step, value = [], [], []
+        for at, name, pid, v in values:
+            i = index.get(name)
+            if i is None:
+                i = index[name] = len(names)
+                names.append(name)
+                pids.append(pid)
+            series.append(i)
+            step.append(at)
+            value.append(v)
+        return cls(names, pids, series, step, value)
+
+    def __len__(self):
+        return len(self.names)
+
+    def series(self, name):
+        """(steps, values) of one variable."""
+        i = self.index[name]
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return self.step[lo:hi], self.value[lo:hi]
+
+    def value_at(self, name, step):
+        """Value of a variable at a step, None before its first recorded value."""
+        steps, values = self.series(name)
+        k = int(np.searchsorted(steps, step, side='right')) - 1
+        return int(values[k]) if k >= 0 else None
+
+    def changes(self, name):
+        return len(self.series(name)[0])
+
+    def save(self, path, source=None):
+        np.savez_compressed(
+            path,
+            names=np.array(self.names, dtype=str),
+            pids=self.pids,
+            offsets=self.offsets,
+            step=self.step,
+            value=self.value,
+            source=np.array(json.dumps(source)),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            offsets = data['offsets']
+            series = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+            timeline = cls(data['names'].tolist(), data['pids'], series, data['step'], data['value'])
+            return timeline, json.loads(str(data['source']))
+
+
+def load_var_timeline(data_dir="data", cache_path=VAR_VALUES_PATH):
+    """VarTimeline of the .isf in data_dir, cached like the spawn tree and rebuilt when the file changes."""
+    path = find_sim_file(data_dir)
+    if path is None:
+        return None
+    st = os.stat(path)
+    source = {'path': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+    try:
+        timeline, cached = VarTimeline.load(cache_path)
+        if cached == source:
+            return timeline
+    except (OSError, ValueError, KeyError):
+        pass
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        timeline = VarTimeline.from_values(iter_var_values(f))
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # np.savez appends .npz to names without it, so the temporary name keeps the extension
+        tmp_path = cache_path[:-4] + '.tmp.npz'
+        timeline.save(tmp_path, source)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return timeline
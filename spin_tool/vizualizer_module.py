@@ -15,6 +15,8 @@ from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Font, Alignment
 
+from step_link import StepLinkWatcher, publish_step
+
 
 DATA_DIR = "data"
 
@@ -79,6 +81,7 @@ class SpinVisualizer(QWidget):
         self.table.setHorizontalHeaderLabels(["Step", "Process", "Line", "Action", "Code"])
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.table.cellDoubleClicked.connect(self.show_step_details)
+        self.table.cellClicked.connect(self.publish_row_step)
 
         splitter.addWidget(self.table)
 
@@ -109,6 +112,9 @@ class SpinVisualizer(QWidget):
         self.load_data()
         self.populate_error_list()
 
+        self.link = StepLinkWatcher(source="visualizer", parent=self)
+        self.link.stepSelected.connect(self.highlight_step)
+
 
     def load_data(self):
         self.table.setRowCount(len(self.trail))
@@ -194,6 +200,18 @@ class SpinVisualizer(QWidget):
             dlg = StepDetailDialog(step, code)
             dlg.exec()
 
+    def publish_row_step(self, row, column):
+        step_num_item = self.table.item(row, 0)
+        if step_num_item and step_num_item.text().isdigit():
+            publish_step(int(step_num_item.text()), source="visualizer")
+
+    def highlight_step(self, step):
+        for item in self.table.findItems(str(step), Qt.MatchFlag.MatchExactly):
+            if item.column() == 0:
+                self.table.selectRow(item.row())
+                self.table.scrollToItem(item, QTableWidget.ScrollHint.PositionAtCenter)
+                return
+
     def export_xlsx(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save XLSX", "", "Excel Files (*.xlsx)")
         if not path:
@@ -2,12 +2,21 @@ import os
 import sys
 import json
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QLabel, QTextEdit,
+    QApplication, QWidget, QVBoxLayout, QLabel,
     QMainWindow, QPushButton, QGraphicsView, QGraphicsScene,
-    QGraphicsEllipseItem, QGraphicsTextItem, QSizePolicy
+    QGraphicsItem, QGraphicsTextItem, QSizePolicy, QToolTip, QCheckBox
 )
-from PyQt6.QtCore import Qt, QRectF
-from PyQt6.QtGui import QFont, QPen, QBrush, QColor, QWheelEvent, QPainter
+from PyQt6.QtCore import Qt, QRectF, QPointF, QLineF, pyqtSignal
+from PyQt6.QtGui import QFont, QPen, QBrush, QColor, QWheelEvent, QPainter, QPainterPath, QPolygonF
+import numpy as np
+
+from trail_model import RowLayout, TrailColumns, load_pml_lines, resolve_lines
+from replay import ReplayBar
+from sim_index import SimLineIndex, find_sim_file, load_sim_trace, load_spawn_tree
+from trace_viewer import TraceViewer
+from channels import blocked_operations, match_messages, parse_channel_decls
+from deadlock import explain_deadlock
+from causal_slice import causal_slice, failing_action
 
 DATA_JSON = './output/parsed_data.json'
 DATA_DIR = './data'
@@ -21,92 +30,280 @@ def load_parsed_json(json_path):
     return data.get('trail', []), data.get('errors', [])
 
 
-def extract_simulation(txt_path):
-    """Exactly your original simulation extraction logic"""
-    with open(txt_path, 'r') as f:
-        lines = f.readlines()
-    in_sim = False
-    sim_lines = []
-    for line in lines:
-        if '===start Sim===' in line:
-            in_sim = True
-            continue
-        elif '===end Sim===' in line:
-            break
-        elif in_sim:
-            sim_lines.append(line.rstrip('\n'))
-    return sim_lines
+def load_process_types(json_path):
+    if not os.path.exists(json_path):
+        return {}
+    with open(json_path, 'r') as f:
+        return json.load(f).get('processes', {})
+
+
+class TransitionLayer(QGraphicsItem):
+    """Grid, dots, transition numbers and group strips of the timeline, painted only for the exposed area."""
+
+    LABEL_MIN_PX = 16   # on-screen step width below which transition numbers are hidden
+
+    def __init__(self, timeline):
+        super().__init__()
+        self.timeline = timeline
+        self.rect = QRectF()
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+
+    def set_extent(self, rect):
+        self.prepareGeometryChange()
+        self.rect = rect
+
+    def boundingRect(self):
+        return self.rect
+
+    def paint(self, painter, option, widget=None):
+        tl = self.timeline
+        exposed = option.exposedRect
+        t = painter.worldTransform()
+        # The view only scales and translates, so scene -> device is x * sx + dx, y * sy + dy
+        sx, dx, sy, dy = t.m11(), t.dx(), t.m22(), t.dy()
+        step0 = int(exposed.left() // tl.X_SCALE) - 1
+        step1 = int(exposed.right() // tl.X_SCALE) + 2
+        y0 = max(int(exposed.top() // tl.Y_SPACING), 0)
+        y1 = min(int(exposed.bottom() // tl.Y_SPACING) + 2, len(tl.row_layout))
+        left, right = exposed.left() * sx + dx, exposed.right() * sx + dx
+
+        # Dots and text are drawn in device pixels so horizontal zoom does not stretch them
+        painter.save()
+        painter.resetTransform()
+
+        px_per_step = tl.X_SCALE * sx
+        every = 5
+        while every * px_per_step < 8:
+            every *= 2
+        painter.setPen(QPen(QColor("#dddddd")))
+        top, bottom = -20 * sy + dy, tl.max_y * sy + dy
+        for step in range(max(step0, 0) // every * every, step1, every):
+            x = step * tl.X_SCALE * sx + dx
+            painter.drawLine(QLineF(x, top, x, bottom))
+
+        for y_index in range(y0, y1):
+            y = y_index * tl.Y_SPACING * sy + dy
+            painter.setPen(QPen(QColor("#ddddddd6")))
+            painter.drawLine(QLineF(left, y, right, y))
+            kind, g, members = tl.row_layout.entries[y_index]
+            if kind == "group":
+                self.paint_strip(painter, g, y, step0, step1, sx, dx)
+            else:
+                self.paint_dots(painter, members[0], y, step0, step1, sx, dx)
+        painter.restore()
+
+    def paint_dots(self, painter, row, y, step0, step1, sx, dx):
+        tl = self.timeline
+        steps, idx = tl.row_steps[row], tl.row_idx[row]
+        i0, i1 = np.searchsorted(steps, [step0, step1])
+        xs = steps[i0:i1] * (tl.X_SCALE * sx) + dx
+        keep = np.arange(i1 - i0)
+        if len(xs) > 1:
+            # At most one dot per pixel column when zoomed far out
+            px = np.floor(xs)
+            keep = np.flatnonzero(np.r_[True, px[1:] != px[:-1]])
+        r = tl.DOT_RADIUS
+        painter.setPen(QPen(Qt.GlobalColor.black))
+        painter.setBrush(QBrush(QColor("blue")))
+        for k in keep.tolist():
+            painter.drawEllipse(QPointF(xs[k], y), r, r)
+        last = np.flatnonzero(idx[i0:i1] == tl.n_transitions)
+        if len(last):
+            painter.setBrush(QBrush(QColor("red")))
+            painter.drawEllipse(QPointF(xs[last[0]], y), r, r)
+
+        if tl.X_SCALE * sx >= self.LABEL_MIN_PX:
+            painter.setPen(QPen(Qt.GlobalColor.darkGray))
+            for k in range(i1 - i0):
+                painter.drawText(QPointF(xs[k] - 5, y - 8), str(idx[i0 + k]))
+
+    def paint_strip(self, painter, g, y, step0, step1, sx, dx):
+        # Cells shaded by how many member transitions fall into them, merged until each is >= 2px wide
+        tl = self.timeline
+        counts = tl.group_counts[g]
+        cell = tl.STRIP_BIN
+        merge = max(int(np.ceil(2 / (cell * tl.X_SCALE * sx))), 1)
+        c0 = max(step0 // (cell * merge), 0) * merge
+        c1 = min((step1 // (cell * merge) + 1) * merge, len(counts))
+        if c1 <= c0:
+            return
+        window = np.add.reduceat(counts[c0:c1], np.arange(0, c1 - c0, merge))
+        width = cell * merge * tl.X_SCALE * sx
+        painter.setPen(QPen(Qt.PenStyle.NoPen))
+        base = QColor(tl.GROUP_COLORS[g % len(tl.GROUP_COLORS)])
+        for k in np.flatnonzero(window).tolist():
+            fill = QColor(base)
+            fill.setAlphaF(min(0.2 + 0.8 * window[k] / (cell * merge), 1.0))
+            painter.setBrush(QBrush(fill))
+            painter.drawRect(QRectF((c0 + k * merge) * cell * tl.X_SCALE * sx + dx, y - 8, width, 16))
 
 
 class TimelineWidget(QGraphicsView):
-    def __init__(self, transitions, parent=None):
+    GROUP_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+                    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"]
+    STRIP_BIN = 5
+    X_SCALE = 20
+    Y_SPACING = 50
+    DOT_RADIUS = 4
+
+    stepClicked = pyqtSignal(int)
+
+    def __init__(self, transitions, proc_types=None, parent=None):
         super().__init__(parent)
         self.setRenderHint(QPainter.RenderHint.Antialiasing)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setMouseTracking(True)
 
         self.scene = QGraphicsScene(self)
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
         self.setScene(self.scene)
 
-        self.draw_timeline(transitions)
-
-    def draw_timeline(self, transitions):
+        # Columnar copy of the transitions, bucketed per process and sorted by step: this is
+        # both what gets painted and the index used for hover and click
+        self.transitions = transitions
+        self.n_transitions = len(transitions)
+        n = len(transitions)
+        row_of_pid = {}
+        self.steps = np.fromiter((t['step'] for t in transitions), dtype=np.int64, count=n)
+        self.rows = np.fromiter((row_of_pid.setdefault(t['proc_id'], len(row_of_pid)) for t in transitions),
+                                dtype=np.int64, count=n)
+        self.row_pids = list(row_of_pid)
+        self.claim_pids = {t['proc_id'] for t in transitions if t.get('claim')}
+        cycle = [t['step'] for t in transitions if t.get('cycle')]
+        self.cycle_step = min(cycle) if cycle else None
+        self.row_layout = RowLayout(self.row_pids, proc_types or {}, claim_pids=self.claim_pids)
+        self.n_cells = int(self.steps.max()) // self.STRIP_BIN + 1 if n else 0
+        self.index_rows(np.arange(n))
+
+        self.group_labels = {}
+        self.cursor = None
+        self.draw_timeline()
+
+    def index_rows(self, shown):
+        """Per-row sorted steps (and transition numbers) of the transitions in `shown`, plus group strip counts."""
+        by_row = shown[np.lexsort((self.steps[shown], self.rows[shown]))]
+        bounds = np.searchsorted(self.rows[by_row], np.arange(len(self.row_pids) + 1))
+        self.row_steps = [self.steps[by_row[bounds[r]:bounds[r + 1]]] for r in range(len(self.row_pids))]
+        self.row_idx = [by_row[bounds[r]:bounds[r + 1]] + 1 for r in range(len(self.row_pids))]
+        self.group_counts = []
+        for _, members in self.row_layout.groups:
+            cells = np.concatenate([self.row_steps[r] for r in members]) // self.STRIP_BIN
+            self.group_counts.append(np.bincount(cells, minlength=self.n_cells))
+
+    def set_step_filter(self, steps=None):
+        """Only show transitions whose step is in `steps` (all of them for None)."""
+        shown = np.arange(self.n_transitions) if steps is None else np.flatnonzero(np.isin(self.steps, steps))
+        self.index_rows(shown)
+        self.layer.update()
+
+    def draw_timeline(self):
         self.scene.clear()
-        y_map = {}
-        y_spacing = 50
-        dot_radius = 4
-
-        # Map proc_id to y positions
-        for t in transitions:
-            proc = t['proc_id']
-            if proc not in y_map:
-                y_map[proc] = len(y_map)
-
-        max_step = max((t['step'] for t in transitions), default=0)
-        max_x = max_step * 20 + 100
-        max_y = len(y_map) * y_spacing
-
-        # Vertical grid lines
-        for step in range(0, max_step + 1, 5):
-            x = step * 20
-            line = self.scene.addLine(x, -20, x, max_y, QPen(QColor("#dddddd")))
-            line.setZValue(-1)
-
-        # Horizontal process lines
-        for _, y_index in y_map.items():
-            y = y_index * y_spacing
-            line = self.scene.addLine(-80, y, max_x, y, QPen(QColor("#ddddddd6")))
-            line.setZValue(-1)
-
-        # Draw timeline dots
-        for idx, t in enumerate(transitions, start=1):
-            step = t['step']
-            proc = t['proc_id']
-            x = step * 20
-            y = y_map[proc] * y_spacing
-
-            is_last = idx == len(transitions)
-            color = QColor("red") if is_last else QColor("blue")
-
-            dot = QGraphicsEllipseItem(QRectF(x - dot_radius, y - dot_radius, dot_radius * 2, dot_radius * 2))
-            dot.setBrush(QBrush(color))
-            dot.setPen(QPen(Qt.GlobalColor.black))
-            self.scene.addItem(dot)
-
-            label = QGraphicsTextItem(str(idx))
-            label.setDefaultTextColor(Qt.GlobalColor.darkGray)
-            label.setPos(x - 5, y - 20)
-            self.scene.addItem(label)
+        self.group_labels = {}
+        self.cursor = None
+        self.layer = TransitionLayer(self)
+
+        max_step = int(self.steps.max()) if self.n_transitions else 0
+        max_x = max_step * self.X_SCALE + 100
+        max_y = len(self.row_layout) * self.Y_SPACING
+        self.max_y = max_y
+        self.layer.set_extent(QRectF(-80, -20, max_x + 80, max_y + 40))
+        self.scene.addItem(self.layer)
+        self.draw_lasso(max_step)
 
         # Process labels
-        for proc, idx in y_map.items():
-            label = QGraphicsTextItem(f"proc {proc}")
+        for y_index, (kind, g, members) in enumerate(self.row_layout.entries):
+            y = y_index * self.Y_SPACING
+            if kind == "group":
+                label = QGraphicsTextItem(self.row_layout.label(y_index, []))
+                self.group_labels[label] = y_index
+                label.setCursor(Qt.CursorShape.PointingHandCursor)
+            else:
+                indent = "  " if len(self.row_layout.groups[g][1]) > 1 else ""
+                pid = self.row_pids[members[0]]
+                label = QGraphicsTextItem(f"{indent}never claim" if pid in self.claim_pids else f"{indent}proc {pid}")
             label.setDefaultTextColor(Qt.GlobalColor.black)
-            label.setPos(-70, idx * y_spacing - 6)
+            label.setPos(-120, y - 12)
+            label.setZValue(1)
             self.scene.addItem(label)
 
-        self.scene.setSceneRect(-80, -30, max_x + 150, max_y + 60)
+        top = -70 if self.cycle_step is not None else -30
+        self.scene.setSceneRect(-120, top, max_x + 190, max_y - top + 30)
+
+    def draw_lasso(self, max_step):
+        """Band behind the loop of a liveness counterexample, with an arc from its last step back to its first."""
+        if self.cycle_step is None:
+            return
+        x0, x1 = self.cycle_step * self.X_SCALE, max_step * self.X_SCALE
+        color = QColor("#ff7f0e")
+        fill = QColor(color)
+        fill.setAlphaF(0.12)
+        band = self.scene.addRect(QRectF(x0 - self.X_SCALE / 2, -20, x1 - x0 + self.X_SCALE, self.max_y + 20),
+                                  QPen(Qt.PenStyle.NoPen), QBrush(fill))
+        band.setZValue(-1)
+
+        arc = QPainterPath(QPointF(x1, -20))
+        arc.cubicTo(QPointF(x1, -45), QPointF(x0, -45), QPointF(x0, -22))
+        arc.addPolygon(QPolygonF([QPointF(x0 - 4, -28), QPointF(x0, -20), QPointF(x0 + 4, -28)]))
+        self.scene.addPath(arc, QPen(color, 2)).setZValue(1)
+        label = self.scene.addText(f"cycle: steps {self.cycle_step}-{max_step} repeat")
+        label.setDefaultTextColor(color.darker(130))
+        label.setPos(x0 + 6, -58)
+
+    def show_step(self, step):
+        # Replay cursor: one line item moved around rather than a redraw
+        x = step * self.X_SCALE
+        if self.cursor is None:
+            self.cursor = self.scene.addLine(x, -20, x, self.max_y, QPen(QColor("red"), 2))
+            self.cursor.setZValue(2)
+        else:
+            self.cursor.setLine(x, -20, x, self.max_y)
+        self.ensureVisible(QRectF(x - 40, -20, 80, 20), 40, 0)
+
+    def transition_at(self, pos):
+        """(row, position in row) of the dot under a viewport position, found through the per-row step index."""
+        scene_pos = self.mapToScene(pos)
+        y_index = int(round(scene_pos.y() / self.Y_SPACING))
+        if not 0 <= y_index < len(self.row_layout) or abs(scene_pos.y() - y_index * self.Y_SPACING) > self.DOT_RADIUS + 4:
+            return None
+        kind, _, members = self.row_layout.entries[y_index]
+        if kind != "row":
+            return None
+        row = members[0]
+        steps = self.row_steps[row]
+        step = scene_pos.x() / self.X_SCALE
+        tolerance = (self.DOT_RADIUS + 2) / (self.X_SCALE * self.transform().m11())
+        i = int(np.searchsorted(steps, step))
+        best = min((k for k in (i - 1, i) if 0 <= k < len(steps)), key=lambda k: abs(steps[k] - step), default=None)
+        if best is None or abs(steps[best] - step) > tolerance:
+            return None
+        return row, best
+
+    def mouseMoveEvent(self, event):
+        hit = self.transition_at(event.position().toPoint())
+        if hit is None:
+            QToolTip.hideText()
+        else:
+            row, k = hit
+            t = self.transitions[self.row_idx[row][k] - 1]
+            QToolTip.showText(
+                event.globalPosition().toPoint(),
+                f"Transition #{self.row_idx[row][k]} | step {t['step']} | proc {t['proc_id']} | transition {t.get('line', '?')}",
+                self.viewport()
+            )
+        super().mouseMoveEvent(event)
+
+    def mousePressEvent(self, event):
+        item = self.itemAt(event.pos())
+        if item in self.group_labels and self.row_layout.toggle(self.group_labels[item]):
+            self.draw_timeline()
+            return
+        hit = self.transition_at(event.pos())
+        if hit is not None:
+            row, k = hit
+            self.stepClicked.emit(int(self.row_steps[row][k]))
+        super().mousePressEvent(event)
 
     def wheelEvent(self, event: QWheelEvent):
         zoom = 1.15 if event.angleDelta().y() > 0 else 1 / 1.15
@@ -119,10 +316,15 @@ class ErrorViewer(QMainWindow):
         'deadlock': "The system reached a deadlock where no process could proceed.",
         'invalid end state': "The model ended in a state where not all processes were properly terminated.",
         'unmatched_comm': "A send or receive had no matching partner, showing a communication issue.",
-        'never_claim': "A never claim property was violated, breaking a specified safety/liveness condition."
+        'never_claim': "A never claim property was violated, breaking a specified safety/liveness condition.",
+        'acceptance cycle': "An execution can cycle through an accepting state forever: the steps after the stem repeat endlessly.",
+        'non-progress cycle': "An execution can loop forever without passing a progress label: the highlighted steps repeat endlessly."
     }
 
-    def __init__(self, errors, trail, sim_lines):
+    MAX_CHANNEL_LINES = 8
+
+    def __init__(self, errors, trail, sim_index=None, proc_types=None, spawn_tree=None, causal=None,
+                 flow=None, blocked=None, deadlock=None, sim=None):
         super().__init__()
         self.setWindowTitle("SPIN Error Viewer")
         self.setGeometry(100, 100, 900, 700)
@@ -146,8 +348,10 @@ class ErrorViewer(QMainWindow):
                 'assertion violated': f"❗ Assertion Failed: {msg}",
                 'deadlock': "❗ Deadlock Detected",
                 'invalid end state': f"❗ Invalid End State (depth {depth or '?'})",
-                'unmatched_comm': "❗ Unmatched Communication Detected",
-                'never_claim': "❗ Never Claim Violated"
+                'unmatched_comm': f"❗ Unmatched Communication: {msg}",
+                'never_claim': "❗ Never Claim Violated",
+                'acceptance cycle': f"❗ Acceptance Cycle (depth {depth or '?'})",
+                'non-progress cycle': f"❗ Non-Progress Cycle (depth {depth or '?'})"
             }.get(err_type, msg)
 
             title = QLabel(title_text)
@@ -163,33 +367,100 @@ class ErrorViewer(QMainWindow):
             expl_label.setStyleSheet("margin:0px; padding:0px; line-height:90%; color: #444;")
             layout.addWidget(expl_label)
 
+            # Where the failing process sits in the spawn tree
+            if spawn_tree and trail:
+                last = max(trail, key=lambda t: t['step'])
+                origin = QLabel(f"Failing process (step {last['step']}): {spawn_tree.describe(last['proc_id'])}")
+                origin.setFont(expl_font)
+                origin.setWordWrap(True)
+                origin.setStyleSheet("margin:0px; padding:0px; line-height:90%; color: #444;")
+                layout.addWidget(origin)
+
+            # Who is stuck where, on which channel, and who could have unblocked it
+            if err_type in ('deadlock', 'invalid end state') and deadlock:
+                stuck = QLabel("\n".join(deadlock.describe_lines()))
+                stuck.setFont(expl_font)
+                stuck.setWordWrap(True)
+                stuck.setStyleSheet("margin:0px; padding:0px; line-height:90%; color: #444;")
+                layout.addWidget(stuck)
+
+        # Channel summary: traffic per channel and who is still waiting on one
+        if flow is not None and flow.channels:
+            lines = [c.describe() for c in flow.channels[:self.MAX_CHANNEL_LINES]]
+            if len(flow.channels) > self.MAX_CHANNEL_LINES:
+                lines.append(f"... {len(flow.channels) - self.MAX_CHANNEL_LINES} more channels")
+            waiting = [b.describe() for b in blocked or [] if b.blocked]
+            if waiting:
+                lines.append("Blocked at the end: " + "; ".join(waiting))
+            channel_label = QLabel("\n".join(lines))
+            channel_label.setFont(expl_font)
+            channel_label.setWordWrap(True)
+            channel_label.setStyleSheet("margin:0px; padding:0px; line-height:90%; color: #444;")
+            layout.addWidget(channel_label)
+
+        # Trail steps carry pan transition ids; a Sim replay of the trail gives their PML lines and depths
+        columns = TrailColumns(trail)
+        has_sim = sim is not None and len(sim) > 0
+        self.step_map = resolve_lines(columns, sim) if has_sim else None
+
+        # Steps that cannot have influenced the failure can be hidden from the timeline and trace
+        self.causal = causal
+        self.columns = columns
+        if causal is not None:
+            self.causal_box = QCheckBox(f"Causal slice only ({len(causal)} steps lead to the failure)")
+            if self.step_map is None or not self.step_map.valid:
+                # Without a replay of this trail no Sim action can be placed on the timeline
+                self.causal_box.setText(self.causal_box.text() + " - trace only")
+                self.causal_box.setToolTip(f"The timeline is not filtered: {self.step_map.describe()}."
+                                           if self.step_map is not None else "")
+            self.causal_box.toggled.connect(self.show_causal_slice)
+            layout.addWidget(self.causal_box)
+
         # Timeline
-        timeline = TimelineWidget(trail)
+        timeline = TimelineWidget(trail, proc_types)
+        self.timeline = timeline
         timeline.setMinimumHeight(200)
         layout.addWidget(timeline)
 
+        # Step-by-step replay of the counterexample
+        self.replay = ReplayBar(columns, load_pml_lines(DATA_DIR))
+        self.replay.controller.frameChanged.connect(lambda index: timeline.show_step(int(columns.step[index])))
+        timeline.stepClicked.connect(lambda step: self.replay.controller.seek(np.searchsorted(columns.step, step)))
+        layout.addWidget(self.replay)
+
         # Simulation trace
         self.toggle_button = QPushButton("Show Full Simulation Trace")
         self.toggle_button.setStyleSheet("margin:4px; padding:4px;")
         layout.addWidget(self.toggle_button)
 
-        self.sim_box = QTextEdit()
-        self.sim_box.setReadOnly(True)
-        self.sim_box.setFontFamily("Courier")
-        self.sim_box.setFontPointSize(9)
+        # Lines are paged from the indexed Sim block, so showing the trace costs nothing up front.
+        # The trace is numbered by Sim depth, not trail step: the failing step is the failing action's depth
+        failing_step = int(sim.depth[failing_action(sim)]) if has_sim else None
+        self.sim_box = TraceViewer(sim_index, failing_step) if sim_index is not None else QLabel("No simulation trace found.")
         self.sim_box.setVisible(False)
         self.sim_box.setStyleSheet("margin:0px; padding:2px;")
-        layout.addWidget(self.sim_box)
-
-        self.sim_lines = sim_lines
+        layout.addWidget(self.sim_box, stretch=1)
 
         self.toggle_button.clicked.connect(self.toggle_trace)
+        # Only a replay of this trail shares its step numbering; any other Sim trace is left where it is
+        if sim_index is not None and self.step_map is not None and self.step_map.valid:
+            self.replay.controller.frameChanged.connect(self.sync_trace)
+
+    def sync_trace(self, index):
+        depth = self.step_map.depth_at(index)
+        if depth is not None and self.sim_box.isVisible():
+            self.sim_box.go_to_step(depth)
+
+    def show_causal_slice(self, only):
+        if self.step_map is not None and self.step_map.valid and len(self.columns):
+            # The trail ends at the failure, which stays in view even if the Sim placed it elsewhere
+            steps = np.union1d(self.step_map.steps_of_actions(self.causal.actions), [self.columns.step[-1]])
+            self.timeline.set_step_filter(steps if only else None)
+        if isinstance(self.sim_box, TraceViewer):
+            self.sim_box.set_filter(self.causal.rows if only else None)
 
     def toggle_trace(self):
         visible = self.sim_box.isVisible()
-        if not visible:
-            self.sim_box.clear()
-            self.sim_box.append("\n".join(self.sim_lines))
         self.sim_box.setVisible(not visible)
         self.toggle_button.setText(
             "Hide Full Simulation Trace" if not visible else "Show Full Simulation Trace"
@@ -199,13 +470,8 @@ class ErrorViewer(QMainWindow):
 def main():
     trail, errors = load_parsed_json(DATA_JSON)
 
-    # Find txt file for simulation extraction
-    txt_files = [f for f in os.listdir(DATA_DIR) if f.endswith('.txt')]
-    if txt_files:
-        txt_path = os.path.join(DATA_DIR, txt_files[0])
-        sim_lines = extract_simulation(txt_path)
-    else:
-        sim_lines = []
+    sim_path = find_sim_file(DATA_DIR)
+    sim_index = SimLineIndex(sim_path) if sim_path else None
 
     app = QApplication(sys.argv)
 
@@ -219,7 +485,17 @@ def main():
         win.show()
         sys.exit(app.exec())
 
-    win = ErrorViewer(errors, trail, sim_lines)
+    spawn_tree = load_spawn_tree(DATA_DIR)
+    proc_types = spawn_tree.proc_types if spawn_tree else load_process_types(DATA_JSON)
+    sim = load_sim_trace(DATA_DIR)
+    causal = flow = blocked = deadlock = None
+    if sim is not None and len(sim):
+        pml_lines = load_pml_lines(DATA_DIR)
+        flow = match_messages(sim, parse_channel_decls(pml_lines))
+        causal = causal_slice(sim, flow)
+        blocked = blocked_operations(sim, flow, pml_lines)
+        deadlock = explain_deadlock(sim, flow, pml_lines, blocked)
+    win = ErrorViewer(errors, trail, sim_index, proc_types, spawn_tree, causal, flow, blocked, deadlock, sim)
     win.show()
     sys.exit(app.exec())
 